@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Memory use and allocation counts of labeling schema representations.
+
+Usage (with isoenum importable, e.g. installed or on PYTHONPATH):
+    python benchmarks/labeling_memory.py [<path-or-id>] [<enumerate>] [--complete]
+
+Example:
+    python benchmarks/labeling_memory.py "CCCCCCCCCCCCCCCC(=O)O" 13:C:0:3 --complete
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from isoenum import api
+from isoenum import fileio
+from isoenum import labeling
+
+
+def measure(create_schemas, keep):
+    """Measure memory used by labeling schemas.
+
+    :param create_schemas: Callable that returns iterable of labeling schemas.
+    :param keep: Keep labeling schemas in memory or discard every schema after it was created.
+    :return: Tuple of number of schemas, seconds, peak bytes, retained bytes and allocated blocks.
+    :rtype: :py:class:`tuple`
+    """
+    gc.collect()
+    tracemalloc.start()
+    start_snapshot = tracemalloc.take_snapshot()
+    start = time.time()
+
+    schemas = []
+    count = 0
+    for schema in create_schemas():
+        count += 1
+        if keep:
+            schemas.append(schema)
+
+    seconds = time.time() - start
+    end_snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    statistics = end_snapshot.compare_to(start_snapshot, 'filename')
+    retained = sum(stat.size_diff for stat in statistics)
+    blocks = sum(stat.count_diff for stat in statistics)
+    return count, seconds, peak, retained, blocks
+
+
+def main(path_or_id='CCCCCCCCCCCCCCCC(=O)O', enumerate_opt='13:C:0:3', complete=False):
+    molfile = next(fileio.iter_molfiles(path_or_id))
+    labeling_options = api._labeling_options(molfile=molfile, specific_opt=[], all_opt=[],
+                                             enumerate_opt=[enumerate_opt], complete_opt=complete,
+                                             ignore_iso_opt=False)
+
+    representations = [
+        ('list of dicts', lambda: labeling.create_labeling_schema(**labeling_options)),
+        ('isotope codes', lambda: labeling.iter_labeling_schemas(**labeling_options)),
+        ('numpy blocks', lambda: (labeling_schema for labeling_schema_block
+                                  in labeling.iter_labeling_schema_blocks(engine='numpy', **labeling_options)
+                                  for labeling_schema in labeling_schema_block)),
+    ]
+
+    print('{:<15}{:>10}{:>10}{:>16}{:>16}{:>16}'.format('representation', 'schemas', 'seconds',
+                                                        'stream peak B', 'kept B/schema', 'kept blk/schema'))
+    for name, create_schemas in representations:
+        count, seconds, _, retained, blocks = measure(create_schemas, keep=True)
+        _, _, peak, _, _ = measure(create_schemas, keep=False)
+        print('{:<15}{:>10}{:>10.2f}{:>16}{:>16.1f}{:>16.2f}'.format(name, count, seconds, peak,
+                                                                      retained / count, blocks / count))
+
+
+if __name__ == '__main__':
+    arguments = [argument for argument in sys.argv[1:] if argument != '--complete']
+    main(*arguments, complete='--complete' in sys.argv)
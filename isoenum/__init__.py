@@ -18,6 +18,9 @@ This package includes the following modules:
 ``labeling``
     This module provides functions for generating a labeling schema.
 
+``mid``
+    This module provides computation of mass isotopomer distributions.
+
 ``nmr``
     This module provides descriptions of coupling combinations that
     could be observed within NMR experiments.
@@ -26,6 +29,26 @@ This package includes the following modules:
     This module provides functions to call the Open Babel software to convert 
     between ``InChI`` and ``CTfile`` formatted files. 
 
+``index``
+    This module provides byte offset index of ``SDfile`` records.
+
+``cache``
+    This module provides caches of Open Babel conversion results.
+
+``checkpoint``
+    This module provides checkpoint files of resumable enumeration.
+
+``parallel``
+    This module provides serial, thread pool and process pool executors
+    of Open Babel conversions.
+
+``writers``
+    This module provides incremental writers of conversion results.
+
+``inchi``
+    This module provides synthesis of isotopic ``InChI`` layer of labeling schemas
+    from a single Open Babel conversion of unlabeled molecule.
+
 ``conf``
     This module provides the processing of configuration files necessary for 
     isotopic enumerator.
@@ -9,36 +9,631 @@ This module provides routines to augment ``CTfile`` objects
 with additional information and used by ``isoenum`` package CLI. 
 """
 
-import tempfile
+import functools
+import time
 from collections import Counter
 from collections import defaultdict
 from collections import OrderedDict
 
 import more_itertools
 
+from . import conf
 from . import fileio
+from . import inchi
 from . import labeling
 from . import nmr
 from . import openbabel
+from . import parallel
+from . import utils
 from .conf import isotopes_conf
-
-
-def iso(path_or_id, specific_opt=None, all_opt=None, enumerate_opt=None, complete_opt=False, ignore_iso_opt=False):
+from .conf import labeling_engine
+from .mid import mass_isotopomer_distribution
+
+
+class IsoOptions(object):
+    """Labeling, enumeration and conversion options of isotopically-resolved ``Molfile`` objects,
+    shared by :func:`~isoenum.api.iso` and related functions, which accept them as keyword arguments."""
+
+    def __init__(self, specific_opt=None, all_opt=None, enumerate_opt=None, complete_opt=False, ignore_iso_opt=False,
+                 chunk_size=500, symmetry_opt=False, engine=None, offset=0, limit=None, checkpoint=None, shard=None,
+                 enrichment_opt=None, min_probability=None, cumulative_probability=None, top=None,
+                 mass_window_opt=None, target_mass_opt=None, ppm=5.0, create_molfiles=True, executor=None,
+                 jobs=None, inchi_engine=None):
+        """Isotopically-resolved ``Molfile`` options initializer.
+
+        :param list specific_opt: List of isotopes per specific element type and position.
+        :param list all_opt: List of isotopes for specific element type.
+        :param list enumerate_opt: List of isotopes to perform enumeration.
+        :param complete_opt: Identify if every element need to have isotope information.
+        :type complete_opt: py:obj:`True` or py:obj:`False`
+        :param ignore_iso_opt: Ignore existing isotope information or not.
+        :type ignore_iso_opt: py:obj:`True` or py:obj:`False`
+        :param int chunk_size: Number of labeling schemas converted into ``InChI`` per Open Babel call.
+        :param symmetry_opt: Keep single labeling schema per group of labeling schemas equivalent
+                             under molecular symmetry and report their number as "Multiplicity".
+        :type symmetry_opt: py:obj:`True` or py:obj:`False`
+        :param str engine: Labeling engine: "auto", "python" or "numpy", see
+                           :func:`~isoenum.labeling.iter_labeling_schema_blocks`.
+        :param int offset: Rank of the first labeling schema of every ``Molfile``.
+        :param int limit: Maximum number of labeling schemas of every ``Molfile``, all if not provided.
+        :param checkpoint: Checkpoint used to skip completed labeling schemas and record progress.
+        :type checkpoint: :class:`~isoenum.checkpoint.Checkpoint`
+        :param tuple shard: (shard number, number of shards) tuple, shard number is 1-based. Labeling schemas
+                            of all ``Molfile`` objects are split by rank into contiguous slices of equal size
+                            and only the slice of given shard is created.
+        :param list enrichment_opt: List of isotope abundances that override natural abundances.
+        :param float min_probability: Keep labeling schemas with at least given probability.
+        :param float cumulative_probability: Keep the most probable labeling schemas that together
+                                             account for given fraction of total probability.
+        :param int top: Keep given number of the most probable labeling schemas of every ``Molfile``.
+        :param list mass_window_opt: List of "lowest:highest" monoisotopic mass windows.
+        :param list target_mass_opt: List of target monoisotopic masses.
+        :param float ppm: Tolerance of target masses in parts per million.
+        :param create_molfiles: Create ``Molfile`` of every labeling schema, otherwise ``SDfile`` entries share
+                                empty ``Molfile`` and only their data items are created, e.g. for ``InChI`` output.
+        :type create_molfiles: py:obj:`True` or py:obj:`False`
+        :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+        :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
+        :param str inchi_engine: ``InChI`` engine: "obabel", "synthesize" or "verify",
+                                 see :func:`~isoenum.inchi.create_inchis`.
+        """
+        self.specific_opt = specific_opt or []
+        self.all_opt = all_opt or []
+        self.enumerate_opt = enumerate_opt or []
+        self.complete_opt = complete_opt
+        self.ignore_iso_opt = ignore_iso_opt
+        self.chunk_size = chunk_size
+        self.symmetry_opt = symmetry_opt
+        self.engine = labeling_engine if engine is None else engine
+        self.offset = offset
+        self.limit = limit
+        self.checkpoint = checkpoint
+        self.shard = shard
+        self.enrichment_opt = enrichment_opt or []
+        self.min_probability = min_probability
+        self.cumulative_probability = cumulative_probability
+        self.top = top
+        self.mass_window_opt = mass_window_opt or []
+        self.target_mass_opt = target_mass_opt or []
+        self.ppm = ppm
+        self.create_molfiles = create_molfiles
+        self.executor = executor
+        self.jobs = jobs
+        self.inchi_engine = conf.inchi_engine if inchi_engine is None else inchi_engine
+
+        if self.inchi_engine not in inchi.ENGINES:
+            raise ValueError('Unknown InChI engine: "{}". '
+                             'Available engines are: {}'.format(self.inchi_engine, ', '.join(inchi.ENGINES)))
+
+        if self.mass_windows_opt and (self.probability_cutoff_opt or offset or limit is not None or
+                                      checkpoint is not None or shard is not None):
+            raise ValueError('Mass windows are not compatible with probability cutoff, offset, limit, '
+                             'checkpoint and shard options.')
+
+        if self.probability_cutoff_opt and (symmetry_opt or offset or limit is not None or
+                                            checkpoint is not None or shard is not None):
+            raise ValueError('Probability cutoff is not compatible with symmetry, offset, limit, '
+                             'checkpoint and shard options.')
+
+    @property
+    def mass_windows_opt(self):
+        """Identify if labeling schemas are filtered by mass windows or target masses."""
+        return bool(self.mass_window_opt or self.target_mass_opt)
+
+    @property
+    def probability_cutoff_opt(self):
+        """Identify if labeling schemas are filtered by probability."""
+        return any(option is not None for option in (self.min_probability, self.cumulative_probability, self.top))
+
+    def labeling_options(self, molfile):
+        """Validate labeling options of ``Molfile``.
+
+        :param molfile: Instance of ``Molfile``.
+        :type molfile: :class:`~ctfile.ctfile.Molfile`
+        :return: Keyword arguments of :mod:`isoenum.labeling` functions.
+        :rtype: :py:class:`dict`
+        """
+        return _labeling_options(molfile=molfile, specific_opt=self.specific_opt, all_opt=self.all_opt,
+                                 enumerate_opt=self.enumerate_opt, complete_opt=self.complete_opt,
+                                 ignore_iso_opt=self.ignore_iso_opt)
+
+
+def iso(path_or_id, specific_opt=None, all_opt=None, enumerate_opt=None, complete_opt=False, ignore_iso_opt=False,
+        backend=None, records=None, ids=None, id_field='ID', **options):
     """Create isotopically-resolved ``SDfile``.
 
     :param str path_or_id: Path to ``CTfile`` or file identifier.
     :param list specific_opt: List of isotopes per specific element type and position.
-    :param list all_opt: List of isotopes for specific element type. 
-    :param list enumerate_opt: List of isotopes to perform enumeration. 
+    :param list all_opt: List of isotopes for specific element type.
+    :param list enumerate_opt: List of isotopes to perform enumeration.
     :param complete_opt: Identify if every element need to have isotope information.
-    :type complete_opt: py:obj:`True` or py:obj:`False`  
+    :type complete_opt: py:obj:`True` or py:obj:`False`
     :param ignore_iso_opt: Ignore existing isotope information or not.
     :type ignore_iso_opt: py:obj:`True` or py:obj:`False`
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
+    :param list records: List of 1-based record numbers to process, all records if not provided.
+    :param list ids: List of record identifiers to process, all records if not provided.
+    :param str id_field: Name of ``SDfile`` data item used as record identifier.
+    :param options: Other enumeration options, see :class:`~isoenum.api.IsoOptions`.
     :return: instance of ``SDfile``.
     :rtype: :class:`ctfile.ctfile.SDfile`
     """
-    ctfile = fileio.create_ctfile(path_or_id=path_or_id)
-    sdfile = fileio.create_empty_sdfile_obj()
+    records = iter_iso(path_or_id=path_or_id, specific_opt=specific_opt, all_opt=all_opt, enumerate_opt=enumerate_opt,
+                       complete_opt=complete_opt, ignore_iso_opt=ignore_iso_opt, backend=backend, records=records,
+                       ids=ids, id_field=id_field, **options)
+    return fileio.create_sdfile_obj(records)
+
+
+def iter_iso(path_or_id, backend=None, records=None, ids=None, id_field='ID', **options):
+    """Generate isotopically-resolved ``Molfile`` objects and their data as they are created,
+    see :func:`~isoenum.api.iso`.
+
+    :param str path_or_id: Path to ``CTfile`` or file identifier.
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
+    :param list records: List of 1-based record numbers to process, all records if not provided.
+    :param list ids: List of record identifiers to process, all records if not provided.
+    :param str id_field: Name of ``SDfile`` data item used as record identifier.
+    :param options: Enumeration options, see :class:`~isoenum.api.IsoOptions`.
+    :return: Generator of (``Molfile``, data) tuples, ``Molfile`` objects are shared empty ``Molfile``
+             if "create_molfiles" option is not set.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if backend is not None:
+        openbabel.set_backend(name=backend)
+
+    molfiles = functools.partial(fileio.iter_molfiles, path_or_id=path_or_id, records=records, ids=ids,
+                                 id_field=id_field)
+    return iter_iso_molfiles(molfiles=molfiles, **options)
+
+
+def iso_molfiles(molfiles, **options):
+    """Create isotopically-resolved ``SDfile`` from iterable of ``Molfile`` objects.
+
+    :param molfiles: Iterable of ``Molfile`` objects, e.g. :func:`~isoenum.fileio.iter_molfiles` generator,
+                     or callable that returns new iterable, shard option needs to read ``Molfile`` objects twice.
+    :param options: Enumeration options, see :class:`~isoenum.api.IsoOptions`.
+    :return: instance of ``SDfile``.
+    :rtype: :class:`ctfile.ctfile.SDfile`
+    """
+    return fileio.create_sdfile_obj(iter_iso_molfiles(molfiles=molfiles, **options))
+
+
+def iter_iso_molfiles(molfiles, **options):
+    """Generate isotopically-resolved ``Molfile`` objects and their data from iterable of ``Molfile`` objects
+    as they are created, see :func:`~isoenum.api.iso_molfiles`.
+
+    :param molfiles: Iterable of ``Molfile`` objects, e.g. :func:`~isoenum.fileio.iter_molfiles` generator,
+                     or callable that returns new iterable, shard option needs to read ``Molfile`` objects twice.
+    :param options: Enumeration options, see :class:`~isoenum.api.IsoOptions`.
+    :return: Generator of (``Molfile``, data) tuples, ``Molfile`` objects are shared empty ``Molfile``
+             if "create_molfiles" option is not set.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    for record_chunk in _iter_iso_record_chunks(molfiles=molfiles, options=IsoOptions(**options)):
+        for record in record_chunk:
+            yield record
+
+
+def iso_chunks(molfiles, **options):
+    """Generate isotopically-resolved ``SDfile`` objects, one per Open Babel conversion,
+    see :func:`~isoenum.api.iso_molfiles`.
+
+    Labeling schemas are created lazily and every chunk is yielded as soon as it is converted,
+    so memory does not grow with the number of labeling schemas. With checkpoint, checkpoint
+    is updated after every chunk has been consumed, so chunks should be written before
+    the next chunk is requested.
+
+    :param molfiles: Iterable of ``Molfile`` objects, e.g. :func:`~isoenum.fileio.iter_molfiles` generator,
+                     or callable that returns new iterable, shard option needs to read ``Molfile`` objects twice.
+    :param options: Enumeration options, see :class:`~isoenum.api.IsoOptions`.
+    :return: Generator of ``SDfile`` objects.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    for record_chunk in _iter_iso_record_chunks(molfiles=molfiles, options=IsoOptions(**options)):
+        yield fileio.create_sdfile_obj(record_chunk)
+
+
+def _iter_iso_record_chunks(molfiles, options):
+    """Generate lists of isotopically-resolved (``Molfile``, data) records, one per Open Babel conversion.
+
+    Checkpoint is updated after the consumer has requested the next list of records.
+
+    :param molfiles: Iterable of ``Molfile`` objects or callable that returns new iterable of ``Molfile`` objects.
+    :param options: Enumeration options.
+    :type options: :class:`~isoenum.api.IsoOptions`
+    :return: Generator of lists of (``Molfile``, data) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    tasks = _iter_iso_tasks(molfiles=molfiles, options=options)
+
+    with parallel.create_executor(name=options.executor, jobs=options.jobs) as conversion_executor:
+        results = conversion_executor.map_ordered(_convert_iso_task, tasks)
+        for (template, labeling_schemas, progress), inchis in results:
+            if labeling_schemas:
+                yield _create_iso_records(template=template, labeling_schemas=labeling_schemas, inchis=inchis,
+                                          create_molfiles=options.create_molfiles)
+            if progress is not None:
+                record_number, rank = progress
+                options.checkpoint.update(record=record_number, rank=rank)
+
+
+def _iter_iso_tasks(molfiles, options):
+    """Generate conversion tasks of labeling schemas, at most "chunk_size" labeling schemas per task.
+
+    Labeling schemas are created lazily, only when executor requests the next task.
+
+    :param molfiles: Iterable of ``Molfile`` objects or callable that returns new iterable of ``Molfile`` objects.
+    :param options: Enumeration options.
+    :type options: :class:`~isoenum.api.IsoOptions`
+    :return: Generator of (arguments, context) tuples, see :func:`~isoenum.api._iso_task`.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    chunk_size = options.chunk_size
+    inchi_engine = options.inchi_engine
+    checkpoint = options.checkpoint
+
+    if options.mass_windows_opt:
+        mass_windows = _check_mass_window_opt(mass_window_opt=options.mass_window_opt,
+                                              target_mass_opt=options.target_mass_opt, ppm=options.ppm)
+        for molfile in _open_molfiles(molfiles):
+            labeling_options = options.labeling_options(molfile)
+            symmetry_group = labeling.create_symmetry_group(**labeling_options) if options.symmetry_opt else None
+            template = fileio.MolfileTemplate(molfile)
+            mass_window_labeling_schemas = labeling.iter_mass_window_labeling_schemas(mass_windows=mass_windows,
+                                                                                      **labeling_options)
+
+            labeling_schemas = []
+            for labeling_schema, mass in mass_window_labeling_schemas:
+                data_items = OrderedDict([('Mass', '{:.6f}'.format(mass))])
+                if symmetry_group is not None:
+                    multiplicity = symmetry_group.multiplicity(labeling_schema)
+                    if not multiplicity:
+                        continue
+                    data_items['Multiplicity'] = '{}'.format(multiplicity)
+
+                labeling_schemas.append((labeling_schema, data_items))
+                if len(labeling_schemas) >= chunk_size:
+                    yield _iso_task(template=template, labeling_schemas=labeling_schemas, chunk_size=chunk_size,
+                                    inchi_engine=inchi_engine)
+                    labeling_schemas = []
+
+            if labeling_schemas:
+                yield _iso_task(template=template, labeling_schemas=labeling_schemas, chunk_size=chunk_size,
+                                inchi_engine=inchi_engine)
+        return
+
+    if options.probability_cutoff_opt:
+        enrichment = _check_enrichment_opt(enrichment_opt=options.enrichment_opt, isotopes_conf=isotopes_conf)
+        for molfile in _open_molfiles(molfiles):
+            probable_labeling_schemas = labeling.iter_probable_labeling_schemas(
+                enrichment=enrichment, min_probability=options.min_probability,
+                cumulative_probability=options.cumulative_probability, top=options.top,
+                **options.labeling_options(molfile))
+            template = fileio.MolfileTemplate(molfile)
+
+            for chunk in more_itertools.chunked(probable_labeling_schemas, chunk_size):
+                labeling_schemas = [(labeling_schema, OrderedDict([('Probability', '{:.6g}'.format(probability))]))
+                                    for labeling_schema, probability in chunk]
+                yield _iso_task(template=template, labeling_schemas=labeling_schemas, chunk_size=chunk_size,
+                                inchi_engine=inchi_engine)
+        return
+
+    rank_windows = _iter_rank_windows(molfiles=molfiles, options=options)
+
+    for record_number, molfile, labeling_options, start, stop in rank_windows:
+        if checkpoint is not None:
+            start = max(start, checkpoint.completed_rank(record_number))
+        if stop is not None and start >= stop:
+            continue
+
+        template = fileio.MolfileTemplate(molfile)
+
+        # without checkpoint, representatives are generated directly without creating every labeling schema
+        if options.symmetry_opt and checkpoint is None:
+            unique_labeling_schemas = labeling.iter_unique_labeling_schemas(
+                offset=start, limit=None if stop is None else stop - start, **labeling_options)
+            for chunk in more_itertools.chunked(unique_labeling_schemas, chunk_size):
+                labeling_schemas = [(labeling_schema, OrderedDict([('Multiplicity', '{}'.format(multiplicity))]))
+                                    for labeling_schema, multiplicity in chunk]
+                yield _iso_task(template=template, labeling_schemas=labeling_schemas, chunk_size=chunk_size,
+                                inchi_engine=inchi_engine)
+            continue
+
+        symmetry_group = labeling.create_symmetry_group(**labeling_options) if options.symmetry_opt else None
+        labeling_schema_blocks = labeling.iter_labeling_schema_blocks(
+            block_size=chunk_size, engine=options.engine, offset=start, limit=None if stop is None else stop - start,
+            **labeling_options)
+
+        # with symmetry, blocks are collected until they contain enough representative labeling schemas
+        pending = []
+        labeling_schema_block = None
+        for labeling_schema_block in labeling_schema_blocks:
+            for labeling_schema in labeling_schema_block:
+                if symmetry_group is None:
+                    pending.append((labeling_schema, None))
+                else:
+                    multiplicity = symmetry_group.multiplicity(labeling_schema)
+                    if multiplicity:
+                        data_items = OrderedDict([('Multiplicity', '{}'.format(multiplicity))])
+                        pending.append((labeling_schema, data_items))
+
+            if len(pending) >= chunk_size:
+                progress = None if checkpoint is None else (record_number, labeling_schema_block.stop)
+                yield _iso_task(template=template, labeling_schemas=pending, chunk_size=chunk_size,
+                                progress=progress, inchi_engine=inchi_engine)
+                pending = []
+
+        progress = None
+        if checkpoint is not None and labeling_schema_block is not None:
+            progress = (record_number, labeling_schema_block.stop)
+        if pending or progress is not None:
+            yield _iso_task(template=template, labeling_schemas=pending, chunk_size=chunk_size, progress=progress,
+                            inchi_engine=inchi_engine)
+
+
+def _iter_rank_windows(molfiles, options):
+    """Generate labeling options and range of labeling schema ranks of every ``Molfile``.
+
+    Without shard, ``Molfile`` objects are processed one at a time. With shard, ``Molfile`` objects
+    are read twice: labeling schemas of every ``Molfile`` are counted first, keeping only counts,
+    then ranges of all ``Molfile`` objects are concatenated and split into equal contiguous slices
+    while ``Molfile`` objects are read again, so that concatenation of shard outputs in shard order
+    is the same as unsharded output.
+
+    :param molfiles: Iterable of ``Molfile`` objects or callable that returns new iterable of ``Molfile`` objects.
+    :param options: Enumeration options.
+    :type options: :class:`~isoenum.api.IsoOptions`
+    :return: Generator of (record number, ``Molfile``, labeling options, start rank, stop rank) tuples,
+             stop rank is None if all remaining labeling schemas are created.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    offset = options.offset
+    stop = None if options.limit is None else offset + options.limit
+
+    if options.shard is None:
+        for record_number, molfile in enumerate(_open_molfiles(molfiles), start=1):
+            yield record_number, molfile, options.labeling_options(molfile), offset, stop
+        return
+
+    if not callable(molfiles) and iter(molfiles) is molfiles:
+        raise ValueError('Shard option needs to read "Molfile" objects twice, provide list of "Molfile" objects '
+                         'or callable that returns new iterable of "Molfile" objects instead of iterator.')
+
+    sizes = []
+    for molfile in _open_molfiles(molfiles):
+        total = labeling.count_labeling_schema(**options.labeling_options(molfile))
+        window_stop = total if stop is None else min(stop, total)
+        sizes.append(window_stop - min(offset, window_stop))
+
+    shard_number, shard_count = options.shard
+    size = sum(sizes)
+    shard_start = size * (shard_number - 1) // shard_count
+    shard_stop = size * shard_number // shard_count
+
+    position = 0
+    for record_number, molfile in enumerate(_open_molfiles(molfiles), start=1):
+        if position >= shard_stop or record_number > len(sizes):
+            break
+        window_size = sizes[record_number - 1]
+        window_start = offset + min(max(shard_start - position, 0), window_size)
+        window_stop = offset + min(max(shard_stop - position, 0), window_size)
+        position += window_size
+        yield record_number, molfile, options.labeling_options(molfile), window_start, window_stop
+
+
+def _open_molfiles(molfiles):
+    """Open iterable of ``Molfile`` objects.
+
+    :param molfiles: Iterable of ``Molfile`` objects or callable that returns new iterable of ``Molfile`` objects.
+    :return: Iterable of ``Molfile`` objects.
+    """
+    return molfiles() if callable(molfiles) else molfiles
+
+
+def _iso_task(template, labeling_schemas, chunk_size, progress=None, inchi_engine='obabel'):
+    """Create conversion task of labeling schemas of ``Molfile``.
+
+    Task arguments are compact: text template of ``Molfile`` and isotopes of labeling schemas,
+    so they are cheap to send to process pool workers, labeling schemas stay in task context.
+
+    :param template: Template of ``Molfile``.
+    :type template: :class:`~isoenum.fileio.MolfileTemplate`
+    :param list labeling_schemas: List of (labeling schema, data items) tuples.
+    :param int chunk_size: Number of labeling schemas converted into ``InChI`` per Open Babel call.
+    :param tuple progress: (record number, rank) tuple recorded in checkpoint once task is processed.
+    :param str inchi_engine: ``InChI`` engine: "obabel", "synthesize" or "verify".
+    :return: (arguments, context) tuple of :func:`~isoenum.api._convert_iso_task`.
+    :rtype: :py:class:`tuple`
+    """
+    isotopes = [labeling_schema.isotopes_by_position() for labeling_schema, _ in labeling_schemas]
+    return (template, isotopes, chunk_size, inchi_engine), (template, labeling_schemas, progress)
+
+
+def _convert_iso_task(template, isotopes, chunk_size=500, inchi_engine='obabel'):
+    """Create ``InChI`` of labeling schemas of ``Molfile``, executed by executor workers.
+
+    :param template: Template of ``Molfile``.
+    :type template: :class:`~isoenum.fileio.MolfileTemplate`
+    :param list isotopes: List of atom number to isotope dictionaries, one per labeling schema.
+    :param int chunk_size: Number of labeling schemas converted into ``InChI`` per Open Babel call.
+    :param str inchi_engine: ``InChI`` engine: "obabel", "synthesize" or "verify".
+    :return: List of ``InChI`` strings in the same order as labeling schemas.
+    :rtype: :py:class:`list`
+    """
+    return inchi.create_inchis(template=template, isotopes=isotopes, chunk_size=chunk_size, engine=inchi_engine)
+
+
+def _create_iso_records(template, labeling_schemas, inchis, create_molfiles=True):
+    """Create isotopically-resolved (``Molfile``, data) records from labeling schemas of ``Molfile``.
+
+    :param template: Template of ``Molfile``.
+    :type template: :class:`~isoenum.fileio.MolfileTemplate`
+    :param list labeling_schemas: List of (labeling schema, data items) tuples, data items
+                                  are added after "InChI" data item if provided.
+    :param list inchis: List of ``InChI`` strings in the same order as labeling schemas.
+    :param create_molfiles: Parse rendered ``Molfile`` strings into ``Molfile`` objects or use empty ``Molfile``.
+    :type create_molfiles: py:obj:`True` or py:obj:`False`
+    :return: List of (``Molfile``, data) tuples.
+    :rtype: :py:class:`list`
+    """
+    records = []
+    empty_molfile = None if create_molfiles else fileio.create_empty_molfile_obj()
+    for (labeling_schema, data_items), inchi in zip(labeling_schemas, inchis):
+        sdfile_data = OrderedDict()
+        sdfile_data.setdefault('InChI', []).append('{}'.format(inchi))
+        for key, value in (data_items or {}).items():
+            sdfile_data.setdefault(key, []).append(value)
+        if create_molfiles:
+            ctfile_str = template.render(labeling_schema.isotopes_by_position())
+            new_molfile = fileio.create_ctfile_from_ctfile_str(ctfile_str)
+        else:
+            new_molfile = empty_molfile
+        records.append((new_molfile, sdfile_data))
+    return records
+
+
+def count(path_or_id, backend=None, records=None, ids=None, id_field='ID', sample_size=20, **options):
+    """Count labeling schemas and Open Babel calls that :func:`~isoenum.api.iso` would need
+    and estimate wall time from cost of rendering and converting a sample of labeling schemas.
+
+    Labeling schemas are counted without creating them, unless symmetry, mass window or probability
+    options select them, then they are created but not converted. Estimate does not account
+    for cached results and synthesized ``InChI``.
+
+    :param str path_or_id: Path to ``CTfile`` or file identifier.
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
+    :param list records: List of 1-based record numbers to process, all records if not provided.
+    :param list ids: List of record identifiers to process, all records if not provided.
+    :param str id_field: Name of ``SDfile`` data item used as record identifier.
+    :param int sample_size: Number of labeling schemas converted to measure conversion cost.
+    :param options: Enumeration options, see :class:`~isoenum.api.IsoOptions`.
+    :return: List of dictionaries with "Record", "Schemas", "Conversions" and "Seconds" per ``Molfile``.
+    :rtype: :py:class:`list`
+    """
+    if backend is not None:
+        openbabel.set_backend(name=backend)
+
+    options = IsoOptions(**options)
+    molfiles = functools.partial(fileio.iter_molfiles, path_or_id=path_or_id, records=records, ids=ids,
+                                 id_field=id_field)
+
+    counts = []
+    conversion_cost = None
+    for record_number, molfile, schema_count, sample in _iter_iso_counts(molfiles, options, sample_size):
+        if conversion_cost is None and sample:
+            template = fileio.MolfileTemplate(molfile)
+            start = time.time()
+            ctfile_strs = [template.render(labeling_schema.isotopes_by_position()) for labeling_schema in sample]
+            rendering_cost = (time.time() - start) / len(ctfile_strs)
+
+            per_call_cost, per_record_cost = fileio.measure_inchi_conversion_cost(
+                ctfile_strs * 2 if len(ctfile_strs) < 2 else ctfile_strs)
+            conversion_cost = (per_call_cost, per_record_cost + rendering_cost)
+
+        per_call_cost, per_record_cost = conversion_cost or (0.0, 0.0)
+        conversion_count = -(-schema_count // options.chunk_size)
+
+        counts.append(OrderedDict([('Record', record_number),
+                                   ('Schemas', schema_count),
+                                   ('Conversions', conversion_count),
+                                   ('Seconds', conversion_count * per_call_cost + schema_count * per_record_cost)]))
+    return counts
+
+
+def _iter_iso_counts(molfiles, options, sample_size):
+    """Generate number of labeling schemas of every ``Molfile`` that :func:`~isoenum.api.iso` would create.
+
+    :param molfiles: Iterable of ``Molfile`` objects or callable that returns new iterable of ``Molfile`` objects.
+    :param options: Enumeration options.
+    :type options: :class:`~isoenum.api.IsoOptions`
+    :param int sample_size: Maximum number of labeling schemas kept as sample.
+    :return: Generator of (record number, ``Molfile``, number of labeling schemas, sample of labeling schemas) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if options.mass_windows_opt or options.probability_cutoff_opt:
+        if options.mass_windows_opt:
+            mass_windows = _check_mass_window_opt(mass_window_opt=options.mass_window_opt,
+                                                  target_mass_opt=options.target_mass_opt, ppm=options.ppm)
+        else:
+            enrichment = _check_enrichment_opt(enrichment_opt=options.enrichment_opt, isotopes_conf=isotopes_conf)
+
+        for record_number, molfile in enumerate(_open_molfiles(molfiles), start=1):
+            labeling_options = options.labeling_options(molfile)
+            if options.mass_windows_opt:
+                symmetry_group = labeling.create_symmetry_group(**labeling_options) if options.symmetry_opt else None
+                labeling_schemas = (labeling_schema for labeling_schema, _ in
+                                    labeling.iter_mass_window_labeling_schemas(mass_windows=mass_windows,
+                                                                               **labeling_options)
+                                    if symmetry_group is None or symmetry_group.multiplicity(labeling_schema))
+            else:
+                labeling_schemas = (labeling_schema for labeling_schema, _ in labeling.iter_probable_labeling_schemas(
+                    enrichment=enrichment, min_probability=options.min_probability,
+                    cumulative_probability=options.cumulative_probability, top=options.top, **labeling_options))
+
+            schema_count, sample = _count_labeling_schemas(labeling_schemas, sample_size)
+            yield record_number, molfile, schema_count, sample
+        return
+
+    for record_number, molfile, labeling_options, start, stop in _iter_rank_windows(molfiles, options):
+        total = labeling.count_labeling_schema(**labeling_options)
+        stop = total if stop is None else min(stop, total)
+        if start >= stop:
+            yield record_number, molfile, 0, []
+            continue
+
+        if options.symmetry_opt:
+            labeling_schemas = (labeling_schema for labeling_schema, _ in labeling.iter_unique_labeling_schemas(
+                offset=start, limit=None if stop == total else stop - start, **labeling_options))
+            schema_count, sample = _count_labeling_schemas(labeling_schemas, sample_size)
+        else:
+            labeling_schema_blocks = labeling.iter_labeling_schema_blocks(
+                block_size=sample_size, engine=options.engine, offset=start, limit=min(sample_size, stop - start),
+                **labeling_options)
+            schema_count = stop - start
+            sample = [labeling_schema for labeling_schema_block in labeling_schema_blocks
+                      for labeling_schema in labeling_schema_block]
+        yield record_number, molfile, schema_count, sample
+
+
+def _count_labeling_schemas(labeling_schemas, sample_size):
+    """Count labeling schemas keeping the first of them as sample.
+
+    :param labeling_schemas: Iterable of labeling schemas.
+    :param int sample_size: Maximum number of labeling schemas kept as sample.
+    :return: Tuple of number of labeling schemas and list of sampled labeling schemas.
+    :rtype: :py:class:`tuple`
+    """
+    schema_count = 0
+    sample = []
+    for labeling_schema in labeling_schemas:
+        if schema_count < sample_size:
+            sample.append(labeling_schema)
+        schema_count += 1
+    return schema_count, sample
+
+
+def mid(path_or_id, specific_opt=None, all_opt=None, ignore_iso_opt=False, enrichment_opt=None, positions=None,
+        max_shift=None, backend=None, records=None, ids=None, id_field='ID'):
+    """Compute mass isotopomer distribution of every ``Molfile`` from element counts and isotope
+    abundances without enumerating labeling schemas, see :func:`~isoenum.mid.mass_isotopomer_distribution`.
+
+    :param str path_or_id: Path to ``CTfile`` or file identifier.
+    :param list specific_opt: List of isotopes per specific element type and position.
+    :param list all_opt: List of isotopes for specific element type.
+    :param ignore_iso_opt: Ignore existing isotope information or not.
+    :type ignore_iso_opt: py:obj:`True` or py:obj:`False`
+    :param list enrichment_opt: List of isotope abundances that override natural abundances.
+    :param list positions: Atom numbers included in distribution, all atoms if not provided.
+    :param int max_shift: Highest mass shift kept in distribution, all mass shifts if not provided.
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
+    :param list records: List of 1-based record numbers to process, all records if not provided.
+    :param list ids: List of record identifiers to process, all records if not provided.
+    :param str id_field: Name of ``SDfile`` data item used as record identifier.
+    :return: List of dictionaries with "Record" and "MID" per ``Molfile``.
+    :rtype: :py:class:`list`
+    """
+    if backend is not None:
+        openbabel.set_backend(name=backend)
 
     if specific_opt is None:
         specific_opt = []
@@ -46,67 +641,135 @@ def iso(path_or_id, specific_opt=None, all_opt=None, enumerate_opt=None, complet
     if all_opt is None:
         all_opt = []
 
-    if enumerate_opt is None:
-        enumerate_opt = []
+    if enrichment_opt is None:
+        enrichment_opt = []
 
-    for molfile in ctfile.molfiles:
-        existing_opt = ['{}:{}:{}'.format(atom.isotope, atom.atom_symbol, atom.atom_number)
-                        for atom in molfile.atoms if atom.isotope]
+    if max_shift is not None and max_shift < 0:
+        raise ValueError('Incorrect maximum mass shift "{}" provided.'.format(max_shift))
 
-        specific_iso = _check_specific_opt(isotopes=specific_opt, isotopes_conf=isotopes_conf, ctfile=molfile)
-        existing_iso = _check_specific_opt(isotopes=existing_opt, isotopes_conf=isotopes_conf, ctfile=molfile)
-        all_iso = _check_all_opt(isotopes=all_opt, isotopes_conf=isotopes_conf, ctfile=molfile)
-        enumerate_iso = _check_enumerate_opt(enumerate_opt=enumerate_opt, all_iso=all_iso,
-                                             isotopes_conf=isotopes_conf, ctfile=molfile)
+    enrichment = _check_enrichment_opt(enrichment_opt=enrichment_opt, isotopes_conf=isotopes_conf)
 
-        labeling_schemas = labeling.create_labeling_schema(complete_labeling_schema=complete_opt,
-                                                           ignore_existing_isotopes=ignore_iso_opt,
-                                                           all_iso=all_iso, specific_iso=specific_iso,
-                                                           existing_iso=existing_iso, enumerate_iso=enumerate_iso,
-                                                           isotopes_conf=isotopes_conf, ctfile=molfile)
+    distributions = []
+    molfiles = fileio.iter_molfiles(path_or_id=path_or_id, records=records, ids=ids, id_field=id_field)
+    for record_number, molfile in enumerate(molfiles, start=1):
+        labeling_options = _labeling_options(molfile=molfile, specific_opt=specific_opt, all_opt=all_opt,
+                                             enumerate_opt=[], complete_opt=False, ignore_iso_opt=ignore_iso_opt)
+        distribution = mass_isotopomer_distribution(enrichment=enrichment, positions=positions,
+                                                    max_shift=max_shift, **labeling_options)
+        distributions.append(OrderedDict([('Record', record_number), ('MID', distribution)]))
+    return distributions
 
-        for labeling_schema in labeling_schemas:
-            sdfile_data = OrderedDict()
-            new_molfile = fileio.create_ctfile_from_ctfile_str(ctfile_str=molfile.writestr(file_format='ctfile'))
 
-            for isotope_spec in labeling_schema:
-                new_molfile.atom_by_number(atom_number=isotope_spec['atom_number']).isotope = isotope_spec['isotope']
+def chg(path_or_id, atom_states, backend=None, records=None, ids=None, id_field='ID', executor=None, jobs=None):
+    """Create ``SDfile`` with charge information.
+
+    :param str path_or_id: Path to ``CTfile`` or file identifier. 
+    :param list atom_states: List of charges for specific elements. 
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
+    :param list records: List of 1-based record numbers to process, all records if not provided.
+    :param list ids: List of record identifiers to process, all records if not provided.
+    :param str id_field: Name of ``SDfile`` data item used as record identifier.
+    :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+    :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
+    :return: instance of ``SDfile``.
+    :rtype: :class:`ctfile.ctfile.SDfile`
+    """
+    if backend is not None:
+        openbabel.set_backend(name=backend)
+
+    molfiles = fileio.iter_molfiles(path_or_id=path_or_id, records=records, ids=ids, id_field=id_field)
+    return chg_molfiles(molfiles=molfiles, atom_states=atom_states, executor=executor, jobs=jobs)
+
 
-            sdfile_data.setdefault('InChI', []).append('{}'.format(fileio.create_inchi_from_ctfile_obj(new_molfile)))
-            sdfile.add_molfile(molfile=new_molfile, data=sdfile_data)
+def iter_chg(path_or_id, atom_states, backend=None, records=None, ids=None, id_field='ID', executor=None,
+             jobs=None):
+    """Generate ``Molfile`` objects with charge information and their data as they are created,
+    see :func:`~isoenum.api.chg`.
 
-    return sdfile
+    :param str path_or_id: Path to ``CTfile`` or file identifier.
+    :param list atom_states: List of charges for specific elements.
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
+    :param list records: List of 1-based record numbers to process, all records if not provided.
+    :param list ids: List of record identifiers to process, all records if not provided.
+    :param str id_field: Name of ``SDfile`` data item used as record identifier.
+    :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+    :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
+    :return: Generator of (``Molfile``, data) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if backend is not None:
+        openbabel.set_backend(name=backend)
 
+    molfiles = fileio.iter_molfiles(path_or_id=path_or_id, records=records, ids=ids, id_field=id_field)
+    return iter_chg_molfiles(molfiles=molfiles, atom_states=atom_states, executor=executor, jobs=jobs)
 
-def chg(path_or_id, atom_states):
-    """Create ``SDfile`` with charge information.
 
-    :param str path_or_id: Path to ``CTfile`` or file identifier. 
-    :param list atom_states: List of charges for specific elements. 
+def chg_molfiles(molfiles, atom_states, chunk_size=500, executor=None, jobs=None):
+    """Create ``SDfile`` with charge information from iterable of ``Molfile`` objects.
+
+    :param molfiles: Iterable of ``Molfile`` objects, e.g. :func:`~isoenum.fileio.iter_molfiles` generator.
+    :param list atom_states: List of charges for specific elements.
+    :param int chunk_size: Number of ``Molfile`` objects converted into ``InChI`` per Open Babel call.
+    :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+    :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
     :return: instance of ``SDfile``.
     :rtype: :class:`ctfile.ctfile.SDfile`
     """
-    ctfile = fileio.create_ctfile(path_or_id=path_or_id)
-    sdfile = fileio.create_empty_sdfile_obj()
+    records = iter_chg_molfiles(molfiles=molfiles, atom_states=atom_states, chunk_size=chunk_size,
+                                executor=executor, jobs=jobs)
+    return fileio.create_sdfile_obj(records)
+
+
+def iter_chg_molfiles(molfiles, atom_states, chunk_size=500, executor=None, jobs=None):
+    """Generate ``Molfile`` objects with charge information and their data from iterable
+    of ``Molfile`` objects as they are created, see :func:`~isoenum.api.chg_molfiles`.
+
+    :param molfiles: Iterable of ``Molfile`` objects, e.g. :func:`~isoenum.fileio.iter_molfiles` generator.
+    :param list atom_states: List of charges for specific elements.
+    :param int chunk_size: Number of ``Molfile`` objects converted into ``InChI`` per Open Babel call.
+    :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+    :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
+    :return: Generator of (``Molfile``, data) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    tasks = _iter_chg_tasks(molfiles=molfiles, atom_states=atom_states, chunk_size=chunk_size)
 
-    for molfile in ctfile.molfiles:
-        sdfile_data = OrderedDict()
-        for state in atom_states:
-            try:
-                atom_symbol, atom_number, charge = state.split(':')
-            except ValueError:
-                raise ValueError('Incorrect ionization specification, use "element:position:charge" format.')
+    with parallel.create_executor(name=executor, jobs=jobs) as conversion_executor:
+        results = conversion_executor.map_ordered(fileio.create_inchis_from_ctfile_strs, tasks)
+        for new_molfiles, inchis in results:
+            for new_molfile, inchi in zip(new_molfiles, inchis):
+                sdfile_data = OrderedDict()
+                sdfile_data.setdefault('InChI', []).append('{}'.format(inchi))
+                yield new_molfile, sdfile_data
 
-            molfile.add_charge(atom_symbol=atom_symbol, atom_number=atom_number, charge=charge)
 
-        new_molfile = fileio.create_ctfile_from_ctfile_str(ctfile_str=molfile.writestr(file_format='ctfile'))
-        sdfile_data.setdefault('InChI', []).append('{}'.format(fileio.create_inchi_from_ctfile_obj(ctf=molfile)))
-        sdfile.add_molfile(molfile=new_molfile, data=sdfile_data)
+def _iter_chg_tasks(molfiles, atom_states, chunk_size=500):
+    """Generate conversion tasks of charged ``Molfile`` objects, one per chunk of ``Molfile`` objects.
 
-    return sdfile
+    :param molfiles: Iterable of ``Molfile`` objects.
+    :param list atom_states: List of charges for specific elements.
+    :param int chunk_size: Number of ``Molfile`` objects converted into ``InChI`` per Open Babel call.
+    :return: Generator of (arguments, context) tuples, see :func:`~isoenum.api._ctfile_objs_task`.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    for molfiles_chunk in more_itertools.chunked(molfiles, chunk_size):
+        new_molfiles = []
+        for molfile in molfiles_chunk:
+            for state in atom_states:
+                try:
+                    atom_symbol, atom_number, charge = state.split(':')
+                except ValueError:
+                    raise ValueError('Incorrect ionization specification, use "element:position:charge" format.')
+
+                molfile.add_charge(atom_symbol=atom_symbol, atom_number=atom_number, charge=charge)
+
+            new_molfiles.append(fileio.create_ctfile_from_ctfile_str(ctfile_str=molfile.writestr(file_format='ctfile')))
 
+        yield _ctfile_objs_task(ctfs=new_molfiles, chunk_size=chunk_size, context=new_molfiles)
 
-def iso_nmr(path_or_id, experiment_type, couplings, decoupled, subset):
+
+def iso_nmr(path_or_id, experiment_type, couplings, decoupled, subset, backend=None, records=None, ids=None,
+            id_field='ID', executor=None, jobs=None):
     """Create isotopically-resolved ``SDfile`` assuming specific NMR experiment type.
 
     :param str path_or_id: Path to ``CTfile`` or file identifier.
@@ -115,17 +778,122 @@ def iso_nmr(path_or_id, experiment_type, couplings, decoupled, subset):
     :param list decoupled: What elements are decoupled?
     :param subset: Create subsets?
     :type subset: py:obj:`True` or py:obj:`False`
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
+    :param list records: List of 1-based record numbers to process, all records if not provided.
+    :param list ids: List of record identifiers to process, all records if not provided.
+    :param str id_field: Name of ``SDfile`` data item used as record identifier.
+    :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+    :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
     :return: instance of ``SDfile``.
     :rtype: :class:`ctfile.ctfile.SDfile`
     """
-    ctfile = fileio.create_ctfile(path_or_id=path_or_id)
-    sdfile = fileio.create_empty_sdfile_obj()
+    if backend is not None:
+        openbabel.set_backend(name=backend)
+
+    molfiles = fileio.iter_molfiles(path_or_id=path_or_id, records=records, ids=ids, id_field=id_field)
+    return iso_nmr_molfiles(molfiles=molfiles, experiment_type=experiment_type,
+                            couplings=couplings, decoupled=decoupled, subset=subset, executor=executor, jobs=jobs)
+
+
+def iter_iso_nmr(path_or_id, experiment_type, couplings, decoupled, subset, backend=None, records=None, ids=None,
+                 id_field='ID', executor=None, jobs=None):
+    """Generate isotopically-resolved ``Molfile`` objects and their data assuming specific NMR experiment type
+    as they are created, see :func:`~isoenum.api.iso_nmr`.
+
+    :param str path_or_id: Path to ``CTfile`` or file identifier.
+    :param str experiment_type: NMR experiment type (1D1H of 1DCHSQC).
+    :param list couplings: What couplings to include?
+    :param list decoupled: What elements are decoupled?
+    :param subset: Create subsets?
+    :type subset: py:obj:`True` or py:obj:`False`
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
+    :param list records: List of 1-based record numbers to process, all records if not provided.
+    :param list ids: List of record identifiers to process, all records if not provided.
+    :param str id_field: Name of ``SDfile`` data item used as record identifier.
+    :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+    :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
+    :return: Generator of (``Molfile``, data) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if backend is not None:
+        openbabel.set_backend(name=backend)
+
+    molfiles = fileio.iter_molfiles(path_or_id=path_or_id, records=records, ids=ids, id_field=id_field)
+    return iter_iso_nmr_molfiles(molfiles=molfiles, experiment_type=experiment_type, couplings=couplings,
+                                 decoupled=decoupled, subset=subset, executor=executor, jobs=jobs)
+
+
+def iso_nmr_molfiles(molfiles, experiment_type, couplings, decoupled, subset, executor=None, jobs=None):
+    """Create isotopically-resolved ``SDfile`` assuming specific NMR experiment type
+    from iterable of ``Molfile`` objects.
+
+    :param molfiles: Iterable of ``Molfile`` objects, e.g. :func:`~isoenum.fileio.iter_molfiles` generator.
+    :param str experiment_type: NMR experiment type (1D1H of 1DCHSQC).
+    :param list couplings: What couplings to include?
+    :param list decoupled: What elements are decoupled?
+    :param subset: Create subsets?
+    :type subset: py:obj:`True` or py:obj:`False`
+    :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+    :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
+    :return: instance of ``SDfile``.
+    :rtype: :class:`ctfile.ctfile.SDfile`
+    """
+    records = iter_iso_nmr_molfiles(molfiles=molfiles, experiment_type=experiment_type, couplings=couplings,
+                                    decoupled=decoupled, subset=subset, executor=executor, jobs=jobs)
+    return fileio.create_sdfile_obj(records)
+
+
+def iter_iso_nmr_molfiles(molfiles, experiment_type, couplings, decoupled, subset, executor=None, jobs=None):
+    """Generate isotopically-resolved ``Molfile`` objects and their data assuming specific NMR experiment type
+    from iterable of ``Molfile`` objects as they are created, see :func:`~isoenum.api.iso_nmr_molfiles`.
+
+    Magnetically equivalent groups are annotated per ``Molfile``, their numbers continue from
+    the previous ``Molfile`` and aggregate ``Molfile`` objects follow entries of their ``Molfile``.
+
+    :param molfiles: Iterable of ``Molfile`` objects, e.g. :func:`~isoenum.fileio.iter_molfiles` generator.
+    :param str experiment_type: NMR experiment type (1D1H of 1DCHSQC).
+    :param list couplings: What couplings to include?
+    :param list decoupled: What elements are decoupled?
+    :param subset: Create subsets?
+    :type subset: py:obj:`True` or py:obj:`False`
+    :param str executor: Executor of Open Babel conversions: "auto", "serial", "thread" or "process".
+    :param int jobs: Number of conversions run concurrently, number of CPUs if 0.
+    :return: Generator of (``Molfile``, data) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
     nmr_experiment = nmr.create_nmr_experiment(name=experiment_type, couplings=couplings, decoupled=decoupled)
+    tasks = _iter_iso_nmr_tasks(molfiles=molfiles, nmr_experiment=nmr_experiment, subset=subset)
+
+    me_group_count = 0
+    with parallel.create_executor(name=executor, jobs=jobs) as conversion_executor:
+        results = conversion_executor.map_ordered(fileio.create_inchis_from_ctfile_strs, tasks)
+        for (new_molfiles, sdfile_datas), inchis in results:
+            sdfile = fileio.create_empty_sdfile_obj()
+            for new_molfile, sdfile_data, inchi in zip(new_molfiles, sdfile_datas, inchis):
+                sdfile_data.setdefault('InChI', []).append('{}'.format(inchi))
+                sdfile.add_molfile(molfile=new_molfile, data=sdfile_data)
 
-    for molfile in ctfile.molfiles:
+            me_group_count += annotate_me_groups(ctfile=sdfile, first_group_id=me_group_count + 1)
+            for entry in sdfile.values():
+                yield entry['molfile'], entry['data']
+
+
+def _iter_iso_nmr_tasks(molfiles, nmr_experiment, subset):
+    """Generate conversion tasks of coupling combinations, one per ``Molfile``.
+
+    :param molfiles: Iterable of ``Molfile`` objects.
+    :param nmr_experiment: NMR experiment.
+    :param subset: Create subsets?
+    :type subset: py:obj:`True` or py:obj:`False`
+    :return: Generator of (arguments, context) tuples, see :func:`~isoenum.api._ctfile_objs_task`.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    for molfile in molfiles:
         molfile = fileio.normalize_ctfile_obj(molfile)
         coupling_combinations = nmr_experiment.generate_coupling_combinations(molfile=molfile, subset=subset)
 
+        new_molfiles = []
+        sdfile_datas = []
         for coupling_combination in coupling_combinations:
             sdfile_data = OrderedDict()
 
@@ -138,14 +906,26 @@ def iso_nmr(path_or_id, experiment_type, couplings, decoupled, subset):
 
                 sdfile_data.setdefault('CouplingType', []).append(coupling.name)
 
-            new_molfile = create_new_molfile(molfile=molfile, ctab_iso_layer=ctab_iso_layer)
+            new_molfiles.append(create_new_molfile(molfile=molfile, ctab_iso_layer=ctab_iso_layer))
+            sdfile_datas.append(sdfile_data)
 
-            sdfile_data.setdefault('InChI', []).append(
-                '{}'.format(fileio.create_inchi_from_ctfile_obj(ctf=new_molfile)))
-            sdfile.add_molfile(molfile=new_molfile, data=sdfile_data)
+        yield _ctfile_objs_task(ctfs=new_molfiles, context=(new_molfiles, sdfile_datas))
 
-    annotate_me_groups(ctfile=sdfile)
-    return sdfile
+
+def _ctfile_objs_task(ctfs, chunk_size=500, context=None):
+    """Create conversion task of ``CTfile`` objects with compact arguments of
+    :func:`~isoenum.fileio.create_inchis_from_ctfile_strs`, i.e. ``CTfile`` strings.
+
+    :param list ctfs: List of :class:`~ctfile.ctfile.CTfile` instances.
+    :param int chunk_size: Number of ``CTfile`` instances converted per Open Babel call.
+    :param context: Task context kept by the parent process.
+    :return: (arguments, context) tuple.
+    :rtype: :py:class:`tuple`
+    """
+    ctfile_strs = [ctf.writestr(file_format='ctfile') for ctf in ctfs]
+    # apply fixed hydrogen layer when atom charges are present
+    charged = [any(atom.charge != '0' for atom in ctf.atoms) for ctf in ctfs]
+    return (ctfile_strs, charged, chunk_size), context
 
 
 def coupling_descr(coupling_types):
@@ -223,16 +1003,17 @@ def create_inchi_groups(ctfile):
     return inchi_groups
 
 
-def annotate_me_groups(ctfile):
+def annotate_me_groups(ctfile, first_group_id=1):
     """Annotate magnetically equivalent (have the same `InChI`) coupling type groups.
 
     :param ctfile: `SDfile` instance.
     :type ctfile: :class:`~ctfile.ctfile.SDfile`
-    :return: None.
-    :rtype: :py:obj:`None`
+    :param int first_group_id: Number of the first group.
+    :return: Number of groups.
+    :rtype: :py:class:`int`
     """
     inchi_groups = create_inchi_groups(ctfile)
-    me_ids = {inchi_str: group_id for inchi_str, group_id in zip(inchi_groups.keys(), list(range(1, len(inchi_groups) + 1)))}
+    me_ids = {inchi_str: group_id for group_id, inchi_str in enumerate(inchi_groups.keys(), start=first_group_id)}
 
     for data in ctfile.sdfdata:
         inchi_str = data["InChI"][0]
@@ -248,6 +1029,36 @@ def annotate_me_groups(ctfile):
             ctfile.add_molfile(molfile=new_molfile, data=sdfile_data)
         else:
             continue
+    return len(inchi_groups)
+
+
+def _labeling_options(molfile, specific_opt, all_opt, enumerate_opt, complete_opt, ignore_iso_opt):
+    """Check labeling options against ``Molfile`` and collect arguments of labeling schema functions.
+
+    :param molfile: Instance of ``Molfile``.
+    :type molfile: :class:`~ctfile.ctfile.Molfile`
+    :param list specific_opt: List of isotopes per specific element type and position.
+    :param list all_opt: List of isotopes for specific element type.
+    :param list enumerate_opt: List of isotopes to perform enumeration.
+    :param complete_opt: Identify if every element need to have isotope information.
+    :type complete_opt: py:obj:`True` or py:obj:`False`
+    :param ignore_iso_opt: Ignore existing isotope information or not.
+    :type ignore_iso_opt: py:obj:`True` or py:obj:`False`
+    :return: Keyword arguments of :func:`~isoenum.labeling.create_labeling_schema`.
+    :rtype: :py:class:`dict`
+    """
+    existing_opt = ['{}:{}:{}'.format(atom.isotope, atom.atom_symbol, atom.atom_number)
+                    for atom in molfile.atoms if atom.isotope]
+
+    specific_iso = _check_specific_opt(isotopes=specific_opt, isotopes_conf=isotopes_conf, ctfile=molfile)
+    existing_iso = _check_specific_opt(isotopes=existing_opt, isotopes_conf=isotopes_conf, ctfile=molfile)
+    all_iso = _check_all_opt(isotopes=all_opt, isotopes_conf=isotopes_conf, ctfile=molfile)
+    enumerate_iso = _check_enumerate_opt(enumerate_opt=enumerate_opt, all_iso=all_iso,
+                                         isotopes_conf=isotopes_conf, ctfile=molfile)
+
+    return dict(complete_labeling_schema=complete_opt, ignore_existing_isotopes=ignore_iso_opt,
+                all_iso=all_iso, specific_iso=specific_iso, existing_iso=existing_iso,
+                enumerate_iso=enumerate_iso, isotopes_conf=isotopes_conf, ctfile=molfile)
 
 
 def _check_specific_opt(isotopes, isotopes_conf, ctfile):
@@ -383,20 +1194,97 @@ def _check_enumerate_opt(enumerate_opt, all_iso, isotopes_conf, ctfile):
     return enumerate_iso
 
 
-def visualize(path_or_id, output_path, output_format='svg', **options):
+def _check_enrichment_opt(enrichment_opt, isotopes_conf):
+    """Check if `enrichment` option is consistent.
+
+    :param list enrichment_opt: Option that specifies isotope abundances.
+    :param dict isotopes_conf: Default isotopes configuration.
+    :return: :py:class:`dict` with element to isotope to abundance mapping if consistent, raises error otherwise.
+    :rtype: :py:class:`dict` or :py:class:`ValueError`
+    """
+    enrichment = defaultdict(dict)
+
+    for enrichment_str in enrichment_opt:
+        try:
+            isotope, atom, abundance = enrichment_str.split(':')
+            abundance = float(abundance)
+        except ValueError:
+            raise ValueError('Incorrect enrichment specification, use "isotope:element:abundance" format.')
+
+        if atom not in isotopes_conf:
+            raise ValueError('Incorrect atom "{}" provided.'.format(atom))
+
+        if isotope not in isotopes_conf[atom]['isotopes']:
+            raise ValueError('Incorrect isotope "{}" provided for atom "{}".'.format(isotope, atom))
+
+        if not 0.0 <= abundance <= 1.0:
+            raise ValueError('Incorrect abundance "{}" provided for isotope "{}".'.format(abundance, isotope))
+
+        enrichment[atom][isotope] = abundance
+
+    for atom, abundances in enrichment.items():
+        if sum(abundances.values()) > 1.0 + 1e-9:
+            raise ValueError('Abundances of "{}" isotopes exceed 1.'.format(atom))
+
+    return dict(enrichment)
+
+
+def _check_mass_window_opt(mass_window_opt, target_mass_opt, ppm):
+    """Check if `mass-window` and `target-mass` options are consistent.
+
+    :param list mass_window_opt: Option that specifies "lowest:highest" mass windows.
+    :param list target_mass_opt: Option that specifies target masses.
+    :param float ppm: Tolerance of target masses in parts per million.
+    :return: :py:class:`list` of (lowest mass, highest mass) tuples if consistent, raises error otherwise.
+    :rtype: :py:class:`list` or :py:class:`ValueError`
+    """
+    mass_windows = []
+
+    for mass_window_str in mass_window_opt:
+        try:
+            lowest_mass, highest_mass = (float(mass) for mass in mass_window_str.split(':'))
+        except ValueError:
+            raise ValueError('Incorrect mass window specification, use "lowest:highest" format.')
+
+        if lowest_mass > highest_mass:
+            raise ValueError('Incorrect mass window "{}" provided.'.format(mass_window_str))
+
+        mass_windows.append((lowest_mass, highest_mass))
+
+    if ppm < 0:
+        raise ValueError('Incorrect tolerance "{}" provided.'.format(ppm))
+
+    for target_mass_str in target_mass_opt:
+        try:
+            target_mass = float(target_mass_str)
+        except ValueError:
+            raise ValueError('Incorrect target mass "{}" provided.'.format(target_mass_str))
+
+        tolerance = target_mass * ppm / 1e6
+        mass_windows.append((target_mass - tolerance, target_mass + tolerance))
+
+    return mass_windows
+
+
+def visualize(path_or_id, output_path, output_format='svg', backend=None, **options):
     """Visualize ``CTfile`` object.
 
     :param str path_or_id: Path to ``CTfile`` or file identifier.
     :type ctfile: :class:`~ctfile.ctfile.Molfile` or :class:`~ctfile.ctfile.SDfile`
     :param str output_format: Image output format. 
     :param str output_path: Image output path.
+    :param str backend: Open Babel backend name: "auto", "subprocess", "pybel" or "pool".
     """
+    if backend is not None:
+        openbabel.set_backend(name=backend)
+
     ctfile = fileio.create_ctfile(path_or_id=path_or_id)
 
     if output_format not in {'svg', 'png'}:
         output_format = 'svg'
 
-    with tempfile.NamedTemporaryFile(mode='w') as tempfh:
+    # image output is written by Open Babel directly, so input goes through scratch file
+    with utils.scratch_file(mode='w') as tempfh:
         tempfh.write(ctfile.writestr(file_format='ctfile'))
         tempfh.flush()
 
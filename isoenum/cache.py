@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+isoenum.cache
+~~~~~~~~~~~~~
+
+This module provides content-addressed caches of Open Babel conversion results.
+Every cache has a bounded in-memory LRU tier and an optional SQLite on-disk tier
+that is shared between runs and worker processes when cache directory is configured.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from collections import OrderedDict
+
+from . import conf
+
+
+class Cache(object):
+    """Two-tier key-value cache: in-memory LRU tier and optional SQLite on-disk tier."""
+
+    def __init__(self, name, maxsize=10000, path=None, max_disk_size=512 * 1024 * 1024, timeout=30.0):
+        """Cache initializer.
+
+        On-disk tier can be shared by several processes, e.g. process pool workers, so database
+        uses write-ahead log, waits for locks of other processes and total size of on-disk entries
+        is read from database within every write transaction.
+
+        :param str name: Cache name, used as on-disk table name.
+        :param int maxsize: Maximum number of entries kept in memory.
+        :param str path: Path to SQLite database file, on-disk tier is not used if not provided.
+        :param int max_disk_size: Maximum total size of on-disk entries in bytes.
+        :param float timeout: Seconds to wait for database lock held by another process.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.path = path
+        self.max_disk_size = max_disk_size
+        self.stats = Counter(hits=0, misses=0, disk_hits=0, evictions=0)
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self._connection = None
+
+        if path is not None:
+            self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS {} '
+                                     '(key TEXT PRIMARY KEY, value TEXT, size INTEGER, accessed REAL)'.format(name))
+            self._connection.commit()
+
+    def get(self, key):
+        """Get cached value.
+
+        :param str key: Cache key.
+        :return: Cached value or None if key is not cached.
+        :rtype: :py:class:`str` or :py:obj:`None`
+        """
+        with self._lock:
+            if key in self._memory:
+                value = self._memory.pop(key)
+                self._memory[key] = value
+                self.stats['hits'] += 1
+                return value
+
+            if self._connection is not None:
+                row = self._connection.execute('SELECT value FROM {} WHERE key = ?'.format(self.name),
+                                               (key,)).fetchone()
+                if row is not None:
+                    self._connection.execute('UPDATE {} SET accessed = ? WHERE key = ?'.format(self.name),
+                                             (time.time(), key))
+                    self._connection.commit()
+                    self._remember(key, row[0])
+                    self.stats['hits'] += 1
+                    self.stats['disk_hits'] += 1
+                    return row[0]
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        """Cache value.
+
+        :param str key: Cache key.
+        :param str value: Value.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        with self._lock:
+            self._remember(key, value)
+
+            if self._connection is not None:
+                # other processes write to the same database, so its size is read after the write lock is taken
+                with self._connection:
+                    self._connection.execute('BEGIN IMMEDIATE')
+                    self._connection.execute('INSERT OR REPLACE INTO {} (key, value, size, accessed) '
+                                             'VALUES (?, ?, ?, ?)'.format(self.name),
+                                             (key, value, len(key) + len(value), time.time()))
+                    self._evict_disk()
+
+    def clear(self):
+        """Remove all cached values from both tiers.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        with self._lock:
+            self._memory.clear()
+            if self._connection is not None:
+                self._connection.execute('DELETE FROM {}'.format(self.name))
+                self._connection.commit()
+
+    def _remember(self, key, value):
+        """Put value into in-memory tier evicting least recently used entries.
+
+        :param str key: Cache key.
+        :param str value: Value.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self._memory.pop(key, None)
+        self._memory[key] = value
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _evict_disk(self):
+        """Evict least recently accessed on-disk entries until total size fits the limit,
+        called within write transaction.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        disk_size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM {}'.format(self.name)).fetchone()[0]
+        while disk_size > self.max_disk_size:
+            rows = self._connection.execute('SELECT key, size FROM {} ORDER BY accessed LIMIT 100'.format(
+                self.name)).fetchall()
+            if not rows:
+                break
+
+            for key, size in rows:
+                self._connection.execute('DELETE FROM {} WHERE key = ?'.format(self.name), (key,))
+                disk_size -= size
+                self.stats['evictions'] += 1
+                if disk_size <= self.max_disk_size:
+                    break
+
+
+def normalize_ctfile_str(ctfile_str):
+    """Normalize ``Molfile`` string for content addressing: molecule name, program
+    and timestamp do not change conversion results and are removed, dimension code
+    is kept because it changes stereo perception.
+
+    :param str ctfile_str: ``Molfile`` string.
+    :return: Normalized ``Molfile`` string.
+    :rtype: :py:class:`str`
+    """
+    lines = ctfile_str.split('\n')
+    if len(lines) < 4:
+        return ctfile_str
+
+    normalized_lines = [lines[1][20:22]]
+    for line in lines[3:]:
+        normalized_lines.append(line.rstrip())
+        if line.startswith('M  END'):
+            break
+    return '\n'.join(normalized_lines)
+
+
+def create_key(text, **options):
+    """Create content-addressed cache key from text and conversion options.
+
+    :param str text: Text to be converted.
+    :param options: Conversion options.
+    :return: Cache key.
+    :rtype: :py:class:`str`
+    """
+    digest = hashlib.sha1(text.encode('utf-8'))
+    for option_name, option_value in sorted(options.items()):
+        digest.update('\0{}={}'.format(option_name, option_value).encode('utf-8'))
+    return digest.hexdigest()
+
+
+_caches = {}
+_settings = {'enabled': conf.cache_enabled, 'cache_dir': conf.cache_dir}
+
+
+def configure(enabled=True, cache_dir=None):
+    """Configure caches shared within the current process.
+
+    :param enabled: Use caches or not.
+    :type enabled: :py:obj:`True` or :py:obj:`False`
+    :param str cache_dir: Directory for on-disk cache tier, on-disk tier is not used if not provided.
+    :return: None.
+    :rtype: :py:obj:`None`
+    """
+    _settings['enabled'] = enabled
+    _settings['cache_dir'] = cache_dir
+    _caches.clear()
+
+
+def get_settings():
+    """Get cache settings of the current process, e.g. to configure caches of worker processes.
+
+    :return: Keyword arguments of :func:`~isoenum.cache.configure`.
+    :rtype: :py:class:`dict`
+    """
+    return dict(_settings)
+
+
+def get_cache(name):
+    """Get cache shared within the current process.
+
+    :param str name: Cache name.
+    :return: Cache or None if caching is turned off.
+    :rtype: :class:`~isoenum.cache.Cache` or :py:obj:`None`
+    """
+    if not _settings['enabled']:
+        return None
+
+    if name not in _caches:
+        path = None
+        if _settings['cache_dir']:
+            if not os.path.isdir(_settings['cache_dir']):
+                os.makedirs(_settings['cache_dir'])
+            path = os.path.join(_settings['cache_dir'], 'isoenum_cache.sqlite')
+        _caches[name] = Cache(name=name, maxsize=conf.cache_maxsize, path=path)
+    return _caches[name]
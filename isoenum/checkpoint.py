@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+isoenum.checkpoint
+~~~~~~~~~~~~~~~~~~
+
+This module provides checkpoint files that record the last completed labeling
+schema rank per ``Molfile``, so that interrupted enumeration can be resumed
+without creating and converting already completed labeling schemas.
+"""
+
+import json
+import os
+import time
+
+
+CHECKPOINT_VERSION = 1
+
+
+class Checkpoint(object):
+    """Number of completed labeling schemas per ``Molfile`` saved into JSON file."""
+
+    def __init__(self, path, signature=None, interval=0, output=None):
+        """Checkpoint initializer.
+
+        :param str path: Path to checkpoint file.
+        :param dict signature: Options of enumeration, checkpoint cannot be resumed with different options.
+        :param float interval: Minimum number of seconds between checkpoint file updates.
+        :param output: Output file, its size is saved together with completed ranks.
+        :type output: :py:class:`io.IOBase`
+        """
+        self.path = path
+        self.signature = signature or {}
+        self.interval = interval
+        self.output = output
+        self.completed = {}
+        self.output_size = None
+        self.last_saved = None
+
+    @classmethod
+    def load(cls, path, signature=None, interval=0, output=None):
+        """Load checkpoint from checkpoint file, create empty checkpoint if file does not exist.
+
+        :param str path: Path to checkpoint file.
+        :param dict signature: Options of enumeration.
+        :param float interval: Minimum number of seconds between checkpoint file updates.
+        :param output: Output file, its size is saved together with completed ranks.
+        :type output: :py:class:`io.IOBase`
+        :return: Checkpoint.
+        :rtype: :class:`~isoenum.checkpoint.Checkpoint`
+        """
+        checkpoint = cls(path=path, signature=signature, interval=interval, output=output)
+        if not os.path.exists(path):
+            return checkpoint
+
+        with open(path, 'r') as infile:
+            data = json.load(infile)
+
+        if data.get('version') != CHECKPOINT_VERSION or data.get('signature') != checkpoint.signature:
+            raise ValueError('Checkpoint "{}" was created with different options, '
+                             'remove it to start enumeration over.'.format(path))
+
+        checkpoint.completed = data['completed']
+        checkpoint.output_size = data.get('output_size')
+        return checkpoint
+
+    def completed_rank(self, record):
+        """Rank following the last completed labeling schema of ``Molfile``.
+
+        :param int record: 1-based ``Molfile`` number.
+        :return: Number of completed labeling schemas.
+        :rtype: :py:class:`int`
+        """
+        return self.completed.get(str(record), 0)
+
+    def update(self, record, rank):
+        """Record completed labeling schemas of ``Molfile`` and save checkpoint file
+        if interval has passed since the last update.
+
+        :param int record: 1-based ``Molfile`` number.
+        :param int rank: Rank following the last completed labeling schema.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self.completed[str(record)] = rank
+        if self.last_saved is None or time.time() - self.last_saved >= self.interval:
+            self.save()
+
+    def save(self):
+        """Save checkpoint file, the file is replaced atomically.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        if self.output is not None:
+            self.output.flush()
+            self.output_size = self.output.tell()
+
+        data = {'version': CHECKPOINT_VERSION, 'signature': self.signature,
+                'completed': self.completed, 'output_size': self.output_size}
+
+        temporary_path = '{}.tmp'.format(self.path)
+        with open(temporary_path, 'w') as outfile:
+            json.dump(data, outfile)
+        _replace(temporary_path, self.path)
+        self.last_saved = time.time()
+
+
+def _replace(source_path, destination_path):
+    """Rename file replacing existing destination file.
+
+    :param str source_path: Path to file.
+    :param str destination_path: New path to file.
+    :return: None.
+    :rtype: :py:obj:`None`
+    """
+    if hasattr(os, 'replace'):
+        os.replace(source_path, destination_path)
+    else:
+        # Python 2.7: rename replaces existing file atomically on POSIX, but fails on Windows
+        if os.name == 'nt' and os.path.exists(destination_path):
+            os.remove(destination_path)
+        os.rename(source_path, destination_path)
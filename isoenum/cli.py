@@ -18,14 +18,31 @@ Usage:
                  [--enumerate=<isotope:element:min:max>...] 
                  [--complete | --partial] 
                  [--ignore-iso]
+                 [--symmetry]
+                 [--engine=<name>] [--inchi-engine=<name>]
+                 [--count]
                  [--format=<format>]
                  [--output=<path>]
+                 [--backend=<name>]
+                 [--executor=<name>] [--jobs=<n>]
+                 [--cache-dir=<path> | --no-cache]
+                 [--records=<ranges> | --ids=<ids>] [--id-field=<name>]
+                 [--offset=<rank>] [--limit=<number>] [--checkpoint=<path>]
+                 [--shard=<i/N>]
+                 [--enrichment=<isotope:element:abundance>...]
+                 [--min-probability=<p> | --cumulative-probability=<p> | --top=<k>]
+                 [--mass-window=<lowest:highest>...]
+                 [--target-mass=<mass>...] [--ppm=<tolerance>]
                  [--verbose]
 
     isoenum ionize (<path-to-ctfile-file-or-inchi-file-or-inchi-string>)
                    (--state=<element:position:charge>...)
                    [--format=<format>]
                    [--output=<path>]
+                   [--backend=<name>]
+                   [--executor=<name>] [--jobs=<n>]
+                   [--cache-dir=<path> | --no-cache]
+                   [--records=<ranges> | --ids=<ids>] [--id-field=<name>]
 
     isoenum nmr (<path-to-ctfile-file-or-inchi-file-or-inchi-string>)
                 [--type=<experiment-type>]
@@ -34,11 +51,32 @@ Usage:
                 [--format=<format>]
                 [--output=<path>]
                 [--subset]
+                [--backend=<name>]
+                [--executor=<name>] [--jobs=<n>]
+                [--cache-dir=<path> | --no-cache]
+                [--records=<ranges> | --ids=<ids>] [--id-field=<name>]
                 [--verbose]
 
+    isoenum mid (<path-to-ctfile-file-or-inchi-file-or-inchi-string>)
+                [--specific=<isotope:element:position>...]
+                [--all=<isotope:element>...]
+                [--ignore-iso]
+                [--enrichment=<isotope:element:abundance>...]
+                [--atoms=<positions>]
+                [--max-shift=<n>]
+                [--output=<path>]
+                [--backend=<name>]
+                [--cache-dir=<path> | --no-cache]
+                [--records=<ranges> | --ids=<ids>] [--id-field=<name>]
+
+    isoenum merge (<shard-output-path>...)
+                  [--format=<format>]
+                  [--output=<path>]
+
     isoenum vis (<path-to-ctfile-file-or-inchi-file-or-inchi-string>) 
                 (--format=<format>)
                 (--output=<path>)
+                [--backend=<name>]
 
 Options:
     -h, --help                                 Show this screen.
@@ -55,27 +93,93 @@ Options:
     -p, --partial                              Use partial labeling schema, i.e. generate labeling schema
                                                from the provided labeling information.
     -i, --ignore-iso                           Ignore existing "ISO" specification in the CTfile or InChI.
-    -f, --format=<format>                      Format of output: inchi, mol, sdf, csv, json [default: inchi].
-    -o, --output=<path>                        Path to output file.
+    --engine=<name>                            Labeling engine: auto, python, numpy [default: auto].
+    --inchi-engine=<name>                      InChI engine: obabel, synthesize, verify, synthesize writes isotopic
+                                               layer from a single conversion of unlabeled molecule and verify also
+                                               compares a sample with Open Babel [default: obabel].
+    --count                                    Count labeling schemas and Open Babel calls without
+                                               converting and estimate wall time, symmetry, mass window
+                                               and probability options are taken into account.
+    --symmetry                                 Keep one labeling per group of labelings equivalent under
+                                               molecular symmetry and report group size as "Multiplicity".
+    -f, --format=<format>                      Format of output: inchi, mol, sdf, csv, json, jsonl [default: inchi].
+    -o, --output=<path>                        Path to output file, compressed if it ends with .gz or .zst.
     -t, --type=<experiment-type>               Type of NMR experiment [default: 1D1H].
     -j, --jcoupling=<type>                     Allowed J couplings.
     -d, --decoupled=<element>                  Turn off J coupling for a given element.
     -z, --state=<element:position:charge>      Create ionized form of InChI from neutral molecule, 
                                                e.g. N:6:+1, O:8:-1.
     --subset                                   Create atom subsets for each resonance.
+    -b, --backend=<name>                       Open Babel backend: auto, subprocess, pybel, pool [default: auto].
+    --executor=<name>                          Executor of Open Babel conversions: auto, serial, thread, process,
+                                               auto uses process pool with more than one job [default: auto].
+    --jobs=<n>                                 Number of Open Babel conversions run concurrently,
+                                               number of CPUs if 0 [default: 1].
+    --cache-dir=<path>                         Directory for persistent cache of conversion results.
+    --no-cache                                 Do not cache conversion results.
+    --records=<ranges>                         Process only selected SDfile records, e.g. --records=1-10,15.
+    --ids=<ids>                                Process only SDfile records with given identifiers, e.g. --ids=HMDB01,HMDB02.
+    --id-field=<name>                          SDfile data item used as record identifier [default: ID].
+    --offset=<rank>                            Rank of the first labeling schema of every molecule [default: 0].
+    --limit=<number>                           Maximum number of labeling schemas of every molecule.
+    --checkpoint=<path>                        Write output as it is created and record progress in checkpoint
+                                               file, rerun the same command to resume interrupted enumeration.
+    --shard=<i/N>                              Create only i-th of N equal slices of labeling schemas, e.g. --shard=2/8,
+                                               use "isoenum merge" to combine shard outputs in shard order.
+    --enrichment=<isotope:element:abundance>   Override natural isotope abundance, e.g. --enrichment=13:C:0.99.
+    --min-probability=<p>                      Create only labeling schemas with at least given probability,
+                                               in descending order of probability reported as "Probability".
+    --cumulative-probability=<p>               Create the most probable labeling schemas that together account
+                                               for given fraction of total probability, e.g. 0.999.
+    --top=<k>                                  Create given number of the most probable labeling schemas.
+    --atoms=<positions>                        Compute mass isotopomer distribution of selected atoms only,
+                                               e.g. atoms of fragment --atoms=1-3,5.
+    --max-shift=<n>                            Highest mass shift of mass isotopomer distribution, e.g. 6 for M+0..M+6.
+    --mass-window=<lowest:highest>             Create only labeling schemas with monoisotopic mass inside window,
+                                               e.g. --mass-window=95.05:95.07, mass is reported as "Mass".
+    --target-mass=<mass>                       Create only labeling schemas with monoisotopic mass within
+                                               tolerance of target mass, e.g. --target-mass=95.0627.
+    --ppm=<tolerance>                          Tolerance of target masses in parts per million [default: 5].
 """
 
 from __future__ import print_function, division, unicode_literals
 
-import csv
+import functools
 import io
 import os
 import sys
 
 from . import api
+from . import cache
+from . import checkpoint
+from . import fileio
+from . import index
+from . import openbabel
+from . import writers
+from .conf import checkpoint_interval
 from .conf import output_formats_conf
 
 
+# command-line arguments that must be the same to resume enumeration from checkpoint
+CHECKPOINT_SIGNATURE_OPTIONS = (
+    "<path-to-ctfile-file-or-inchi-file-or-inchi-string>",
+    "--specific",
+    "--all",
+    "--enumerate",
+    "--complete",
+    "--ignore-iso",
+    "--symmetry",
+    "--format",
+    "--output",
+    "--records",
+    "--ids",
+    "--id-field",
+    "--offset",
+    "--limit",
+    "--shard",
+)
+
+
 def cli(cmdargs):
     """Process command-line arguments.
 
@@ -85,25 +189,145 @@ def cli(cmdargs):
     """
     path_or_id = cmdargs["<path-to-ctfile-file-or-inchi-file-or-inchi-string>"]
 
-    if cmdargs["name"]:
-        sdfile = api.iso(
+    records = index.parse_record_ranges(cmdargs["--records"]) if cmdargs.get("--records") else None
+    ids = cmdargs["--ids"].split(",") if cmdargs.get("--ids") else None
+    id_field = cmdargs.get("--id-field") or "ID"
+    offset = int(cmdargs.get("--offset") or 0)
+    limit = int(cmdargs["--limit"]) if cmdargs.get("--limit") else None
+    shard = _parse_shard(cmdargs["--shard"]) if cmdargs.get("--shard") else None
+    min_probability = float(cmdargs["--min-probability"]) if cmdargs.get("--min-probability") else None
+    cumulative_probability = (float(cmdargs["--cumulative-probability"])
+                              if cmdargs.get("--cumulative-probability") else None)
+    top = int(cmdargs["--top"]) if cmdargs.get("--top") else None
+    ppm = float(cmdargs.get("--ppm") or 5)
+    jobs = int(cmdargs["--jobs"]) if cmdargs.get("--jobs") else None
+
+    # enumeration options shared by isotopically-resolved output, see isoenum.api.IsoOptions
+    iso_options = dict(
+        specific_opt=cmdargs["--specific"],
+        all_opt=cmdargs["--all"],
+        enumerate_opt=cmdargs["--enumerate"],
+        complete_opt=cmdargs["--complete"],
+        ignore_iso_opt=cmdargs["--ignore-iso"],
+        symmetry_opt=cmdargs["--symmetry"],
+        engine=cmdargs["--engine"],
+        offset=offset,
+        limit=limit,
+        shard=shard,
+        enrichment_opt=cmdargs.get("--enrichment"),
+        min_probability=min_probability,
+        cumulative_probability=cumulative_probability,
+        top=top,
+        mass_window_opt=cmdargs.get("--mass-window"),
+        target_mass_opt=cmdargs.get("--target-mass"),
+        ppm=ppm,
+        executor=cmdargs["--executor"],
+        jobs=jobs,
+        inchi_engine=cmdargs["--inchi-engine"],
+    )
+
+    if cmdargs.get("--no-cache"):
+        cache.configure(enabled=False)
+    elif cmdargs.get("--cache-dir"):
+        cache.configure(cache_dir=cmdargs["--cache-dir"])
+
+    if cmdargs["name"] and cmdargs["--count"]:
+        counts = api.count(
+            path_or_id=path_or_id,
+            backend=cmdargs["--backend"],
+            records=records,
+            ids=ids,
+            id_field=id_field,
+            **iso_options
+        )
+
+        rows = [["Record", "Schemas", "Conversions", "Seconds"]]
+        for entry in counts:
+            rows.append([entry["Record"], entry["Schemas"], entry["Conversions"], "{:.2f}".format(entry["Seconds"])])
+        rows.append(["Total",
+                     sum(entry["Schemas"] for entry in counts),
+                     sum(entry["Conversions"] for entry in counts),
+                     "{:.2f}".format(sum(entry["Seconds"] for entry in counts))])
+
+        save_output(
+            outputstr="\n".join("\t".join(str(value) for value in row) for row in rows),
+            path=cmdargs["--output"],
+            file_format="csv",
+        )
+
+    elif cmdargs["name"] and cmdargs.get("--checkpoint"):
+        file_format = cmdargs["--format"].lower()
+        if file_format not in output_formats_conf or file_format == "json":
+            raise ValueError(
+                'Output format "{}" cannot be written incrementally, '
+                "use inchi, mol, sdf, csv or jsonl format with --checkpoint.".format(file_format)
+            )
+
+        if cmdargs["--output"] and writers.compression_of(cmdargs["--output"]) is not None:
+            raise ValueError("Compressed output cannot be resumed, do not use --checkpoint "
+                             "with .gz or .zst output.")
+
+        signature = {option: cmdargs.get(option) for option in CHECKPOINT_SIGNATURE_OPTIONS}
+        enumeration_checkpoint = checkpoint.Checkpoint.load(
+            path=cmdargs["--checkpoint"], signature=signature, interval=checkpoint_interval
+        )
+        outfile = open_output(
+            path=cmdargs["--output"],
+            file_format=file_format,
+            size=enumeration_checkpoint.output_size,
+        )
+        enumeration_checkpoint.output = None if outfile is sys.stdout else outfile
+
+        if cmdargs["--backend"] is not None:
+            openbabel.set_backend(name=cmdargs["--backend"])
+
+        molfiles = functools.partial(fileio.iter_molfiles, path_or_id=path_or_id, records=records, ids=ids,
+                                     id_field=id_field)
+        sdfile_chunks = api.iso_chunks(
+            molfiles=molfiles,
+            checkpoint=enumeration_checkpoint,
+            create_molfiles=file_format in {"sdf", "mol", "jsonl"},
+            **iso_options
+        )
+
+        try:
+            for sdfile_chunk in sdfile_chunks:
+                outputstr = format_output(sdfile=sdfile_chunk, file_format=file_format)
+                outfile.write(outputstr if outputstr.endswith("\n") else "{}\n".format(outputstr))
+            enumeration_checkpoint.save()
+        finally:
+            if outfile is not sys.stdout:
+                outfile.close()
+
+    elif cmdargs["name"]:
+        records = api.iter_iso(
             path_or_id=path_or_id,
-            specific_opt=cmdargs["--specific"],
-            all_opt=cmdargs["--all"],
-            enumerate_opt=cmdargs["--enumerate"],
-            complete_opt=cmdargs["--complete"],
-            ignore_iso_opt=cmdargs["--ignore-iso"],
+            backend=cmdargs["--backend"],
+            records=records,
+            ids=ids,
+            id_field=id_field,
+            create_molfiles=cmdargs["--format"].lower() in {"sdf", "mol", "json", "jsonl"},
+            **iso_options
         )
 
-        create_output(
-            sdfile=sdfile, path=cmdargs["--output"], file_format=cmdargs["--format"]
+        write_output(
+            records=records, path=cmdargs["--output"], file_format=cmdargs["--format"]
         )
 
     elif cmdargs["ionize"]:
         atom_states = cmdargs["--state"]
-        sdfile = api.chg(path_or_id=path_or_id, atom_states=atom_states)
-        create_output(
-            sdfile=sdfile, path=cmdargs["--output"], file_format=cmdargs["--format"]
+        records = api.iter_chg(
+            path_or_id=path_or_id,
+            atom_states=atom_states,
+            backend=cmdargs["--backend"],
+            records=records,
+            ids=ids,
+            id_field=id_field,
+            executor=cmdargs["--executor"],
+            jobs=jobs,
+        )
+        write_output(
+            records=records, path=cmdargs["--output"], file_format=cmdargs["--format"]
         )
 
     elif cmdargs["nmr"]:
@@ -112,25 +336,95 @@ def cli(cmdargs):
         couplings = [coupling.upper() for coupling in cmdargs["--jcoupling"]]
         subset = cmdargs["--subset"]
 
-        sdfile = api.iso_nmr(
+        records = api.iter_iso_nmr(
             path_or_id=path_or_id,
             experiment_type=experiment_type,
             couplings=couplings,
             decoupled=decoupled,
             subset=subset,
+            backend=cmdargs["--backend"],
+            records=records,
+            ids=ids,
+            id_field=id_field,
+            executor=cmdargs["--executor"],
+            jobs=jobs,
         )
 
-        create_output(
-            sdfile=sdfile, path=cmdargs["--output"], file_format=cmdargs["--format"]
+        write_output(
+            records=records, path=cmdargs["--output"], file_format=cmdargs["--format"]
         )
 
+    elif cmdargs["mid"]:
+        try:
+            distributions = api.mid(
+                path_or_id=path_or_id,
+                specific_opt=cmdargs["--specific"],
+                all_opt=cmdargs["--all"],
+                ignore_iso_opt=cmdargs["--ignore-iso"],
+                enrichment_opt=cmdargs["--enrichment"],
+                positions=index.parse_record_ranges(cmdargs["--atoms"]) if cmdargs["--atoms"] else None,
+                max_shift=int(cmdargs["--max-shift"]) if cmdargs["--max-shift"] else None,
+                backend=cmdargs["--backend"],
+                records=records,
+                ids=ids,
+                id_field=id_field,
+            )
+        except ValueError as error:
+            sys.exit("Error: {}".format(error))
+
+        shift_count = max(len(entry["MID"]) for entry in distributions) if distributions else 0
+        rows = [["Record"] + ["M+{}".format(shift) for shift in range(shift_count)]]
+        for entry in distributions:
+            fractions = entry["MID"] + [0.0] * (shift_count - len(entry["MID"]))
+            rows.append([entry["Record"]] + ["{:.6g}".format(fraction) for fraction in fractions])
+
+        save_output(
+            outputstr="\n".join("\t".join(str(value) for value in row) for row in rows),
+            path=cmdargs["--output"],
+            file_format="csv",
+        )
+
+    elif cmdargs["merge"]:
+        file_format = cmdargs["--format"].lower()
+        records = fileio.iter_merged_records(paths=cmdargs["<shard-output-path>"], file_format=file_format)
+
+        outfile = open_output(path=cmdargs["--output"], file_format=file_format)
+        try:
+            with writers.create_writer(outfile=outfile, file_format=file_format) as writer:
+                writer.write_record_strs(records)
+        finally:
+            if outfile is not sys.stdout:
+                outfile.close()
+
     elif cmdargs["vis"]:
         api.visualize(
             path_or_id=path_or_id,
             output_path=cmdargs["--output"],
             output_format=cmdargs["--format"],
+            backend=cmdargs["--backend"],
         )
 
+    if cmdargs.get("--verbose"):
+        stats = openbabel.get_backend().stats
+        print(
+            "Open Babel: {} probe(s), {} conversion(s)".format(
+                stats["probes"], stats["conversions"]
+            ),
+            file=sys.stderr,
+        )
+
+        for cache_name, cache_title in (("inchi", "InChI"), ("ctfile", "CTfile")):
+            conversion_cache = cache.get_cache(cache_name)
+            if conversion_cache is not None:
+                print(
+                    "{} cache: {} hit(s), {} miss(es)".format(
+                        cache_title,
+                        conversion_cache.stats["hits"],
+                        conversion_cache.stats["misses"],
+                    ),
+                    file=sys.stderr,
+                )
+
 
 def _unpack(param):
     """Unpack command-line option.
@@ -145,6 +439,51 @@ def _unpack(param):
     return options
 
 
+def output_path(path, file_format):
+    """Create path to output file, file format is used as extension if path does not have one.
+    Compression extension, i.e. ".gz" or ".zst", is kept after file format extension.
+
+    :param str path: Where to save results.
+    :param str file_format: File format to create file extension.
+    :return: Path to output file.
+    :rtype: :py:class:`str`
+    """
+    dirpath, basename = os.path.split(os.path.normpath(path))
+    filename, extension = os.path.splitext(basename)
+
+    compression_extension = ""
+    if writers.compression_of(basename) is not None:
+        compression_extension = extension
+        filename, extension = os.path.splitext(filename)
+
+    if not extension or extension.lower() not in output_formats_conf:
+        extension = ".{}".format(file_format)
+
+    filename = "{}{}{}".format(filename, extension, compression_extension)
+    filepath = os.path.join(dirpath, filename)
+
+    if dirpath and not os.path.exists(dirpath):
+        raise IOError('Directory does not exist: "{}"'.format(dirpath))
+    return filepath
+
+
+def _parse_shard(shard_str):
+    """Parse shard option, e.g. "2/8".
+
+    :param str shard_str: Shard number and number of shards separated by slash.
+    :return: (shard number, number of shards) tuple.
+    :rtype: :py:class:`tuple`
+    """
+    try:
+        shard_number, shard_count = [int(value) for value in shard_str.split("/")]
+    except ValueError:
+        raise ValueError('Incorrect shard "{}", use "i/N" format, e.g. 2/8.'.format(shard_str))
+
+    if not 1 <= shard_number <= shard_count:
+        raise ValueError('Shard number must be between 1 and {}: "{}"'.format(shard_count, shard_str))
+    return shard_number, shard_count
+
+
 def save_output(outputstr, path, file_format):
     """Save output results into file or print to stdout.
 
@@ -155,22 +494,56 @@ def save_output(outputstr, path, file_format):
     :rtype: :py:obj:`None`
     """
     if path is not None:
-        dirpath, basename = os.path.split(os.path.normpath(path))
-        filename, extension = os.path.splitext(basename)
+        with writers.open_output_file(output_path(path=path, file_format=file_format),
+                                      compression=writers.compression_of(path)) as outfile:
+            print(outputstr, file=outfile)
+    else:
+        print(outputstr, file=sys.stdout)
 
-        if not extension or extension.lower() not in output_formats_conf:
-            extension = ".{}".format(file_format)
 
-        filename = "{}{}".format(filename, extension)
-        filepath = os.path.join(dirpath, filename)
+def open_output(path, file_format, size=None):
+    """Open output file for incremental writing or use stdout.
 
-        if dirpath and not os.path.exists(dirpath):
-            raise IOError('Directory does not exist: "{}"'.format(dirpath))
+    :param str path: Where to save results, stdout is used if not provided.
+    :param str file_format: File format to create file extension.
+    :param int size: Size of previously written output to keep, file is truncated to this size.
+    :return: Output file.
+    :rtype: :py:class:`io.TextIOBase`
+    """
+    if path is None:
+        return sys.stdout
+
+    filepath = output_path(path=path, file_format=file_format)
+    compression = writers.compression_of(path)
+    if size is not None and os.path.exists(filepath):
+        if compression is not None:
+            raise ValueError('Compressed output "{}" cannot be resumed.'.format(filepath))
+        outfile = open(filepath, "r+")
+        outfile.seek(size)
+        outfile.truncate()
+        return outfile
+    return writers.open_output_file(filepath, compression=compression)
+
+
+def write_output(records, path=None, file_format="inchi"):
+    """Write conversion results incrementally as they are created.
+
+    :param records: Iterable of (``Molfile``, data) tuples, e.g. :func:`~isoenum.api.iter_iso` generator.
+    :param str path: Path to where file will be saved, results are printed to stdout if not provided.
+    :param str file_format: File format: 'inchi', 'mol', 'sdf', 'json', 'jsonl' or 'csv'.
+    :return: None.
+    :rtype: :py:obj:`None`
+    """
+    file_format = file_format.lower()
+    _check_output_format(file_format=file_format)
 
-        with open(filepath, "w") as outfile:
-            print(outputstr, file=outfile)
-    else:
-        print(outputstr, file=sys.stdout)
+    outfile = open_output(path=path, file_format=file_format)
+    try:
+        with writers.create_writer(outfile=outfile, file_format=file_format) as writer:
+            writer.write_records(records)
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
 
 
 def create_output(sdfile, path=None, file_format="inchi"):
@@ -179,52 +552,41 @@ def create_output(sdfile, path=None, file_format="inchi"):
     :param sdfile: ``SDfile`` instance.
     :type sdfile: :class:`~ctfile.ctfile.SDfile`.
     :param str path: Path to where file will be saved. 
-    :param str file_format: File format: 'inchi', 'mol', 'sdf', 'json', or 'csv'.
+    :param str file_format: File format: 'inchi', 'mol', 'sdf', 'json', 'jsonl' or 'csv'.
     :return: None.
     :rtype: :py:obj:`None`
     """
-    file_format = file_format.lower()
-
-    if file_format not in output_formats_conf:
-        raise ValueError(
-            'Unknown output format: "{}".\n'
-            "Available formats are: {}".format(file_format, output_formats_conf)
-        )
+    records = ((entry["molfile"], entry["data"]) for entry in sdfile.values())
+    write_output(records=records, path=path, file_format=file_format)
 
-    if file_format in {"sdf", "mol"}:
-        save_output(
-            outputstr=sdfile.writestr(file_format="ctfile"),
-            path=path,
-            file_format=file_format,
-        )
 
-    elif file_format in {"json"}:
-        save_output(
-            outputstr=sdfile.writestr(file_format="json"),
-            path=path,
-            file_format=file_format,
-        )
+def format_output(sdfile, file_format="inchi"):
+    """Format conversion results.
 
-    elif file_format in {"inchi"}:
-        output = []
-        for entry_id in sdfile:
-            output.extend(
-                [inchi.strip() for inchi in sdfile[entry_id]["data"]["InChI"]]
-            )
+    :param sdfile: ``SDfile`` instance.
+    :type sdfile: :class:`~ctfile.ctfile.SDfile`.
+    :param str file_format: File format: 'inchi', 'mol', 'sdf', 'json', 'jsonl' or 'csv'.
+    :return: Output string.
+    :rtype: :py:class:`str`
+    """
+    file_format = file_format.lower()
+    _check_output_format(file_format=file_format)
 
-        save_output(outputstr="\n".join(output), path=path, file_format=file_format)
+    outputstr = io.StringIO()
+    with writers.create_writer(outfile=outputstr, file_format=file_format) as writer:
+        writer.write_records((entry["molfile"], entry["data"]) for entry in sdfile.values())
+    return outputstr.getvalue()
 
-    elif file_format in {"csv"}:
-        outputstr = io.StringIO()
-        csvwriter = csv.writer(outputstr, delimiter="\t")
 
-        for entry_id in sdfile:
-            csv_data = []
-            for data_id in sdfile[entry_id]["data"]:
-                value = " + ".join(
-                    [item.strip() for item in sdfile[entry_id]["data"][data_id]]
-                )
-                csv_data.append(value)
-            csvwriter.writerow(csv_data)
+def _check_output_format(file_format):
+    """Check that output format is supported.
 
-        save_output(outputstr=outputstr.getvalue(), path=path, file_format=file_format)
+    :param str file_format: File format.
+    :return: None.
+    :rtype: :py:obj:`None`
+    """
+    if file_format not in output_formats_conf:
+        raise ValueError(
+            'Unknown output format: "{}".\n'
+            "Available formats are: {}".format(file_format, output_formats_conf)
+        )
@@ -22,3 +22,41 @@ with open(isotopes_path, 'r') as infile:
 
 with open(output_formats_path, 'r') as infile:
     output_formats_conf = set(json.load(infile))
+
+# Open Babel backend used by default: auto, subprocess, pybel or pool
+openbabel_backend = os.environ.get('ISOENUM_OPENBABEL_BACKEND', 'auto')
+
+# number of "pool" backend workers (number of CPUs if 0) and per-request timeout in seconds
+openbabel_pool_size = int(os.environ.get('ISOENUM_OPENBABEL_POOL_SIZE', 0))
+openbabel_pool_timeout = float(os.environ.get('ISOENUM_OPENBABEL_POOL_TIMEOUT', 60))
+
+# optional file used to persist probed Open Babel capabilities between runs
+openbabel_capability_path = os.environ.get('ISOENUM_OPENBABEL_CAPABILITIES')
+
+# directory for temporary files when conversion cannot be done through pipes, system default if not set
+scratch_dir = os.environ.get('ISOENUM_SCRATCH_DIR')
+
+# directory for on-disk conversion cache, only in-memory cache is used if not set
+cache_dir = os.environ.get('ISOENUM_CACHE_DIR')
+cache_enabled = os.environ.get('ISOENUM_NO_CACHE') is None
+
+# maximum number of entries kept in every in-memory conversion cache
+cache_maxsize = int(os.environ.get('ISOENUM_CACHE_MAXSIZE', 10000))
+
+# labeling schema enumeration engine: auto, python or numpy, auto uses NumPy if it is installed
+labeling_engine = os.environ.get('ISOENUM_LABELING_ENGINE', 'auto')
+
+# InChI engine of labeling schemas: obabel, synthesize or verify, and number of synthesized
+# InChI of every conversion task compared with Open Babel InChI by "verify" engine
+inchi_engine = os.environ.get('ISOENUM_INCHI_ENGINE', 'obabel')
+inchi_verify_sample = int(os.environ.get('ISOENUM_INCHI_VERIFY_SAMPLE', 10))
+
+# executor of Open Babel conversions: auto, serial, thread or process, and number of jobs (number of CPUs if 0)
+executor = os.environ.get('ISOENUM_EXECUTOR', 'auto')
+jobs = int(os.environ.get('ISOENUM_JOBS', 1))
+
+# minimum number of seconds between checkpoint file updates of resumable enumeration
+checkpoint_interval = float(os.environ.get('ISOENUM_CHECKPOINT_INTERVAL', 10))
+
+# number of characters collected by output writers before they are written to output file
+output_buffer_size = int(os.environ.get('ISOENUM_OUTPUT_BUFFER_SIZE', 1024 * 1024))
@@ -7,3 +7,11 @@ Custom exceptions.
 
 class EmptyCTFileError(Exception):
     """Invalid CTFile object error."""
+
+
+class OpenBabelWorkerError(Exception):
+    """Open Babel conversion worker error."""
+
+
+class ConversionTimeoutError(OpenBabelWorkerError):
+    """Open Babel conversion worker did not respond in time."""
@@ -9,14 +9,20 @@ This module provides routines to generate ``CTfile`` objects and
 convert ``CTfile`` objects into ``InChI`` and vice versa.
 """
 
+import io
+import itertools
 import os
-import tempfile
 import logging
+import time
+from collections import OrderedDict
 
 import ctfile
+import more_itertools
 import requests
 
+from . import cache
 from . import exceptions
+from . import index
 from . import openbabel
 from . import utils
 
@@ -63,6 +69,249 @@ def create_ctfile(path_or_id, xyx_coordinates='--gen2D', explicit_hydrogens='-h'
         raise exceptions.EmptyCTFileError('Cannot create "CTfile" object.')
 
 
+def iter_molfiles(path_or_id, xyx_coordinates='--gen2D', explicit_hydrogens='-h', records=None, ids=None,
+                  id_field='ID'):
+    """Generate ``Molfile`` objects one at a time, so that only a single record of
+    ``SDfile`` is kept in memory.
+
+    :param str path_or_id: Path to ``Molfile``, ``SDfile``, ``InChI``, or ``InChI`` string.
+    :param str xyx_coordinates: Option that generates x, y, z coordinates (e.g., "--gen2D" or "--gen3D").
+    :param str explicit_hydrogens: Option that makes hydrogens atoms explicit when generating ``CTfile`` object.
+    :param list records: List of 1-based record numbers to read from ``SDfile``, all records if not provided.
+    :param list ids: List of record identifiers to read from ``SDfile``, all records if not provided.
+    :param str id_field: Name of data item (e.g. ``> <ID>``) used as record identifier.
+    :return: Generator of ``Molfile`` objects.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if records or ids:
+        if not os.path.isfile(path_or_id):
+            raise ValueError('Records can only be selected from existing "SDfile".')
+
+        sdfile_index = index.SDfileIndex.load(path=path_or_id, id_field=id_field)
+        record_numbers = sdfile_index.resolve(records=records, ids=ids)
+        for record in sdfile_index.read_records(record_numbers):
+            yield create_molfile_from_record_str(record)
+        return
+
+    if not os.path.isfile(path_or_id):
+        ctf = create_ctfile(path_or_id=path_or_id,
+                            xyx_coordinates=xyx_coordinates,
+                            explicit_hydrogens=explicit_hydrogens)
+        for molfile in ctf.molfiles:
+            yield molfile
+        return
+
+    with open(path_or_id, 'r') as infile:
+        head_lines = list(itertools.islice(infile, 4))
+
+    if head_lines and head_lines[0].lstrip().startswith('{'):
+        for molfile in create_ctfile(path_or_id=path_or_id).molfiles:
+            yield molfile
+
+    elif not is_ctfile_header(head_lines):
+        for molfile in iter_molfiles_from_identifier_file(path=path_or_id,
+                                                          xyx_coordinates=xyx_coordinates,
+                                                          explicit_hydrogens=explicit_hydrogens):
+            yield molfile
+
+    else:
+        with open(path_or_id, 'r') as infile:
+            for record in iter_ctfile_records(infile):
+                yield create_molfile_from_record_str(record)
+
+
+def is_ctfile_header(lines):
+    """Test if lines look like ``CTfile`` header block followed by counts line.
+
+    :param list lines: First four lines of file.
+    :return: True if the fourth line is counts line, False otherwise.
+    :rtype: :py:obj:`True` or :py:obj:`False`
+    """
+    if len(lines) < 4:
+        return False
+
+    counts_line = lines[3]
+    return counts_line[0:3].strip().isdigit() and counts_line[3:6].strip().isdigit()
+
+
+def iter_molfiles_from_identifier_file(path, chunk_size=500, output_format='mol', **options):
+    """Generate ``Molfile`` objects from line-oriented file of ``InChI`` and ``SMILES``
+    identifiers, one identifier per line, converting every chunk of lines within
+    a single Open Babel call per identifier format.
+
+    :param str path: Path to file containing ``InChI`` or ``SMILES`` identifiers.
+    :param int chunk_size: Number of identifiers converted per Open Babel call.
+    :param str output_format: Output file format used by Open Babel to generate ``CTfile``.
+    :param options: Additional options to be passed to Open Babel.
+    :return: Generator of ``Molfile`` objects.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    with open(path, 'r') as infile:
+        identifier_strs = (line.strip() for line in infile if line.strip())
+        for chunk in more_itertools.chunked(identifier_strs, chunk_size):
+            for molfile in create_ctfiles_from_identifier_strs(identifier_strs=chunk,
+                                                               output_format=output_format,
+                                                               **options):
+                if molfile is not None:
+                    yield molfile
+
+
+def create_ctfiles_from_identifier_strs(identifier_strs, output_format='mol', **options):
+    """Create ``CTfile`` instances from many ``InChI`` or ``SMILES`` identifier strings,
+    identifiers of the same format are converted within a single Open Babel call.
+
+    :param list identifier_strs: List of ``InChI`` or ``SMILES`` identifier strings.
+    :param str output_format: Output file format used by Open Babel to generate ``CTfile``,
+                              results are cached under the same keys as
+                              :func:`~isoenum.fileio.create_ctfile_from_identifier_str` results.
+    :param options: Additional options to be passed to Open Babel.
+    :return: List of ``CTfile`` instances in the same order as identifiers,
+             None for identifiers that cannot be converted.
+    :rtype: :py:class:`list`
+    """
+    ctfile_cache = cache.get_cache('ctfile')
+    ctfile_strs = [None] * len(identifier_strs)
+    keys = {}
+
+    missing = {'inchi': [], 'smiles': []}
+    for index, identifier_str in enumerate(identifier_strs):
+        if ctfile_cache is not None:
+            keys[index] = cache.create_key(identifier_str, output_format=output_format, **options)
+            ctfile_strs[index] = ctfile_cache.get(keys[index])
+            if ctfile_strs[index] is not None:
+                continue
+        missing[guess_identifier_format(identifier_str=identifier_str)].append(index)
+
+    converted = []
+    # SMILES reader keeps the rest of the line as molecule name, so every SMILES is named by its index,
+    # results are mapped back by name and then get molecule name of their identifier line back
+    if missing['smiles']:
+        smiles_str = ''.join('{} {}\n'.format(identifier_strs[index].split()[0], index)
+                             for index in missing['smiles'])
+        records = _convert_identifiers_to_records(smiles_str, input_format='smiles', **options)
+        named_records = {record.split('\n', 1)[0].strip(): record for record in records}
+        for index in missing['smiles']:
+            record = named_records.get(str(index))
+            if record is not None:
+                name = identifier_strs[index].split(None, 1)[1:]
+                record = '{}\n{}'.format(name[0].strip() if name else '', record.split('\n', 1)[1])
+            converted.append((index, record))
+
+    # InChI reader does not keep names and stops at the first identifier it cannot read,
+    # so results are mapped back by position and conversion resumes after the failed identifier
+    remaining = missing['inchi']
+    while remaining:
+        inchi_str = ''.join('{}\n'.format(identifier_strs[index]) for index in remaining)
+        records = _convert_identifiers_to_records(inchi_str, input_format='inchi', **options)
+        converted.extend(zip(remaining, records))
+        if len(records) < len(remaining):
+            converted.append((remaining[len(records)], None))
+        remaining = remaining[len(records) + 1:]
+
+    for index, record in converted:
+        if not record or 'M  END' not in record:
+            logger.warning('WARNING: Cannot create "CTfile" for identifier: {}'.format(identifier_strs[index]))
+            continue
+
+        ctfile_strs[index] = '{}M  END\n'.format(record[:record.find('M  END')])
+        if ctfile_cache is not None:
+            ctfile_cache.set(keys[index], ctfile_strs[index])
+
+    return [ctfile.loadstr(ctfile_str) if ctfile_str is not None else None for ctfile_str in ctfile_strs]
+
+
+def _convert_identifiers_to_records(identifiers_str, input_format, **options):
+    """Convert identifiers, one per line, into ``SDfile`` record strings within single Open Babel call.
+
+    :param str identifiers_str: Identifier strings, one per line.
+    :param str input_format: Identifier format: "inchi" or "smiles".
+    :param options: Additional options to be passed to Open Babel.
+    :return: List of ``SDfile`` record strings.
+    :rtype: :py:class:`list`
+    """
+    sdfile_str = openbabel.convert_str(input_str=identifiers_str,
+                                       input_format=input_format,
+                                       output_format='sdf',
+                                       **options)
+    return list(iter_ctfile_records(io.StringIO(sdfile_str)))
+
+
+def iter_ctfile_records(infile):
+    """Split ``SDfile`` into record strings on ``$$$$`` record boundaries.
+
+    :param infile: File-like object opened in text mode.
+    :return: Generator of record strings.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    lines = []
+    for line in infile:
+        if line.startswith('$$$$'):
+            yield ''.join(lines)
+            lines = []
+        else:
+            lines.append(line)
+
+    if ''.join(lines).strip():
+        yield ''.join(lines)
+
+
+def iter_merged_records(paths, file_format='inchi'):
+    """Merge output files, e.g. outputs of enumeration shards, keeping only the first
+    record of every ``InChI``.
+
+    :param list paths: Paths to output files in the order of shards.
+    :param str file_format: Format of output files: "inchi", "csv", "sdf" or "mol".
+    :return: Generator of record strings.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if file_format not in {'inchi', 'csv', 'sdf', 'mol'}:
+        raise ValueError('Cannot merge "{}" output files, use inchi, csv, sdf or mol format.'.format(file_format))
+
+    seen = set()
+    for path in paths:
+        with open(path, 'r') as infile:
+            if file_format in {'sdf', 'mol'}:
+                records = ('{}$$$$\n'.format(record) for record in iter_ctfile_records(infile))
+            else:
+                records = (line if line.endswith('\n') else '{}\n'.format(line) for line in infile if line.strip())
+
+            for record in records:
+                key = _record_inchi(record=record, file_format=file_format)
+                if key not in seen:
+                    seen.add(key)
+                    yield record
+
+
+def _record_inchi(record, file_format):
+    """Find ``InChI`` of output record.
+
+    :param str record: Output record string.
+    :param str file_format: Format of output record: "inchi", "csv", "sdf" or "mol".
+    :return: ``InChI`` or whole record string if record does not have ``InChI``.
+    :rtype: :py:class:`str`
+    """
+    if file_format in {'sdf', 'mol'}:
+        lines = record.splitlines()
+        for line_number, line in enumerate(lines[:-1]):
+            if line.startswith('>') and '<InChI>' in line:
+                return lines[line_number + 1].strip()
+        return record
+    return record.split('\t', 1)[0].strip()
+
+
+def create_molfile_from_record_str(record_str):
+    """Create ``Molfile`` object from single ``SDfile`` record string, data items are ignored.
+
+    :param str record_str: ``SDfile`` record string.
+    :return: ``Molfile`` object.
+    :rtype: :class:`~ctfile.ctfile.Molfile`
+    """
+    end = record_str.find('M  END')
+    if end == -1:
+        raise IndexError('Cannot find "M  END" line in record.')
+    return ctfile.loadstr('{}M  END\n'.format(record_str[:end]))
+
+
 def create_ctfile_from_ctfile_str(ctfile_str):
     """Create ``CTfile`` object from ``CTfile`` string.
 
@@ -73,6 +322,67 @@ def create_ctfile_from_ctfile_str(ctfile_str):
     return ctfile.loadstr(ctfile_str)
 
 
+class MolfileTemplate(object):
+    """Text of ``Molfile`` split around its properties block, so that ``Molfile`` with
+    different isotopes is rendered by string assembly without parsing."""
+
+    def __init__(self, molfile):
+        """Molfile template initializer.
+
+        :param molfile: Instance of ``Molfile``.
+        :type molfile: :class:`~ctfile.ctfile.Molfile`
+        """
+        lines = molfile.writestr(file_format='ctfile').splitlines(True)
+        block_start = 4 + len(molfile.atoms) + len(molfile.bonds)
+        block_end = block_start
+        while not lines[block_end].startswith('M  END'):
+            block_end += 1
+
+        self.prefix = ''.join(lines[:block_start])
+        self.suffix = ''.join(lines[block_end:])
+        self.atom_order = {atom.atom_number: index for index, atom in enumerate(molfile.atoms)}
+        self.charged = any(atom.charge != '0' for atom in molfile.atoms)
+
+        # atom number to property name to value mapping in the order properties are read by ctfile
+        self.properties = {}
+        for line in lines[block_start:block_end]:
+            fields = line.split()
+            for atom_number, value in more_itertools.sliced(fields[3:], 2):
+                self.properties.setdefault(atom_number, OrderedDict())[fields[1]] = value
+
+    def render(self, isotopes):
+        """Render ``Molfile`` string with isotopes, the same as ``Molfile`` string of
+        parsed template with isotopes assigned to atoms.
+
+        :param dict isotopes: Atom number to isotope mapping.
+        :return: ``Molfile`` string.
+        :rtype: :py:class:`str`
+        """
+        properties = self.properties
+        if isotopes:
+            properties = dict(properties)
+            for atom_number, isotope in isotopes.items():
+                atom_properties = OrderedDict(properties.get(atom_number, ()))
+                atom_properties['ISO'] = isotope
+                properties[atom_number] = atom_properties
+
+        property_lines = OrderedDict()
+        for atom_number in sorted(properties, key=self.atom_order.__getitem__):
+            for name, value in properties[atom_number].items():
+                property_lines.setdefault(name, []).append('M  {}  1{:>4}{:>4}\n'.format(name, atom_number, value))
+
+        return ''.join([self.prefix] + [line for lines in property_lines.values() for line in lines] + [self.suffix])
+
+    def create_molfile(self, isotopes):
+        """Create ``Molfile`` object with isotopes.
+
+        :param dict isotopes: Atom number to isotope mapping.
+        :return: ``Molfile`` object.
+        :rtype: :class:`~ctfile.ctfile.Molfile`
+        """
+        return create_ctfile_from_ctfile_str(ctfile_str=self.render(isotopes))
+
+
 def create_ctfile_from_identifier_file(path, output_format='mol', **options):
     """Create ``CTfile`` instance from ``InChI`` or ``SMILES`` identifier file.
 
@@ -83,17 +393,9 @@ def create_ctfile_from_identifier_file(path, output_format='mol', **options):
     :rtype: :class:`~ctfile.ctfile.CTfile`
     """
     with open(path, 'r') as infile:
-        input_format = guess_identifier_format(identifier_str=infile.read())
-
-    with tempfile.NamedTemporaryFile() as tempfh:
-        openbabel.convert(input_file_path=path,
-                          output_file_path=tempfh.name,
-                          input_format=input_format,
-                          output_format=output_format,
-                          **options)
+        identifier_str = infile.read()
 
-        with open(tempfh.name, 'r') as infile:
-            return ctfile.load(infile)
+    return create_ctfile_from_identifier_str(identifier_str=identifier_str, output_format=output_format, **options)
 
 
 def create_ctfile_from_identifier_str(identifier_str, output_format='mol', **options):
@@ -105,10 +407,23 @@ def create_ctfile_from_identifier_str(identifier_str, output_format='mol', **opt
     :return: Subclass of :class:`~ctfile.ctfile.CTfile` object.
     :rtype: :class:`~ctfile.ctfile.CTfile`
     """
-    with tempfile.NamedTemporaryFile(mode='w') as tempfh:
-        tempfh.write(identifier_str)
-        tempfh.flush()
-        return create_ctfile_from_identifier_file(path=tempfh.name, output_format=output_format, **options)
+    # generated coordinates are cached as text and re-parsed, so every call gets its own instance
+    ctfile_cache = cache.get_cache('ctfile')
+    if ctfile_cache is not None:
+        key = cache.create_key(identifier_str, output_format=output_format, **options)
+        ctfile_str = ctfile_cache.get(key)
+        if ctfile_str is not None:
+            return ctfile.loadstr(ctfile_str)
+
+    ctfile_str = openbabel.convert_str(input_str=identifier_str,
+                                       input_format=guess_identifier_format(identifier_str=identifier_str),
+                                       output_format=output_format,
+                                       **options)
+    ctf = ctfile.loadstr(ctfile_str)
+
+    if ctfile_cache is not None:
+        ctfile_cache.set(key, ctfile_str)
+    return ctf
 
 
 def guess_identifier_format(identifier_str):
@@ -137,16 +452,160 @@ def create_inchi_from_ctfile_obj(ctf, **options):
     if atom_charges:
         options.update({'fixedH': '-xF'})
 
-    with tempfile.NamedTemporaryFile(mode='w') as moltempfh, tempfile.NamedTemporaryFile(mode='r') as inchitempfh:
-        moltempfh.write(ctf.writestr(file_format='ctfile'))
-        moltempfh.flush()
-        openbabel.convert(input_file_path=moltempfh.name,
-                          output_file_path=inchitempfh.name,
-                          input_format='mol',
-                          output_format='inchi',
-                          **options)
-        inchi_result = inchitempfh.read()
-    return inchi_result.strip()
+    ctfile_str = ctf.writestr(file_format='ctfile')
+
+    inchi_cache = cache.get_cache('inchi')
+    if inchi_cache is not None:
+        key = cache.create_key(cache.normalize_ctfile_str(ctfile_str), **options)
+        inchi = inchi_cache.get(key)
+        if inchi is not None:
+            return inchi
+
+    inchi_result = openbabel.convert_str(input_str=ctfile_str,
+                                         input_format='mol',
+                                         output_format='inchi',
+                                         **options)
+    inchi = inchi_result.strip()
+
+    if inchi_cache is not None and inchi:
+        inchi_cache.set(key, inchi)
+    return inchi
+
+
+def create_inchis_from_ctfile_objs(ctfs, chunk_size=500, **options):
+    """Create ``InChI`` for many ``CTfile`` instances, converting each chunk of
+    instances within a single Open Babel call.
+
+    :param ctfs: Iterable of :class:`~ctfile.ctfile.CTfile` instances.
+    :param int chunk_size: Number of ``CTfile`` instances converted per Open Babel call.
+    :param options: Additional options to be passed to Open Babel.
+    :return: List of ``InChI`` strings in the same order as ``CTfile`` instances,
+             empty string for instances that cannot be converted.
+    :rtype: :py:class:`list`
+    """
+    inchis = []
+    for chunk in more_itertools.chunked(ctfs, chunk_size):
+        # apply fixed hydrogen layer when atom charges are present
+        inchis.extend(create_inchis_from_ctfile_strs(
+            ctfile_strs=[ctf.writestr(file_format='ctfile') for ctf in chunk],
+            charged=[any(atom.charge != '0' for atom in ctf.atoms) for ctf in chunk],
+            chunk_size=chunk_size, **options))
+    return inchis
+
+
+def create_inchis_from_ctfile_strs(ctfile_strs, charged, chunk_size=500, **options):
+    """Create ``InChI`` for many ``CTfile`` strings, converting each chunk of
+    strings within a single Open Babel call.
+
+    :param list ctfile_strs: List of ``CTfile`` strings.
+    :param list charged: List of flags whether ``CTfile`` has atom charges, fixed hydrogen layer is used if so.
+    :param int chunk_size: Number of ``CTfile`` strings converted per Open Babel call.
+    :param options: Additional options to be passed to Open Babel.
+    :return: List of ``InChI`` strings in the same order as ``CTfile`` strings,
+             empty string for strings that cannot be converted.
+    :rtype: :py:class:`list`
+    """
+    inchi_cache = cache.get_cache('inchi')
+
+    inchis = []
+    for chunk_start in range(0, len(ctfile_strs), chunk_size):
+        chunk_ctfile_strs = ctfile_strs[chunk_start:chunk_start + chunk_size]
+        chunk_charged = charged[chunk_start:chunk_start + chunk_size]
+        chunk_inchis = [''] * len(chunk_ctfile_strs)
+
+        for fixed_hydrogens in (False, True):
+            conversion_options = dict(options)
+            if fixed_hydrogens:
+                conversion_options.update({'fixedH': '-xF'})
+
+            records = []
+            keys = {}
+            for index, (ctfile_str, is_charged) in enumerate(zip(chunk_ctfile_strs, chunk_charged)):
+                if is_charged != fixed_hydrogens:
+                    continue
+
+                if inchi_cache is not None:
+                    keys[index] = cache.create_key(cache.normalize_ctfile_str(ctfile_str), **conversion_options)
+                    inchi = inchi_cache.get(keys[index])
+                    if inchi is not None:
+                        chunk_inchis[index] = inchi
+                        continue
+
+                records.append((index, ctfile_str))
+
+            if not records:
+                continue
+
+            for index, inchi in _convert_records_to_inchi(records=records, title='-xt', **conversion_options):
+                chunk_inchis[index] = inchi
+                if inchi_cache is not None and inchi:
+                    inchi_cache.set(keys[index], inchi)
+
+        inchis.extend(chunk_inchis)
+    return inchis
+
+
+def measure_inchi_conversion_cost(ctfile_strs, **options):
+    """Measure cost of converting ``CTfile`` strings into ``InChI`` bypassing cache:
+    a single string is converted within one Open Babel call and then all strings
+    are converted within another call.
+
+    :param list ctfile_strs: List of ``CTfile`` strings, at least two.
+    :param options: Additional options to be passed to Open Babel.
+    :return: Tuple of per-call and per-string cost in seconds.
+    :rtype: :py:class:`tuple`
+    """
+    records = list(enumerate(ctfile_strs))
+
+    # first call also pays for Open Babel probing, so it is not measured
+    _convert_records_to_inchi(records=records[:1], title='-xt', **options)
+
+    start = time.time()
+    _convert_records_to_inchi(records=records[:1], title='-xt', **options)
+    single_cost = time.time() - start
+
+    start = time.time()
+    _convert_records_to_inchi(records=records, title='-xt', **options)
+    batch_cost = time.time() - start
+
+    per_record_cost = max((batch_cost - single_cost) / max(len(records) - 1, 1), 0.0)
+    per_call_cost = max(single_cost - per_record_cost, 0.0)
+    return per_call_cost, per_record_cost
+
+
+def _convert_records_to_inchi(records, **options):
+    """Convert indexed ``CTfile`` strings into ``InChI`` within single Open Babel call.
+
+    Every record is named by its index, Open Babel writes the name after ``InChI``,
+    so results are mapped back to records even if some of them fail to convert.
+
+    :param list records: List of (index, ``CTfile`` string) tuples.
+    :param options: Additional options to be passed to Open Babel.
+    :return: List of (index, ``InChI``) tuples.
+    :rtype: :py:class:`list`
+    """
+    sdfile_records = []
+    for index, ctfile_str in records:
+        sdfile_records.append('{}\n{}$$$$\n'.format(index, ctfile_str.split('\n', 1)[1]))
+
+    inchi_results = openbabel.convert_str(input_str=''.join(sdfile_records),
+                                          input_format='sdf',
+                                          output_format='inchi',
+                                          **options)
+
+    converted = {}
+    for line in inchi_results.splitlines():
+        inchi, _, name = line.strip().partition(' ')
+        if inchi.startswith('InChI='):
+            converted[name.strip()] = inchi
+
+    results = []
+    for index, _ in records:
+        inchi = converted.get(str(index), '')
+        if not inchi:
+            logger.warning('WARNING: Cannot create "InChI" for record: {}'.format(index))
+        results.append((index, inchi))
+    return results
 
 
 def normalize_ctfile_obj(ctf, xyx_coordinates='--gen2D', explicit_hydrogens='-h'):
@@ -172,6 +631,19 @@ def create_empty_sdfile_obj():
     return ctfile.SDfile()
 
 
+def create_sdfile_obj(records):
+    """Create ``SDfile`` object from records.
+
+    :param records: Iterable of (``Molfile``, data) tuples, e.g. :func:`~isoenum.api.iter_iso` generator.
+    :return: ``SDfile`` object.
+    :rtype: :class:`~ctfile.ctfile.SDfile`
+    """
+    sdfile = ctfile.SDfile()
+    for molfile, data in records:
+        sdfile.add_molfile(molfile=molfile, data=data)
+    return sdfile
+
+
 def create_empty_molfile_obj():
     """Create empty ``Molfile`` object.
 
@@ -189,17 +661,10 @@ def create_svg_str(inchi_str, **options):
     :return: SVG XML code.
     :rtype: :py:class:`str`
     """
-    with tempfile.NamedTemporaryFile(mode='w') as inchi_tempfh, tempfile.NamedTemporaryFile(mode='r') as svg_tempfh:
-        inchi_tempfh.write(inchi_str)
-        inchi_tempfh.flush()
-
-        openbabel.convert(input_file_path=inchi_tempfh.name,
-                          output_file_path=svg_tempfh.name,
-                          input_format='inchi',
-                          output_format='svg',
-                          **options)
-        svg_str = svg_tempfh.read()
-    return svg_str
+    return openbabel.convert_str(input_str=inchi_str,
+                                 input_format='inchi',
+                                 output_format='svg',
+                                 **options)
 
 
 def circular_consistency_test(inchi_str):
@@ -212,25 +677,15 @@ def circular_consistency_test(inchi_str):
     """
     original_inchi_str = inchi_str.strip()
 
-    with tempfile.NamedTemporaryFile(mode='w') as temp_inchi_fh, \
-         tempfile.NamedTemporaryFile(mode='w') as temp_mol_fh, \
-         tempfile.NamedTemporaryFile(mode='w') as temp_converted_inchi_fh:
-
-        temp_inchi_fh.write(original_inchi_str)
-        temp_inchi_fh.flush()
-
-        options = {}
-        if inchi_str.startswith('InChI=1/'):
-            options['fixedh'] = '-xF'
-
-        openbabel.convert(input_file_path=temp_inchi_fh.name, output_file_path=temp_mol_fh.name,
-                          input_format='inchi', output_format='mol', gen3D='--gen3D')
+    options = {}
+    if inchi_str.startswith('InChI=1/'):
+        options['fixedh'] = '-xF'
 
-        openbabel.convert(input_file_path=temp_mol_fh.name, output_file_path=temp_converted_inchi_fh.name,
-                          input_format='mol', output_format='inchi', **options)
+    mol_str = openbabel.convert_str(input_str=original_inchi_str,
+                                    input_format='inchi', output_format='mol', gen3D='--gen3D')
 
-        with open(temp_converted_inchi_fh.name, 'r') as inf:
-            converted_inchi_str = inf.read().strip()
+    converted_inchi_str = openbabel.convert_str(input_str=mol_str,
+                                                input_format='mol', output_format='inchi', **options).strip()
 
     if original_inchi_str != converted_inchi_str:
         logger.warning('WARNING: Circular conversion test (InChI to molfile to InChI) did not pass.'
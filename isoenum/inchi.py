@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+isoenum.inchi
+~~~~~~~~~~~~~
+
+This module provides creation of ``InChI`` of labeling schemas without converting
+every labeling schema with Open Babel. Unlabeled ``Molfile`` is converted once with
+``AuxInfo``, which provides canonical numbers of atoms and classes of equivalent
+atoms, and isotopic layer of every labeling schema is written in pure Python.
+
+Isotopic layer is synthesized only if labeling cannot change canonical numbering or
+stereochemistry: every class of equivalent atoms is labeled the same way and no atom
+becomes a new stereocenter because of labeled hydrogens. Other labeling schemas,
+e.g. labeling of one of two equivalent methyl groups, labeling of exchangeable
+hydrogens, or ``Molfile`` with charges or existing isotopes, are converted by Open Babel.
+"""
+
+import logging
+import re
+from collections import Counter
+from collections import defaultdict
+
+from . import cache
+from . import conf
+from . import fileio
+from . import openbabel
+from .conf import isotopes_conf
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.StreamHandler())
+
+
+ENGINES = ('obabel', 'synthesize', 'verify')
+
+# symbols of hydrogen isotopes in isotopic layer, in the order they are written
+HYDROGEN_ISOTOPES = (('3', 'T'), ('2', 'D'), ('1', 'H'))
+
+# layers of unlabeled InChI after which isotopic layer is appended
+BASE_LAYERS = set('chbtms')
+
+
+class IsotopicLayerSynthesizer(object):
+    """Synthesizer of ``InChI`` with isotopic layer from ``InChI`` and ``AuxInfo`` of unlabeled ``Molfile``."""
+
+    def __init__(self, template):
+        """Isotopic layer synthesizer initializer.
+
+        :param template: Template of ``Molfile``.
+        :type template: :class:`~isoenum.fileio.MolfileTemplate`
+        """
+        self.base_inchi = None
+        self.canonical_numbers = {}
+        self.base_masses = {}
+        self.hydrogens = {}
+        self.hydrogen_counts = Counter()
+        self.carbons = set()
+        self.equivalence_classes = []
+
+        # charges, radicals and existing isotopes are not supported
+        if template.properties:
+            return
+
+        symbols, neighbors = _read_connection_table(template.prefix)
+        base_inchi, auxinfo = convert_with_auxinfo(template.render({}))
+        if not base_inchi or not auxinfo:
+            return
+
+        layers = base_inchi.split('/')
+        if '.' in layers[1] or any(layer[:1] not in BASE_LAYERS for layer in layers[2:]):
+            return
+
+        numbers = re.search(r'/N:([\d,]+)', auxinfo)
+        if numbers is None:
+            return
+
+        canonical_atoms = numbers.group(1).split(',')
+        if any(atom_number not in symbols for atom_number in canonical_atoms):
+            return
+        self.canonical_numbers = {atom_number: index for index, atom_number in enumerate(canonical_atoms, start=1)}
+        self.base_masses = {atom_number: _base_mass(symbols[atom_number]) for atom_number in canonical_atoms
+                            if symbols[atom_number] in isotopes_conf}
+
+        for atom_number, symbol in symbols.items():
+            if symbol == 'H' and atom_number not in self.canonical_numbers:
+                if len(neighbors[atom_number]) != 1 or neighbors[atom_number][0] not in self.canonical_numbers:
+                    return
+                heavy_atom_number = neighbors[atom_number][0]
+                self.hydrogens[atom_number] = heavy_atom_number
+                self.hydrogen_counts[heavy_atom_number] += 1
+        self.carbons = {atom_number for atom_number in canonical_atoms if symbols[atom_number] == 'C'}
+
+        equivalence = re.search(r'/E:([^/]*)', auxinfo.split('/I:')[0])
+        if equivalence is not None:
+            for group in re.findall(r'\(([\d,]+)\)', equivalence.group(1)):
+                self.equivalence_classes.append([canonical_atoms[int(number) - 1] for number in group.split(',')])
+
+        self.base_inchi = base_inchi
+
+    def synthesize(self, isotopes):
+        """Synthesize ``InChI`` of labeling schema.
+
+        :param dict isotopes: Atom number to isotope mapping.
+        :return: ``InChI`` string or None if labeling schema needs to be converted by Open Babel.
+        :rtype: :py:class:`str` or :py:obj:`None`
+        """
+        if self.base_inchi is None:
+            return None
+
+        shifts = {}
+        hydrogen_isotopes = defaultdict(Counter)
+        for atom_number, isotope in isotopes.items():
+            if atom_number in self.hydrogens:
+                heavy_atom_number = self.hydrogens[atom_number]
+                # hydrogens of heteroatoms are exchangeable and written in a separate sublayer
+                if heavy_atom_number not in self.carbons or isotope not in ('1', '2', '3'):
+                    return None
+                hydrogen_isotopes[heavy_atom_number][isotope] += 1
+            elif atom_number in self.base_masses:
+                shifts[atom_number] = int(isotope) - self.base_masses[atom_number]
+            else:
+                return None
+
+        for heavy_atom_number, counts in hydrogen_isotopes.items():
+            groups = list(counts.values())
+            unlabeled = self.hydrogen_counts[heavy_atom_number] - sum(groups)
+            if unlabeled:
+                groups.append(unlabeled)
+            # all hydrogens become different, e.g. CHD or CHDT, and atom can become stereocenter
+            if len(groups) > 1 and max(groups) == 1:
+                return None
+
+        labels = {}
+        for atom_number in set(shifts) | set(hydrogen_isotopes):
+            counts = hydrogen_isotopes.get(atom_number, {})
+            labels[atom_number] = (shifts.get(atom_number), tuple(counts.get(isotope, 0)
+                                                                   for isotope, _ in HYDROGEN_ISOTOPES))
+
+        # labeling that distinguishes equivalent atoms can change canonical numbering and stereochemistry
+        for equivalence_class in self.equivalence_classes:
+            if len({labels.get(atom_number) for atom_number in equivalence_class}) > 1:
+                return None
+
+        if not labels:
+            return self.base_inchi
+
+        atoms = []
+        for atom_number in sorted(labels, key=self.canonical_numbers.__getitem__):
+            shift, counts = labels[atom_number]
+            atom = '{}'.format(self.canonical_numbers[atom_number])
+            if shift is not None:
+                atom += '{:+d}'.format(shift)
+            for (_, symbol), count in zip(HYDROGEN_ISOTOPES, counts):
+                if count:
+                    atom += symbol if count == 1 else '{}{}'.format(symbol, count)
+            atoms.append(atom)
+        return '{}/i{}'.format(self.base_inchi, ','.join(atoms))
+
+
+def convert_with_auxinfo(ctfile_str):
+    """Convert ``Molfile`` string into ``InChI`` and ``AuxInfo``.
+
+    :param str ctfile_str: ``Molfile`` string.
+    :return: Tuple of ``InChI`` and ``AuxInfo`` strings, empty strings if ``Molfile`` cannot be converted.
+    :rtype: :py:class:`tuple`
+    """
+    auxinfo_cache = cache.get_cache('auxinfo')
+    options = {'auxinfo': '-xa'}
+
+    key = None
+    result = None
+    if auxinfo_cache is not None:
+        key = cache.create_key(cache.normalize_ctfile_str(ctfile_str), **options)
+        result = auxinfo_cache.get(key)
+
+    if result is None:
+        result = openbabel.convert_str(input_str=ctfile_str, input_format='mol', output_format='inchi', **options)
+        if auxinfo_cache is not None and 'AuxInfo=' in result:
+            auxinfo_cache.set(key, result)
+
+    inchi = ''
+    auxinfo = ''
+    for line in result.splitlines():
+        line = line.strip()
+        if line.startswith('InChI='):
+            inchi = line.split()[0]
+        elif line.startswith('AuxInfo='):
+            auxinfo = line.split()[0]
+    return inchi, auxinfo
+
+
+def create_inchis(template, isotopes, chunk_size=500, engine='obabel', sample_size=None):
+    """Create ``InChI`` of labeling schemas of ``Molfile``.
+
+    :param template: Template of ``Molfile``.
+    :type template: :class:`~isoenum.fileio.MolfileTemplate`
+    :param list isotopes: List of atom number to isotope dictionaries, one per labeling schema.
+    :param int chunk_size: Number of labeling schemas converted into ``InChI`` per Open Babel call.
+    :param str engine: ``InChI`` engine: "obabel" converts every labeling schema with Open Babel,
+                       "synthesize" synthesizes isotopic layer where possible, "verify" also compares
+                       a sample of synthesized ``InChI`` with Open Babel and uses Open Babel for all
+                       labeling schemas if they differ.
+    :param int sample_size: Number of synthesized ``InChI`` compared with Open Babel by "verify" engine,
+                            :data:`~isoenum.conf.inchi_verify_sample` if not provided.
+    :return: List of ``InChI`` strings in the same order as labeling schemas.
+    :rtype: :py:class:`list`
+    """
+    if engine not in ENGINES:
+        raise ValueError('Unknown InChI engine: "{}". Available engines are: {}'.format(engine, ', '.join(ENGINES)))
+
+    if sample_size is None:
+        sample_size = conf.inchi_verify_sample
+
+    inchis = [None] * len(isotopes)
+    if engine != 'obabel':
+        synthesizer = IsotopicLayerSynthesizer(template)
+        inchis = [synthesizer.synthesize(labeling_schema_isotopes) for labeling_schema_isotopes in isotopes]
+
+    if engine == 'verify':
+        sample = [index for index, inchi in enumerate(inchis) if inchi is not None][:sample_size]
+        expected = _convert(template, [isotopes[index] for index in sample], chunk_size)
+        for index, inchi in zip(sample, expected):
+            if inchis[index] != inchi:
+                logger.warning('WARNING: Synthesized "InChI" differs from Open Babel "InChI": '
+                               '{} != {}, using Open Babel.'.format(inchis[index], inchi))
+                inchis = [None] * len(isotopes)
+                break
+
+    remaining = [index for index, inchi in enumerate(inchis) if inchi is None]
+    for index, inchi in zip(remaining, _convert(template, [isotopes[index] for index in remaining], chunk_size)):
+        inchis[index] = inchi
+    return inchis
+
+
+def _convert(template, isotopes, chunk_size=500):
+    """Convert labeling schemas of ``Molfile`` into ``InChI`` with Open Babel.
+
+    :param template: Template of ``Molfile``.
+    :type template: :class:`~isoenum.fileio.MolfileTemplate`
+    :param list isotopes: List of atom number to isotope dictionaries, one per labeling schema.
+    :param int chunk_size: Number of labeling schemas converted into ``InChI`` per Open Babel call.
+    :return: List of ``InChI`` strings in the same order as labeling schemas.
+    :rtype: :py:class:`list`
+    """
+    ctfile_strs = [template.render(labeling_schema_isotopes) for labeling_schema_isotopes in isotopes]
+    return fileio.create_inchis_from_ctfile_strs(ctfile_strs, charged=[template.charged] * len(ctfile_strs),
+                                                 chunk_size=chunk_size)
+
+
+def _read_connection_table(prefix):
+    """Read atom symbols and neighbors from text of ``Molfile`` before its properties block.
+
+    :param str prefix: Header, counts line, atom block and bond block of ``Molfile``.
+    :return: Tuple of atom number to symbol and atom number to list of neighbor atom numbers mappings.
+    :rtype: :py:class:`tuple`
+    """
+    lines = prefix.splitlines()
+    atom_count = int(lines[3][0:3])
+    bond_count = int(lines[3][3:6])
+
+    symbols = {}
+    neighbors = defaultdict(list)
+    for atom_number, line in enumerate(lines[4:4 + atom_count], start=1):
+        symbols['{}'.format(atom_number)] = line[31:34].strip()
+
+    for line in lines[4 + atom_count:4 + atom_count + bond_count]:
+        first_atom_number = '{}'.format(int(line[0:3]))
+        second_atom_number = '{}'.format(int(line[3:6]))
+        neighbors[first_atom_number].append(second_atom_number)
+        neighbors[second_atom_number].append(first_atom_number)
+    return symbols, neighbors
+
+
+def _base_mass(symbol):
+    """Mass number ``InChI`` isotopic shifts are relative to, i.e. rounded average atomic mass of element.
+
+    :param str symbol: Element symbol.
+    :return: Mass number.
+    :rtype: :py:class:`int`
+    """
+    element = isotopes_conf[symbol]
+    return int(round(sum(element['masses'][isotope] * element['abundances'][isotope]
+                         for isotope in element['isotopes'])))
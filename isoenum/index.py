@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+isoenum.index
+~~~~~~~~~~~~~
+
+This module provides byte offset index of ``SDfile`` records, so that single
+records or subsets of records can be read without parsing the whole file.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import re
+
+
+INDEX_VERSION = 1
+
+
+class SDfileIndex(object):
+    """Byte offsets of ``SDfile`` records and values of their identifier data items."""
+
+    def __init__(self, path, offsets, ids, id_field='ID'):
+        """SDfile index initializer.
+
+        :param str path: Path to ``SDfile``.
+        :param list offsets: List of (start, end) byte offsets of every record.
+        :param dict ids: Identifier data item value to record numbers mapping.
+        :param str id_field: Name of data item (e.g. ``> <ID>``) used as record identifier.
+        """
+        self.path = path
+        self.offsets = offsets
+        self.ids = ids
+        self.id_field = id_field
+
+    def __len__(self):
+        """Number of records."""
+        return len(self.offsets)
+
+    @classmethod
+    def build(cls, path, id_field='ID'):
+        """Build index by scanning memory-mapped ``SDfile``.
+
+        :param str path: Path to ``SDfile``.
+        :param str id_field: Name of data item used as record identifier.
+        :return: SDfile index.
+        :rtype: :class:`~isoenum.index.SDfileIndex`
+        """
+        offsets = []
+        ids = {}
+
+        if os.path.getsize(path) == 0:
+            return cls(path=path, offsets=offsets, ids=ids, id_field=id_field)
+
+        with open(path, 'rb') as infile:
+            mm = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                start = 0
+                for match in re.finditer(br'^\$\$\$\$[^\n]*(\n|$)', mm, re.M):
+                    offsets.append((start, match.start()))
+                    start = match.end()
+
+                if mm[start:].strip():
+                    offsets.append((start, len(mm)))
+
+                starts = [record_start for record_start, _ in offsets]
+                field_pattern = br'^>[^\n]*<' + re.escape(id_field.encode('utf-8')) + br'>[^\n]*\n([^\n]*)'
+                for match in re.finditer(field_pattern, mm, re.M):
+                    record_number = bisect.bisect_right(starts, match.start())
+                    value = match.group(1).decode('utf-8').strip()
+                    ids.setdefault(value, []).append(record_number)
+            finally:
+                mm.close()
+
+        return cls(path=path, offsets=offsets, ids=ids, id_field=id_field)
+
+    @classmethod
+    def load(cls, path, id_field='ID', sidecar_path=None, persist=True):
+        """Load index from sidecar file if it is up to date, build it otherwise.
+
+        :param str path: Path to ``SDfile``.
+        :param str id_field: Name of data item used as record identifier.
+        :param str sidecar_path: Path to sidecar file, "<path>.idx" by default.
+        :param persist: Save built index into sidecar file or not.
+        :type persist: :py:obj:`True` or :py:obj:`False`
+        :return: SDfile index.
+        :rtype: :class:`~isoenum.index.SDfileIndex`
+        """
+        if sidecar_path is None:
+            sidecar_path = '{}.idx'.format(path)
+
+        stat = os.stat(path)
+        signature = {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime, 'id_field': id_field}
+
+        try:
+            with open(sidecar_path, 'r') as infile:
+                sidecar = json.load(infile)
+            if sidecar['signature'] == signature:
+                return cls(path=path, offsets=[tuple(offset) for offset in sidecar['offsets']],
+                           ids=sidecar['ids'], id_field=id_field)
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+
+        index = cls.build(path=path, id_field=id_field)
+
+        if persist:
+            try:
+                with open(sidecar_path, 'w') as outfile:
+                    json.dump({'signature': signature, 'offsets': index.offsets, 'ids': index.ids}, outfile)
+            except (IOError, OSError):
+                pass
+
+        return index
+
+    def resolve(self, records=None, ids=None):
+        """Resolve record numbers and identifiers into sorted list of record numbers.
+
+        :param list records: List of 1-based record numbers.
+        :param list ids: List of record identifiers.
+        :return: Sorted list of 1-based record numbers.
+        :rtype: :py:class:`list`
+        """
+        record_numbers = set()
+
+        for record_number in records or []:
+            if not 1 <= record_number <= len(self.offsets):
+                raise ValueError('Record "{}" is out of range, "{}" contains {} record(s).'.format(
+                    record_number, self.path, len(self.offsets)))
+            record_numbers.add(record_number)
+
+        for record_id in ids or []:
+            if record_id not in self.ids:
+                raise ValueError('Record with "{}" value "{}" not found in "{}".'.format(
+                    self.id_field, record_id, self.path))
+            record_numbers.update(self.ids[record_id])
+
+        return sorted(record_numbers)
+
+    def read_records(self, record_numbers):
+        """Read record strings without reading the rest of the file.
+
+        :param list record_numbers: List of 1-based record numbers.
+        :return: Generator of record strings.
+        :rtype: :py:class:`types.GeneratorType`
+        """
+        with open(self.path, 'rb') as infile:
+            mm = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for record_number in record_numbers:
+                    start, end = self.offsets[record_number - 1]
+                    yield mm[start:end].decode('utf-8')
+            finally:
+                mm.close()
+
+
+def parse_record_ranges(ranges_str):
+    """Parse record ranges string, e.g. "1-10,15", into list of record numbers.
+
+    :param str ranges_str: Comma-separated record numbers or inclusive ranges.
+    :return: List of 1-based record numbers.
+    :rtype: :py:class:`list`
+    """
+    record_numbers = []
+    for range_str in ranges_str.split(','):
+        try:
+            if '-' in range_str:
+                first, last = range_str.split('-')
+                record_numbers.extend(range(int(first), int(last) + 1))
+            else:
+                record_numbers.append(int(range_str))
+        except ValueError:
+            raise ValueError('Incorrect record range "{}", use "first-last" or "number" format.'.format(range_str))
+    return record_numbers
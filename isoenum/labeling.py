@@ -10,9 +10,24 @@ This module contains a function to generate a labeling schema
 based on provided cli parameters.
 """
 
+import heapq
 import itertools
+import math
+from array import array
 from collections import defaultdict
 from collections import Counter
+from collections import OrderedDict
+
+import more_itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# maximum number of isotope codes (rows times free atoms) per element kept by NumPy labeling engine
+NUMPY_ENGINE_MAX_CELLS = 10 ** 7
 
 
 def create_labeling_schema(complete_labeling_schema, ignore_existing_isotopes,
@@ -32,9 +47,798 @@ def create_labeling_schema(complete_labeling_schema, ignore_existing_isotopes,
     :return: Labeling schema.
     :rtype: :py:class:`list`
     """
-    allowed_atom_symbols = [atom.atom_symbol for atom in ctfile.atoms]
-    positions = [atom.atom_number for atom in ctfile.atoms]
-    ctfile_position_atom = dict(zip(positions, allowed_atom_symbols))
+    labeling_schemas = iter_labeling_schemas(complete_labeling_schema=complete_labeling_schema,
+                                             ignore_existing_isotopes=ignore_existing_isotopes,
+                                             all_iso=all_iso, specific_iso=specific_iso,
+                                             existing_iso=existing_iso, enumerate_iso=enumerate_iso,
+                                             isotopes_conf=isotopes_conf, ctfile=ctfile)
+    for labeling_schema in labeling_schemas:
+        yield labeling_schema.to_list()
+
+
+def iter_labeling_schemas(complete_labeling_schema, ignore_existing_isotopes,
+                          all_iso, specific_iso, existing_iso, enumerate_iso,
+                          isotopes_conf, ctfile, offset=0, limit=None):
+    """Generate labeling schemas as compact isotope code vectors that share single
+    atom table per ``Molfile``, see :func:`~isoenum.labeling.create_labeling_schema`.
+
+    Labeling schemas are generated in deterministic order and every labeling schema
+    has rank, i.e. its 0-based position in this order. Generation starts directly at
+    ``offset`` rank without creating labeling schemas of lower rank.
+
+    :param bool complete_labeling_schema: Specifies if default isotopes to be added to isotopic layer.
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :param dict isotopes_conf: Default isotopes.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :param int offset: Rank of the first labeling schema.
+    :param int limit: Maximum number of labeling schemas, all remaining labeling schemas if not provided.
+    :return: Generator of labeling schemas.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    atom_table = AtomTable(ctfile=ctfile, isotopes_conf=isotopes_conf)
+    starting_iso = _starting_isotopes(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                      specific_iso=specific_iso, existing_iso=existing_iso)
+
+    base_codes = atom_table.create_codes(starting_iso=starting_iso, complete=complete_labeling_schema)
+
+    if not enumerate_iso:
+        if offset == 0 and limit != 0:
+            yield LabelingSchema(atom_table=atom_table, codes=base_codes)
+        return
+
+    element_plans = _element_plans(atom_table=atom_table, starting_iso=starting_iso, enumerate_iso=enumerate_iso)
+    start = offset + _empty_schema_count(base_codes=base_codes, element_plans=element_plans)
+    filled_codes = _fill_codes(codes=array('H', base_codes), base_codes=base_codes, element_plans=element_plans,
+                               start=start)
+    for codes in itertools.islice(filled_codes, limit):
+        yield LabelingSchema(atom_table=atom_table, codes=array('H', codes))
+
+
+def get_labeling_schema(rank, complete_labeling_schema, ignore_existing_isotopes,
+                        all_iso, specific_iso, existing_iso, enumerate_iso,
+                        isotopes_conf, ctfile):
+    """Create labeling schema of given rank directly from its rank,
+    see :func:`~isoenum.labeling.iter_labeling_schemas`.
+
+    :param int rank: Rank of labeling schema.
+    :param bool complete_labeling_schema: Specifies if default isotopes to be added to isotopic layer.
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :param dict isotopes_conf: Default isotopes.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :return: Labeling schema.
+    :rtype: :class:`~isoenum.labeling.LabelingSchema`
+    """
+    labeling_schemas = iter_labeling_schemas(complete_labeling_schema=complete_labeling_schema,
+                                             ignore_existing_isotopes=ignore_existing_isotopes,
+                                             all_iso=all_iso, specific_iso=specific_iso,
+                                             existing_iso=existing_iso, enumerate_iso=enumerate_iso,
+                                             isotopes_conf=isotopes_conf, ctfile=ctfile, offset=rank, limit=1)
+    for labeling_schema in labeling_schemas:
+        return labeling_schema
+    raise IndexError('Labeling schema rank "{}" is out of range.'.format(rank))
+
+
+def iter_labeling_schema_blocks(complete_labeling_schema, ignore_existing_isotopes,
+                                all_iso, specific_iso, existing_iso, enumerate_iso,
+                                isotopes_conf, ctfile, block_size=500, engine='auto', offset=0, limit=None):
+    """Generate labeling schemas in blocks of isotope code matrices, rows are labeling schemas
+    and columns are atoms, see :func:`~isoenum.labeling.create_labeling_schema`.
+
+    NumPy engine creates every block with array operations and generates labeling schemas
+    in the same order as pure Python engine. It falls back to pure Python engine if isotope
+    codes of enumerated element do not fit in memory, "auto" engine also if NumPy is not installed.
+
+    :param bool complete_labeling_schema: Specifies if default isotopes to be added to isotopic layer.
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :param dict isotopes_conf: Default isotopes.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :param int block_size: Maximum number of labeling schemas per block.
+    :param str engine: Labeling engine: "auto", "python" or "numpy", "auto" uses NumPy if it is installed.
+    :param int offset: Rank of the first labeling schema, see :func:`~isoenum.labeling.iter_labeling_schemas`.
+    :param int limit: Maximum number of labeling schemas, all remaining labeling schemas if not provided.
+    :return: Generator of labeling schema blocks.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if engine not in ('auto', 'python', 'numpy'):
+        raise ValueError('Unknown labeling engine: "{}". Available engines are: auto, numpy, python'.format(engine))
+
+    if engine == 'numpy' and numpy is None:
+        raise ValueError('Labeling engine "numpy" requires NumPy, install numpy or use "auto" or "python" engine.')
+
+    if engine != 'python' and numpy is not None and enumerate_iso:
+        atom_table = AtomTable(ctfile=ctfile, isotopes_conf=isotopes_conf)
+        starting_iso = _starting_isotopes(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                          specific_iso=specific_iso, existing_iso=existing_iso)
+        base_codes = atom_table.create_codes(starting_iso=starting_iso, complete=complete_labeling_schema)
+        element_plans = _element_plans(atom_table=atom_table, starting_iso=starting_iso,
+                                       enumerate_iso=enumerate_iso)
+
+        element_matrices = _element_code_matrices(base_codes=base_codes, element_plans=element_plans)
+        if element_matrices is not None:
+            empty_count = _empty_schema_count(base_codes=base_codes, element_plans=element_plans)
+            start = offset + empty_count
+            stop = None if limit is None else start + limit
+            code_blocks = _numpy_code_blocks(base_codes=base_codes, element_matrices=element_matrices,
+                                             block_size=block_size, start=start, stop=stop)
+            for block_start, codes in code_blocks:
+                yield LabelingSchemaBlock(atom_table=atom_table, codes=codes, start=block_start - empty_count)
+            return
+
+    labeling_schemas = iter_labeling_schemas(complete_labeling_schema=complete_labeling_schema,
+                                             ignore_existing_isotopes=ignore_existing_isotopes,
+                                             all_iso=all_iso, specific_iso=specific_iso,
+                                             existing_iso=existing_iso, enumerate_iso=enumerate_iso,
+                                             isotopes_conf=isotopes_conf, ctfile=ctfile, offset=offset, limit=limit)
+    block_start = offset
+    for labeling_schemas_chunk in more_itertools.chunked(labeling_schemas, block_size):
+        yield LabelingSchemaBlock(atom_table=labeling_schemas_chunk[0].atom_table,
+                                  codes=[labeling_schema.codes for labeling_schema in labeling_schemas_chunk],
+                                  start=block_start)
+        block_start += len(labeling_schemas_chunk)
+
+
+class AtomTable(object):
+    """Atom numbers, atom symbols and isotope codes of ``Molfile`` shared by all of its labeling schemas."""
+
+    def __init__(self, ctfile, isotopes_conf):
+        """Atom table initializer.
+
+        :param ctfile: Instance of ``Molfile``.
+        :type ctfile: :class:`~ctfile.ctfile.Molfile`
+        :param dict isotopes_conf: Default isotopes.
+        """
+        atoms = sorted(ctfile.atoms, key=lambda atom: int(atom.atom_number))
+        self.positions = [atom.atom_number for atom in atoms]
+        self.symbols = [atom.atom_symbol for atom in atoms]
+        self.index_by_position = {position: index for index, position in enumerate(self.positions)}
+        self.element_indices = defaultdict(list)
+        for index, symbol in enumerate(self.symbols):
+            self.element_indices[symbol].append(index)
+
+        # code 0 designates that isotope is not specified
+        self.isotopes = ['']
+        self._codes = {'': 0}
+        self.default_codes = array('H', (self.code(isotopes_conf.get(symbol, {}).get('default', ''))
+                                         for symbol in self.symbols))
+
+    def __len__(self):
+        """Number of atoms."""
+        return len(self.positions)
+
+    def code(self, isotope):
+        """Get code of isotope, new isotopes get the next available code.
+
+        :param str isotope: Isotope, e.g. "13".
+        :return: Isotope code.
+        :rtype: :py:class:`int`
+        """
+        if isotope not in self._codes:
+            self._codes[isotope] = len(self.isotopes)
+            self.isotopes.append(isotope)
+        return self._codes[isotope]
+
+    def create_codes(self, starting_iso, complete=False):
+        """Create isotope code vector from atom number specific isotopes.
+
+        :param dict starting_iso: Atom number specific isotopes.
+        :param complete: Use default isotope for atoms without isotope or not.
+        :type complete: :py:obj:`True` or :py:obj:`False`
+        :return: Isotope code vector.
+        :rtype: :py:class:`array.array`
+        """
+        codes = array('H', self.default_codes) if complete else array('H', [0]) * len(self.positions)
+        for position, entry in starting_iso.items():
+            codes[self.index_by_position[position]] = self.code(entry['isotope'])
+        return codes
+
+
+class LabelingSchema(object):
+    """Labeling schema stored as isotope code per atom, see :class:`~isoenum.labeling.AtomTable`."""
+
+    __slots__ = ('atom_table', 'codes')
+
+    def __init__(self, atom_table, codes):
+        """Labeling schema initializer.
+
+        :param atom_table: Atom table of ``Molfile``.
+        :type atom_table: :class:`~isoenum.labeling.AtomTable`
+        :param codes: Isotope code per atom in atom table order.
+        :type codes: :py:class:`array.array`
+        """
+        self.atom_table = atom_table
+        self.codes = codes
+
+    def isotopes_by_position(self):
+        """Atom number to isotope mapping for atoms with specified isotope.
+
+        :return: Atom number to isotope mapping.
+        :rtype: :py:class:`dict`
+        """
+        positions = self.atom_table.positions
+        isotopes = self.atom_table.isotopes
+        return {positions[index]: isotopes[code] for index, code in enumerate(self.codes) if code}
+
+    def to_list(self):
+        """Convert into list of atom number specific isotope dictionaries ordered by atom number.
+
+        :return: Labeling schema.
+        :rtype: :py:class:`list`
+        """
+        positions = self.atom_table.positions
+        symbols = self.atom_table.symbols
+        isotopes = self.atom_table.isotopes
+        return [{'atom_symbol': symbols[index], 'isotope': isotopes[code], 'atom_number': positions[index]}
+                for index, code in enumerate(self.codes) if code]
+
+
+class LabelingSchemaBlock(object):
+    """Block of labeling schemas stored as isotope code matrix, rows are labeling schemas
+    and columns are atoms in atom table order."""
+
+    __slots__ = ('atom_table', 'codes', 'start')
+
+    def __init__(self, atom_table, codes, start=0):
+        """Labeling schema block initializer.
+
+        :param atom_table: Atom table of ``Molfile``.
+        :type atom_table: :class:`~isoenum.labeling.AtomTable`
+        :param codes: Two-dimensional :class:`numpy.ndarray` or list of :py:class:`array.array` isotope codes.
+        :param int start: Rank of the first labeling schema in block.
+        """
+        self.atom_table = atom_table
+        self.codes = codes
+        self.start = start
+
+    def __len__(self):
+        """Number of labeling schemas."""
+        return len(self.codes)
+
+    @property
+    def stop(self):
+        """Rank following the last labeling schema in block."""
+        return self.start + len(self.codes)
+
+    def __iter__(self):
+        """Iterate over labeling schemas.
+
+        :return: Generator of labeling schemas.
+        :rtype: :py:class:`types.GeneratorType`
+        """
+        rows = self.codes.tolist() if numpy is not None and isinstance(self.codes, numpy.ndarray) else self.codes
+        for codes in rows:
+            yield LabelingSchema(atom_table=self.atom_table, codes=array('H', codes))
+
+
+def count_labeling_schema(complete_labeling_schema, ignore_existing_isotopes,
+                          all_iso, specific_iso, existing_iso, enumerate_iso,
+                          isotopes_conf, ctfile):
+    """Count labeling schemas created by :func:`~isoenum.labeling.create_labeling_schema`
+    without creating them.
+
+    :param bool complete_labeling_schema: Specifies if default isotopes to be added to isotopic layer.
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :param dict isotopes_conf: Default isotopes.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :return: Number of labeling schemas.
+    :rtype: :py:class:`int`
+    """
+    if not enumerate_iso:
+        return 1
+
+    atom_table = AtomTable(ctfile=ctfile, isotopes_conf=isotopes_conf)
+    starting_iso = _starting_isotopes(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                      specific_iso=specific_iso, existing_iso=existing_iso)
+    base_codes = atom_table.create_codes(starting_iso=starting_iso, complete=complete_labeling_schema)
+    element_plans = _element_plans(atom_table=atom_table, starting_iso=starting_iso, enumerate_iso=enumerate_iso)
+
+    count = 1
+    for free_indices, _, count_vectors in element_plans:
+        count *= _element_size(free_count=len(free_indices), count_vectors=count_vectors)
+
+    # labeling schema without any isotope is not created
+    return count - _empty_schema_count(base_codes=base_codes, element_plans=element_plans)
+
+
+def create_unique_labeling_schema(complete_labeling_schema, ignore_existing_isotopes,
+                                  all_iso, specific_iso, existing_iso, enumerate_iso,
+                                  isotopes_conf, ctfile):
+    """Create labeling schema keeping a single representative of labeling schemas that
+    are equivalent under symmetry of molecular graph.
+
+    :param bool complete_labeling_schema: Specifies if default isotopes to be added to isotopic layer.
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :param dict isotopes_conf: Default isotopes.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :return: Generator of (labeling schema, multiplicity) tuples, where multiplicity is
+             the number of equivalent labeling schemas represented by labeling schema.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    labeling_schemas = iter_unique_labeling_schemas(complete_labeling_schema=complete_labeling_schema,
+                                                    ignore_existing_isotopes=ignore_existing_isotopes,
+                                                    all_iso=all_iso, specific_iso=specific_iso,
+                                                    existing_iso=existing_iso, enumerate_iso=enumerate_iso,
+                                                    isotopes_conf=isotopes_conf, ctfile=ctfile)
+    for labeling_schema, multiplicity in labeling_schemas:
+        yield labeling_schema.to_list(), multiplicity
+
+
+def iter_unique_labeling_schemas(complete_labeling_schema, ignore_existing_isotopes,
+                                 all_iso, specific_iso, existing_iso, enumerate_iso,
+                                 isotopes_conf, ctfile, offset=0, limit=None):
+    """Generate representative labeling schemas as compact isotope code vectors,
+    see :func:`~isoenum.labeling.create_unique_labeling_schema`.
+
+    Representatives are generated in rank order of :func:`~isoenum.labeling.iter_labeling_schemas`.
+    Without offset and limit, isotope codes are filled atom group by atom group and partial
+    labeling schemas that cannot be completed into a representative are pruned, so labeling
+    schemas that are not representatives are mostly never created. With offset or limit,
+    every labeling schema of rank window is created and checked.
+
+    :param bool complete_labeling_schema: Specifies if default isotopes to be added to isotopic layer.
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :param dict isotopes_conf: Default isotopes.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :param int offset: Rank of the first labeling schema checked, see :func:`~isoenum.labeling.iter_labeling_schemas`.
+    :param int limit: Maximum number of labeling schemas checked, all remaining labeling schemas if not provided.
+    :return: Generator of (labeling schema, multiplicity) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    symmetry_group = create_symmetry_group(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                           specific_iso=specific_iso, existing_iso=existing_iso, ctfile=ctfile)
+
+    if offset or limit is not None or not enumerate_iso:
+        labeling_schemas = iter_labeling_schemas(complete_labeling_schema=complete_labeling_schema,
+                                                 ignore_existing_isotopes=ignore_existing_isotopes,
+                                                 all_iso=all_iso, specific_iso=specific_iso,
+                                                 existing_iso=existing_iso, enumerate_iso=enumerate_iso,
+                                                 isotopes_conf=isotopes_conf, ctfile=ctfile, offset=offset,
+                                                 limit=limit)
+    else:
+        atom_table = AtomTable(ctfile=ctfile, isotopes_conf=isotopes_conf)
+        starting_iso = _starting_isotopes(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                          specific_iso=specific_iso, existing_iso=existing_iso)
+        base_codes = atom_table.create_codes(starting_iso=starting_iso, complete=complete_labeling_schema)
+        element_plans = _element_plans(atom_table=atom_table, starting_iso=starting_iso, enumerate_iso=enumerate_iso)
+
+        decided = [True] * len(atom_table)
+        for free_indices, _, _ in element_plans:
+            for index in free_indices:
+                decided[index] = False
+
+        filled_codes = _fill_unique_codes(codes=array('H', base_codes), base_codes=base_codes,
+                                          element_plans=element_plans, decided=decided,
+                                          pruned=_symmetry_pruning(symmetry_group=symmetry_group,
+                                                                   atom_table=atom_table))
+        labeling_schemas = (LabelingSchema(atom_table=atom_table, codes=array('H', codes))
+                            for codes in filled_codes if any(codes))
+
+    for labeling_schema in labeling_schemas:
+        multiplicity = symmetry_group.multiplicity(labeling_schema)
+        if multiplicity:
+            yield labeling_schema, multiplicity
+
+
+def iter_probable_labeling_schemas(complete_labeling_schema, ignore_existing_isotopes,
+                                   all_iso, specific_iso, existing_iso, enumerate_iso,
+                                   isotopes_conf, ctfile, enrichment=None, min_probability=None,
+                                   cumulative_probability=None, top=None):
+    """Generate labeling schemas in descending order of probability and stop at probability cutoff.
+
+    Every atom of enumerated element independently has an isotope with probability equal to isotope
+    abundance, so probability of labeling schema is the product of abundances of enumerated isotopes
+    and probabilities that the remaining free atoms have none of the enumerated isotopes. All assignments
+    of the same isotope counts have the same probability, so isotope count vectors are visited best-first
+    and labeling schemas of less probable isotope counts are never created. Labeling schemas with zero
+    probability are not generated.
+
+    :param bool complete_labeling_schema: Specifies if default isotopes to be added to isotopic layer.
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :param dict isotopes_conf: Default isotopes and natural abundances.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :param dict enrichment: Element to isotope to abundance mapping that overrides natural abundances.
+    :param float min_probability: Stop before the first labeling schema with lower probability.
+    :param float cumulative_probability: Stop after labeling schemas that account for given fraction
+                                         of total probability of all labeling schemas.
+    :param int top: Stop after given number of labeling schemas.
+    :return: Generator of (labeling schema, probability) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    atom_table = AtomTable(ctfile=ctfile, isotopes_conf=isotopes_conf)
+    starting_iso = _starting_isotopes(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                      specific_iso=specific_iso, existing_iso=existing_iso)
+    base_codes = atom_table.create_codes(starting_iso=starting_iso, complete=complete_labeling_schema)
+
+    if not enumerate_iso:
+        if top != 0:
+            yield LabelingSchema(atom_table=atom_table, codes=base_codes), 1.0
+        return
+
+    abundances = isotope_abundances(isotopes_conf=isotopes_conf, enrichment=enrichment)
+    element_plans = _element_plans(atom_table=atom_table, starting_iso=starting_iso, enumerate_iso=enumerate_iso)
+    bounds = _enumeration_bounds(enumerate_iso=enumerate_iso)
+
+    # count vectors of every element sorted by descending log-probability of single assignment
+    element_groups = []
+    for (free_indices, _, count_vectors), (atom, isotope_bounds) in zip(element_plans, bounds.items()):
+        isotope_probabilities = [abundances.get(atom, {}).get(isotope, 0.0) for isotope in isotope_bounds]
+        other_probability = max(1.0 - sum(isotope_probabilities), 0.0)
+        groups = []
+        for counts in count_vectors:
+            log_probability = _log_power(other_probability, len(free_indices) - sum(counts))
+            for probability, count in zip(isotope_probabilities, counts):
+                log_probability += _log_power(probability, count)
+            groups.append((log_probability, counts))
+        groups.sort(key=lambda group: -group[0])
+        element_groups.append(groups)
+
+    if not all(element_groups):
+        return
+
+    empty_probability = 0.0
+    if _empty_schema_count(base_codes=base_codes, element_plans=element_plans):
+        empty_probability = math.exp(sum(_group_log_probability(groups, counts=tuple([0] * len(groups[0][1])))
+                                         for groups in element_groups))
+    total_probability = 1.0
+    for (free_indices, _, _), groups in zip(element_plans, element_groups):
+        total_probability *= sum(math.exp(log_probability) *
+                                 _multinomial(tuple(counts) + (len(free_indices) - sum(counts),))
+                                 for log_probability, counts in groups)
+    total_probability -= empty_probability
+
+    generated = 0
+    accumulated = 0.0
+    for log_probability, group_indices in _best_first_products(element_groups):
+        probability = math.exp(log_probability)
+        if probability == 0.0 or (min_probability is not None and probability < min_probability):
+            return
+
+        group_plans = [(free_indices, isotope_codes, [groups[group_index][1]])
+                       for (free_indices, isotope_codes, _), groups, group_index
+                       in zip(element_plans, element_groups, group_indices)]
+        for codes in _fill_codes(codes=array('H', base_codes), base_codes=base_codes, element_plans=group_plans):
+            if not any(codes):
+                continue
+            if top is not None and generated >= top:
+                return
+            if cumulative_probability is not None and accumulated >= cumulative_probability * total_probability:
+                return
+
+            yield LabelingSchema(atom_table=atom_table, codes=array('H', codes)), probability
+            generated += 1
+            accumulated += probability
+
+
+def isotope_abundances(isotopes_conf, enrichment=None):
+    """Collect isotope abundances of every element, enriched isotopes replace natural abundances
+    and abundances of the remaining isotopes of element are scaled to keep their sum equal to 1.
+
+    :param dict isotopes_conf: Default isotopes and natural abundances.
+    :param dict enrichment: Element to isotope to abundance mapping.
+    :return: Element to isotope to abundance mapping.
+    :rtype: :py:class:`dict`
+    """
+    abundances = {}
+    for atom, atom_conf in isotopes_conf.items():
+        natural = dict(atom_conf.get('abundances', {}))
+        enriched = (enrichment or {}).get(atom, {})
+        if enriched:
+            enriched_total = sum(enriched.values())
+            remaining_total = sum(abundance for isotope, abundance in natural.items() if isotope not in enriched)
+            for isotope in natural:
+                if isotope not in enriched:
+                    natural[isotope] = (natural[isotope] / remaining_total * (1.0 - enriched_total)
+                                        if remaining_total else 0.0)
+            natural.update(enriched)
+        abundances[atom] = natural
+    return abundances
+
+
+def iter_mass_window_labeling_schemas(complete_labeling_schema, ignore_existing_isotopes,
+                                      all_iso, specific_iso, existing_iso, enumerate_iso,
+                                      isotopes_conf, ctfile, mass_windows):
+    """Generate labeling schemas with monoisotopic mass inside any of mass windows in the same
+    order as :func:`~isoenum.labeling.iter_labeling_schemas`.
+
+    Mass of labeling schema is the sum of exact masses of atom isotopes, atoms without isotope
+    have default isotope. Mass shift of every enumerated element depends only on its isotope counts,
+    so isotope counts that cannot reach any mass window with the smallest and the largest mass shifts
+    of the remaining elements are skipped together with all their assignments.
+
+    :param bool complete_labeling_schema: Specifies if default isotopes to be added to isotopic layer.
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :param dict isotopes_conf: Default isotopes and exact masses.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :param list mass_windows: List of (lowest mass, highest mass) tuples.
+    :return: Generator of (labeling schema, mass) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    atom_table = AtomTable(ctfile=ctfile, isotopes_conf=isotopes_conf)
+    starting_iso = _starting_isotopes(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                      specific_iso=specific_iso, existing_iso=existing_iso)
+    base_codes = atom_table.create_codes(starting_iso=starting_iso, complete=complete_labeling_schema)
+
+    base_mass = 0.0
+    for symbol, code, default_code in zip(atom_table.symbols, base_codes, atom_table.default_codes):
+        base_mass += _isotope_mass(isotopes_conf=isotopes_conf, atom=symbol,
+                                   isotope=atom_table.isotopes[code or default_code])
+
+    if not enumerate_iso:
+        if _in_mass_windows(low=base_mass, high=base_mass, mass_windows=mass_windows):
+            yield LabelingSchema(atom_table=atom_table, codes=base_codes), base_mass
+        return
+
+    element_plans = _element_plans(atom_table=atom_table, starting_iso=starting_iso, enumerate_iso=enumerate_iso)
+    if not all(count_vectors for _, _, count_vectors in element_plans):
+        return
+
+    element_shifts = []
+    for atom, isotope_bounds in _enumeration_bounds(enumerate_iso=enumerate_iso).items():
+        default_mass = _isotope_mass(isotopes_conf=isotopes_conf, atom=atom, isotope=isotopes_conf[atom]['default'])
+        element_shifts.append([_isotope_mass(isotopes_conf=isotopes_conf, atom=atom, isotope=isotope) - default_mass
+                               for isotope in isotope_bounds])
+
+    window_plans = []
+    for (free_indices, isotope_codes, count_vectors), isotope_shifts in zip(element_plans, element_shifts):
+        count_shifts = [sum(shift * count for shift, count in zip(isotope_shifts, counts)) for counts in count_vectors]
+        window_plans.append((free_indices, isotope_codes, count_vectors, count_shifts))
+
+    filled_codes = _fill_window_codes(codes=array('H', base_codes), base_codes=base_codes, window_plans=window_plans,
+                                      mass=base_mass, mass_windows=mass_windows)
+    for codes, mass in filled_codes:
+        if any(codes):
+            yield LabelingSchema(atom_table=atom_table, codes=array('H', codes)), mass
+
+
+def create_symmetry_group(ignore_existing_isotopes, all_iso, specific_iso, existing_iso, ctfile, **options):
+    """Create symmetry group of ``Molfile`` that keeps isotopes fixed in every labeling schema.
+
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :param options: Other labeling schema options that do not affect symmetry group.
+    :return: Symmetry group.
+    :rtype: :class:`~isoenum.labeling.SymmetryGroup`
+    """
+    starting_iso = _starting_isotopes(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                      specific_iso=specific_iso, existing_iso=existing_iso)
+    return SymmetryGroup(ctfile=ctfile, fixed_iso=starting_iso)
+
+
+class SymmetryGroup(object):
+    """Automorphism group of molecular graph that preserves atom symbols, charges, isotopes
+    and bond types.
+
+    Hydrogen atoms attached to the same atom are interchangeable, so automorphisms
+    are searched over the remaining atoms only and hydrogen atoms follow their parent atom.
+    Atoms with stereo parity, atoms of stereo bonds and fixed isotopes are never
+    moved to atoms with different stereo or isotope specification.
+    """
+
+    def __init__(self, ctfile, fixed_iso=None):
+        """Symmetry group initializer.
+
+        :param ctfile: Instance of ``Molfile``.
+        :type ctfile: :class:`~ctfile.ctfile.Molfile`
+        :param dict fixed_iso: Atom number specific isotopes that are the same in every labeling schema.
+        """
+        fixed_iso = fixed_iso or {}
+        stereo_positions = {atom.atom_number for atom in ctfile.atoms if atom.atom_stereo_parity not in ('0', '')}
+        for bond in ctfile.bonds:
+            if bond.bond_stereo not in ('0', ''):
+                stereo_positions.update((bond.first_atom.atom_number, bond.second_atom.atom_number))
+
+        atoms = {atom.atom_number: atom for atom in ctfile.atoms}
+        adjacency = defaultdict(dict)
+        for bond in ctfile.bonds:
+            adjacency[bond.first_atom.atom_number][bond.second_atom.atom_number] = bond.bond_type
+            adjacency[bond.second_atom.atom_number][bond.first_atom.atom_number] = bond.bond_type
+
+        self.hydrogen_groups = defaultdict(list)
+        for position, atom in atoms.items():
+            neighbors = list(adjacency[position])
+            if (atom.atom_symbol == 'H' and len(neighbors) == 1 and atoms[neighbors[0]].atom_symbol != 'H'
+                    and position not in stereo_positions and position not in fixed_iso):
+                self.hydrogen_groups[neighbors[0]].append(position)
+
+        for parent in self.hydrogen_groups:
+            self.hydrogen_groups[parent].sort(key=int)
+
+        hydrogen_positions = set(itertools.chain.from_iterable(self.hydrogen_groups.values()))
+        self.positions = sorted((position for position in atoms if position not in hydrogen_positions), key=int)
+        self.parents = sorted(self.hydrogen_groups, key=int)
+
+        colors = {}
+        for position in self.positions:
+            atom = atoms[position]
+            fixed_isotope = fixed_iso[position]['isotope'] if position in fixed_iso else ''
+            colors[position] = (atom.atom_symbol, atom.charge, atom.isotope, fixed_isotope,
+                                len(self.hydrogen_groups.get(position, [])),
+                                position if position in stereo_positions else '')
+
+        heavy_adjacency = {position: {neighbor: bond_type for neighbor, bond_type in adjacency[position].items()
+                                      if neighbor not in hydrogen_positions}
+                           for position in self.positions}
+        self.permutations = _automorphisms(positions=self.positions, colors=colors, adjacency=heavy_adjacency)
+
+    def __len__(self):
+        """Number of automorphisms of atoms that are not interchangeable hydrogen atoms."""
+        return len(self.permutations)
+
+    def _key(self, isotopes, permutation):
+        """Labeling key of labeling mapped by automorphism.
+
+        :param dict isotopes: Atom number to isotope mapping.
+        :param dict permutation: Automorphism.
+        :return: Labeling key.
+        :rtype: :py:class:`tuple`
+        """
+        image = {permutation[position]: position for position in self.positions}
+        return (tuple(isotopes.get(image[position], '') for position in self.positions),
+                tuple(tuple(sorted(isotopes.get(hydrogen, '') for hydrogen in self.hydrogen_groups[image[parent]]))
+                      for parent in self.parents))
+
+    def multiplicity(self, labeling_schema):
+        """Number of labeling schemas equivalent to labeling schema if labeling schema
+        is canonical representative of its equivalence class, zero otherwise.
+
+        :param labeling_schema: Labeling schema.
+        :type labeling_schema: :class:`~isoenum.labeling.LabelingSchema` or :py:class:`list`
+        :return: Multiplicity.
+        :rtype: :py:class:`int`
+        """
+        if isinstance(labeling_schema, LabelingSchema):
+            isotopes = labeling_schema.isotopes_by_position()
+        else:
+            isotopes = {entry['atom_number']: entry['isotope'] for entry in labeling_schema}
+
+        # hydrogen isotopes of canonical representative are sorted within every group of interchangeable hydrogens
+        hydrogen_multiplicity = 1
+        for parent in self.parents:
+            hydrogen_isotopes = [isotopes.get(hydrogen, '') for hydrogen in self.hydrogen_groups[parent]]
+            if hydrogen_isotopes != sorted(hydrogen_isotopes):
+                return 0
+            hydrogen_multiplicity *= _multinomial(Counter(hydrogen_isotopes).values())
+
+        keys = {self._key(isotopes=isotopes, permutation=permutation) for permutation in self.permutations}
+        identity_key = self._key(isotopes=isotopes, permutation={position: position for position in self.positions})
+        if identity_key != min(keys):
+            return 0
+        return len(keys) * hydrogen_multiplicity
+
+
+def _automorphisms(positions, colors, adjacency):
+    """Find all automorphisms of colored graph by backtracking over refined atom colors.
+
+    :param list positions: Atom numbers.
+    :param dict colors: Atom number to initial color mapping.
+    :param dict adjacency: Atom number to neighbor atom number to bond type mapping.
+    :return: List of automorphisms, atom number to atom number mappings.
+    :rtype: :py:class:`list`
+    """
+    # refine colors by colors of neighbors until partition is stable
+    palette = {position: sorted(set(colors.values())).index(colors[position]) for position in positions}
+    while True:
+        signatures = {position: (palette[position], tuple(sorted((bond_type, palette[neighbor])
+                                                                 for neighbor, bond_type in adjacency[position].items())))
+                      for position in positions}
+        ordered_signatures = sorted(set(signatures.values()))
+        refined = {position: ordered_signatures.index(signatures[position]) for position in positions}
+        if len(set(refined.values())) == len(set(palette.values())):
+            break
+        palette = refined
+
+    candidates = defaultdict(list)
+    for position in positions:
+        candidates[palette[position]].append(position)
+
+    # map atoms in breadth-first order, so that every atom is checked against already mapped neighbors
+    order = []
+    for root in sorted(positions, key=lambda position: (len(candidates[palette[position]]), int(position))):
+        if root in order:
+            continue
+        queue = [root]
+        order.append(root)
+        while queue:
+            position = queue.pop(0)
+            for neighbor in sorted(adjacency[position], key=int):
+                if neighbor not in order:
+                    order.append(neighbor)
+                    queue.append(neighbor)
+
+    permutations = []
+    mapping = {}
+    used = set()
+
+    def extend(depth):
+        if depth == len(order):
+            permutations.append(dict(mapping))
+            return
+
+        position = order[depth]
+        for candidate in candidates[palette[position]]:
+            if candidate in used:
+                continue
+            if any(adjacency[position].get(mapped) != adjacency[candidate].get(mapping[mapped]) for mapped in mapping):
+                continue
+            mapping[position] = candidate
+            used.add(candidate)
+            extend(depth + 1)
+            del mapping[position]
+            used.discard(candidate)
+
+    extend(0)
+    return permutations
+
+
+def _multinomial(counts):
+    """Number of distinct arrangements of items with given counts of identical items.
+
+    :param counts: Counts of identical items.
+    :return: Multinomial coefficient.
+    :rtype: :py:class:`int`
+    """
+    result = 1
+    total = 0
+    for count in counts:
+        for index in range(1, count + 1):
+            total += 1
+            result = result * total // index
+    return result
+
+
+def _starting_isotopes(ignore_existing_isotopes, all_iso, specific_iso, existing_iso):
+    """Combine isotopes that are fixed in every labeling schema.
+
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :return: Atom number specific isotopes.
+    :rtype: :py:class:`dict`
+    """
     starting_iso = {}
 
     # first, use all atom specification to create labeling schema
@@ -50,78 +854,611 @@ def create_labeling_schema(complete_labeling_schema, ignore_existing_isotopes,
         if existing_iso:
             starting_iso.update(existing_iso)
 
-    if not enumerate_iso:
-        # add default isotopes if need to create full labeling schema
-        if complete_labeling_schema:
-            default_iso = _default_isotopes(ctfile=ctfile, isotopes_conf=isotopes_conf, current_iso=starting_iso)
-            starting_iso.update(default_iso)
+    return starting_iso
+
+
+def _enumeration_bounds(enumerate_iso):
+    """Collect count bounds per element and isotope from `--enumerate` option,
+    bounds of repeated element and isotope entries are intersected.
+
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :return: Element to isotope to (min, max) bounds mapping.
+    :rtype: :py:class:`collections.OrderedDict`
+    """
+    bounds = OrderedDict()
+    for entry in enumerate_iso:
+        isotope_bounds = bounds.setdefault(entry['atom_symbol'], OrderedDict())
+        min_count, max_count = isotope_bounds.get(entry['isotope'], (entry['min'], entry['max']))
+        isotope_bounds[entry['isotope']] = (max(min_count, entry['min']), min(max_count, entry['max']))
+    return bounds
+
+
+def _isotope_count_vectors(isotope_bounds, free_count, fixed_counts):
+    """Generate numbers of free positions assigned to every isotope of element such that
+    total isotope counts, including fixed positions, are within bounds.
+
+    :param dict isotope_bounds: Isotope to (min, max) bounds mapping.
+    :param int free_count: Number of element positions that are not fixed.
+    :param dict fixed_counts: Isotope to number of fixed positions mapping.
+    :return: Generator of count tuples in the same order as isotopes.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    count_ranges = [range(max(min_count - fixed_counts[isotope], 0),
+                          min(max_count - fixed_counts[isotope], free_count) + 1)
+                    for isotope, (min_count, max_count) in isotope_bounds.items()]
+
+    for counts in itertools.product(*count_ranges):
+        if sum(counts) <= free_count:
+            yield counts
+
+
+def _element_plans(atom_table, starting_iso, enumerate_iso):
+    """Collect free atom indices, isotope codes and isotope count vectors of every enumerated element.
+
+    :param atom_table: Atom table of ``Molfile``.
+    :type atom_table: :class:`~isoenum.labeling.AtomTable`
+    :param dict starting_iso: Atom number specific isotopes that are the same in every labeling schema.
+    :param list enumerate_iso: List of isotopes from `--enumerate` option.
+    :return: List of (free atom indices, isotope codes, count vectors) tuples.
+    :rtype: :py:class:`list`
+    """
+    element_plans = []
+    for atom, isotope_bounds in _enumeration_bounds(enumerate_iso=enumerate_iso).items():
+        fixed_counts = Counter(entry['isotope'] for entry in starting_iso.values() if entry['atom_symbol'] == atom)
+        free_indices = [index for index in atom_table.element_indices[atom]
+                        if atom_table.positions[index] not in starting_iso]
+        count_vectors = list(_isotope_count_vectors(isotope_bounds=isotope_bounds, free_count=len(free_indices),
+                                                    fixed_counts=fixed_counts))
+        isotope_codes = [atom_table.code(isotope) for isotope in isotope_bounds]
+        element_plans.append((free_indices, isotope_codes, count_vectors))
+    return element_plans
 
-        labeling_schema = sorted(starting_iso.values(), key=lambda k: int(k['atom_number']))
-        yield labeling_schema
 
+def _log_power(probability, count):
+    """Logarithm of probability raised to power.
+
+    :param float probability: Probability.
+    :param int count: Exponent.
+    :return: Logarithm, negative infinity for zero probability.
+    :rtype: :py:class:`float`
+    """
+    if count == 0:
+        return 0.0
+    if probability <= 0.0:
+        return float('-inf')
+    return count * math.log(probability)
+
+
+def _group_log_probability(groups, counts):
+    """Find log-probability of count vector among element groups.
+
+    :param list groups: List of (log-probability, count vector) tuples.
+    :param tuple counts: Count vector.
+    :return: Log-probability.
+    :rtype: :py:class:`float`
+    """
+    for log_probability, group_counts in groups:
+        if tuple(group_counts) == counts:
+            return log_probability
+    return float('-inf')
+
+
+def _best_first_products(element_groups):
+    """Generate combinations of one group per element in descending order of sum of log-probabilities.
+
+    :param list element_groups: Per element lists of (log-probability, count vector) tuples
+                                sorted by descending log-probability.
+    :return: Generator of (log-probability, group indices) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    first = tuple([0] * len(element_groups))
+    heap = [(-sum(groups[0][0] for groups in element_groups), first)]
+    visited = {first}
+    while heap:
+        negative_log_probability, group_indices = heapq.heappop(heap)
+        yield -negative_log_probability, group_indices
+
+        for element_index, groups in enumerate(element_groups):
+            if group_indices[element_index] + 1 < len(groups):
+                following = group_indices[:element_index] + (group_indices[element_index] + 1,) + \
+                            group_indices[element_index + 1:]
+                if following not in visited:
+                    visited.add(following)
+                    log_probability = sum(groups[index][0] for groups, index in zip(element_groups, following))
+                    heapq.heappush(heap, (-log_probability, following))
+
+
+def _assign_positions(positions, isotopes, counts, start=0):
+    """Generate all assignments of isotopes to positions with given number of positions per isotope,
+    remaining positions keep unspecified isotope.
+
+    :param list positions: Free element positions.
+    :param list isotopes: Isotopes.
+    :param tuple counts: Number of positions per isotope.
+    :param int start: Number of leading assignments to skip without generating them.
+    :return: Generator of (position, isotope) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if not isotopes:
+        if start == 0:
+            yield ()
+        return
+
+    if start:
+        rest_count = _multinomial(tuple(counts[1:]) + (len(positions) - sum(counts),))
+        first_rank, rest_start = divmod(start, rest_count)
+        first_chosen = _unrank_combination(len(positions), counts[0], first_rank)
+        if first_chosen is None:
+            return
+        combinations = _iter_combinations(len(positions), first_chosen)
     else:
-        isotopes_per_atom = defaultdict(set)
+        rest_start = 0
+        combinations = itertools.combinations(range(len(positions)), counts[0])
 
-        for entry in enumerate_iso:
-            isotopes_per_atom[entry['atom_symbol']].add(entry['isotope'])
-            isotopes_per_atom[entry['atom_symbol']].add(None)  # None designates that isotope is not specified
+    for chosen_indices in combinations:
+        chosen = [positions[index] for index in chosen_indices]
+        chosen_set = set(chosen_indices)
+        remaining = [position for index, position in enumerate(positions) if index not in chosen_set]
+        for assignment in _assign_positions(remaining, isotopes[1:], counts[1:], start=rest_start):
+            yield tuple((position, isotopes[0]) for position in chosen) + assignment
+        rest_start = 0
 
-        list_of_isotopes_per_position = defaultdict(list)
-        for position, atom in ctfile_position_atom.items():
-            list_of_isotopes_per_position[position].extend(isotopes_per_atom.get(atom, [None]))
 
-        for entry in starting_iso.values():
-            list_of_isotopes_per_position[entry['atom_number']] = [entry['isotope']]
+def _unrank_combination(item_count, chosen_count, rank):
+    """Create combination of given rank in lexicographic order of :func:`itertools.combinations`.
 
-        list_of_isotopes_per_position_sorted_by_position = [list_of_isotopes_per_position[iso] for iso in
-                                                            sorted(list_of_isotopes_per_position, key=int)]
+    :param int item_count: Number of items.
+    :param int chosen_count: Number of chosen items.
+    :param int rank: Rank of combination.
+    :return: Tuple of chosen item indices or None if rank is out of range.
+    :rtype: :py:class:`tuple` or :py:obj:`None`
+    """
+    if rank >= _multinomial((chosen_count, item_count - chosen_count)):
+        return None
 
-        labeling_product = itertools.product(*list_of_isotopes_per_position_sorted_by_position)
-        for prod in labeling_product:
-            labeling_schema = {}
+    chosen = []
+    index = 0
+    while len(chosen) < chosen_count:
+        # number of combinations that choose item "index" as the next item
+        following_count = _multinomial((chosen_count - len(chosen) - 1, item_count - index - chosen_count + len(chosen)))
+        if rank < following_count:
+            chosen.append(index)
+        else:
+            rank -= following_count
+        index += 1
+    return tuple(chosen)
 
-            isotopes_per_atom = ['{}-{}'.format(atom, isotope) for atom, isotope in zip(allowed_atom_symbols, prod)]
-            counter = Counter(isotopes_per_atom)
 
-            valid_labeling = [
-                True
-                if entry['min'] <= counter['{}-{}'.format(entry['atom_symbol'], entry['isotope'])] <= entry['max']
-                else False
-                for entry in enumerate_iso
-            ]
+def _iter_combinations(item_count, first):
+    """Generate combinations in lexicographic order of :func:`itertools.combinations`
+    starting from given combination.
 
-            if all(valid_labeling):
-                for atom, isotope, position in zip(allowed_atom_symbols, prod, positions):
-                    if isotope:
-                        labeling_schema[position] = {'atom_symbol': atom, 'isotope': isotope, 'atom_number': position}
+    :param int item_count: Number of items.
+    :param tuple first: First combination.
+    :return: Generator of tuples of chosen item indices.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    chosen = list(first)
+    chosen_count = len(chosen)
+    while True:
+        yield tuple(chosen)
+        for position in reversed(range(chosen_count)):
+            if chosen[position] != position + item_count - chosen_count:
+                break
+        else:
+            return
+        chosen[position] += 1
+        for following in range(position + 1, chosen_count):
+            chosen[following] = chosen[following - 1] + 1
 
-            if complete_labeling_schema:
-                default_iso = _default_isotopes(ctfile=ctfile, isotopes_conf=isotopes_conf, current_iso=labeling_schema)
-                labeling_schema.update(default_iso)
 
-            labeling_schema = sorted(labeling_schema.values(), key=lambda k: int(k['atom_number']))
-            if labeling_schema:
-                yield labeling_schema
+def _element_size(free_count, count_vectors):
+    """Number of assignments of isotopes to free atoms of element.
 
+    :param int free_count: Number of free atoms of element.
+    :param list count_vectors: Valid isotope count tuples.
+    :return: Number of assignments.
+    :rtype: :py:class:`int`
+    """
+    return sum(_multinomial(tuple(counts) + (free_count - sum(counts),)) for counts in count_vectors)
 
-def _default_isotopes(ctfile, isotopes_conf, current_iso):
-    """Create dictionary with default isotopes.
 
-    :param ctfile: Instance of ``Molfile``. 
-    :type ctfile: :class:`~ctfile.ctfile.Molfile`.
-    :param dict isotopes_conf: Default isotopes.
-    :param dict current_iso: Current isotopes to which default isotopes will be added. 
-    :return: Default isotopes.
-    :rtype: :py:class:`dict`
+def _empty_schema_count(base_codes, element_plans):
+    """Number of labeling schemas without any isotope that are skipped during generation,
+    such labeling schema can only be the first assignment, i.e. all count vectors are zero.
+
+    :param base_codes: Isotope code vector of fixed and default isotopes.
+    :type base_codes: :py:class:`array.array`
+    :param list element_plans: List of (free atom indices, isotope codes, count vectors) tuples.
+    :return: 1 if the first assignment does not have any isotope, 0 otherwise.
+    :rtype: :py:class:`int`
+    """
+    if any(base_codes):
+        return 0
+    return int(all(count_vectors and not any(count_vectors[0]) for _, _, count_vectors in element_plans))
+
+
+def _fill_codes(codes, base_codes, element_plans, start=0):
+    """Fill isotope codes of every enumerated element in place, isotope code vector is
+    yielded after every complete assignment and has to be copied to be kept.
+
+    :param codes: Isotope code vector that is modified in place.
+    :type codes: :py:class:`array.array`
+    :param base_codes: Isotope code vector restored after every assignment.
+    :type base_codes: :py:class:`array.array`
+    :param list element_plans: List of (free atom indices, isotope codes, count vectors) tuples.
+    :param int start: Number of leading assignments to skip without generating them.
+    :return: Generator of isotope code vectors.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if not element_plans:
+        if start == 0:
+            yield codes
+        return
+
+    free_indices, isotope_codes, count_vectors = element_plans[0]
+    inner_count = 1
+    if start:
+        for inner_free_indices, _, inner_count_vectors in element_plans[1:]:
+            inner_count *= _element_size(free_count=len(inner_free_indices), count_vectors=inner_count_vectors)
+        if inner_count == 0:
+            return
+
+    for counts in count_vectors:
+        assignment_start = inner_start = 0
+        if start:
+            counts_size = _element_size(free_count=len(free_indices), count_vectors=[counts]) * inner_count
+            if start >= counts_size:
+                start -= counts_size
+                continue
+            assignment_start, inner_start = divmod(start, inner_count)
+            start = 0
+
+        for assignment in _assign_positions(free_indices, isotope_codes, counts, start=assignment_start):
+            for index, code in assignment:
+                codes[index] = code
+
+            for filled_codes in _fill_codes(codes=codes, base_codes=base_codes, element_plans=element_plans[1:],
+                                            start=inner_start):
+                yield filled_codes
+            inner_start = 0
+
+            for index, _ in assignment:
+                codes[index] = base_codes[index]
+
+
+def _fill_unique_codes(codes, base_codes, element_plans, decided, pruned):
+    """Fill isotope codes of every enumerated element in place in the same order as
+    :func:`~isoenum.labeling._fill_codes`, skipping partial assignments that are pruned.
+
+    :param codes: Isotope code vector that is modified in place.
+    :type codes: :py:class:`array.array`
+    :param base_codes: Isotope code vector restored after every assignment.
+    :type base_codes: :py:class:`array.array`
+    :param list element_plans: List of (free atom indices, isotope codes, count vectors) tuples.
+    :param list decided: Flags of atom indices whose isotope codes are already assigned, modified in place.
+    :param pruned: Function of isotope code vector and decided flags, true if assignment cannot be completed.
+    :return: Generator of isotope code vectors.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if not element_plans:
+        yield codes
+        return
+
+    free_indices, isotope_codes, count_vectors = element_plans[0]
+    for counts in count_vectors:
+        assignments = _assign_unique_codes(codes=codes, base_codes=base_codes, free_indices=free_indices,
+                                           isotope_codes=isotope_codes, counts=counts, element_plans=element_plans[1:],
+                                           decided=decided, pruned=pruned)
+        for filled_codes in assignments:
+            yield filled_codes
+
+
+def _assign_unique_codes(codes, base_codes, free_indices, isotope_codes, counts, element_plans, decided, pruned):
+    """Assign isotope codes of element one isotope at a time, in the same order as
+    :func:`~isoenum.labeling._assign_positions`, and fill remaining elements.
+
+    :param codes: Isotope code vector that is modified in place.
+    :type codes: :py:class:`array.array`
+    :param base_codes: Isotope code vector restored after every assignment.
+    :type base_codes: :py:class:`array.array`
+    :param list free_indices: Atom indices of element without assigned isotope code.
+    :param list isotope_codes: Isotope codes that are not assigned yet.
+    :param tuple counts: Number of atoms per isotope code.
+    :param list element_plans: Remaining list of (free atom indices, isotope codes, count vectors) tuples.
+    :param list decided: Flags of atom indices whose isotope codes are already assigned, modified in place.
+    :param pruned: Function of isotope code vector and decided flags, true if assignment cannot be completed.
+    :return: Generator of isotope code vectors.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    if not isotope_codes:
+        # remaining atoms keep their base isotope codes
+        for index in free_indices:
+            decided[index] = True
+        if not pruned(codes, decided):
+            for filled_codes in _fill_unique_codes(codes=codes, base_codes=base_codes, element_plans=element_plans,
+                                                   decided=decided, pruned=pruned):
+                yield filled_codes
+        for index in free_indices:
+            decided[index] = False
+        return
+
+    for chosen_indices in itertools.combinations(range(len(free_indices)), counts[0]):
+        chosen = [free_indices[index] for index in chosen_indices]
+        chosen_set = set(chosen_indices)
+        remaining = [atom_index for index, atom_index in enumerate(free_indices) if index not in chosen_set]
+        for index in chosen:
+            codes[index] = isotope_codes[0]
+            decided[index] = True
+
+        if not pruned(codes, decided):
+            assignments = _assign_unique_codes(codes=codes, base_codes=base_codes, free_indices=remaining,
+                                               isotope_codes=isotope_codes[1:], counts=counts[1:],
+                                               element_plans=element_plans, decided=decided, pruned=pruned)
+            for filled_codes in assignments:
+                yield filled_codes
+
+        for index in chosen:
+            codes[index] = base_codes[index]
+            decided[index] = False
+
+
+def _symmetry_pruning(symmetry_group, atom_table):
+    """Create test of partial labeling schemas that cannot be completed into representative
+    of :meth:`~isoenum.labeling.SymmetryGroup.multiplicity`.
+
+    Representative has the smallest labeling key among its images under automorphisms, so partial
+    labeling schema is pruned if its labeling key is already larger than labeling key of one of its
+    images within assigned atoms, or if isotopes of interchangeable hydrogen atoms are not sorted.
+
+    :param symmetry_group: Symmetry group of ``Molfile``.
+    :type symmetry_group: :class:`~isoenum.labeling.SymmetryGroup`
+    :param atom_table: Atom table of ``Molfile`` with codes of all enumerated isotopes.
+    :type atom_table: :class:`~isoenum.labeling.AtomTable`
+    :return: Function of isotope code vector and decided flags, true if assignment cannot be completed.
+    :rtype: :py:class:`types.FunctionType`
+    """
+    index_by_position = atom_table.index_by_position
+    key_indices = [index_by_position[position] for position in symmetry_group.positions]
+
+    # atom index of labeling key of image, compared until the first atom that is not moved
+    image_indices = []
+    for permutation in symmetry_group.permutations:
+        image = {permutation[position]: position for position in symmetry_group.positions}
+        pairs = [(index, index_by_position[image[position]])
+                 for index, position in zip(key_indices, symmetry_group.positions)]
+        pairs = [(index, image_index) for index, image_index in pairs if index != image_index]
+        if pairs:
+            image_indices.append(pairs)
+
+    hydrogen_pairs = [(index_by_position[first], index_by_position[second])
+                      for parent in symmetry_group.parents
+                      for first, second in zip(symmetry_group.hydrogen_groups[parent],
+                                               symmetry_group.hydrogen_groups[parent][1:])]
+
+    # labeling keys compare isotopes as strings
+    order = {isotope: rank for rank, isotope in enumerate(sorted(atom_table.isotopes))}
+    code_ranks = [order[isotope] for isotope in atom_table.isotopes]
+
+    def pruned(codes, decided):
+        for first, second in hydrogen_pairs:
+            if decided[first] and decided[second] and code_ranks[codes[first]] > code_ranks[codes[second]]:
+                return True
+
+        for pairs in image_indices:
+            for index, image_index in pairs:
+                if not (decided[index] and decided[image_index]):
+                    break
+                rank = code_ranks[codes[index]]
+                image_rank = code_ranks[codes[image_index]]
+                if rank != image_rank:
+                    if rank > image_rank:
+                        return True
+                    break
+        return False
+
+    return pruned
+
+
+def _isotope_mass(isotopes_conf, atom, isotope):
+    """Exact mass of isotope.
+
+    :param dict isotopes_conf: Default isotopes and exact masses.
+    :param str atom: Atom symbol.
+    :param str isotope: Isotope, e.g. "13".
+    :return: Exact mass.
+    :rtype: :py:class:`float`
+    """
+    try:
+        return isotopes_conf[atom]['masses'][isotope]
+    except KeyError:
+        raise ValueError('Exact mass of isotope "{}" of atom "{}" is not configured.'.format(isotope, atom))
+
+
+def _in_mass_windows(low, high, mass_windows):
+    """Check if mass range overlaps any of mass windows.
+
+    :param float low: Lowest mass.
+    :param float high: Highest mass.
+    :param list mass_windows: List of (lowest mass, highest mass) tuples.
+    :return: True if mass range overlaps mass window, False otherwise.
+    :rtype: :py:obj:`True` or :py:obj:`False`
+    """
+    return any(low <= window_high and high >= window_low for window_low, window_high in mass_windows)
+
+
+def _fill_window_codes(codes, base_codes, window_plans, mass, mass_windows):
+    """Fill isotope codes of every enumerated element in place like :func:`~isoenum.labeling._fill_codes`
+    and skip isotope counts that cannot reach any of mass windows.
+
+    :param codes: Isotope code vector that is modified in place.
+    :type codes: :py:class:`array.array`
+    :param base_codes: Isotope code vector restored after every assignment.
+    :type base_codes: :py:class:`array.array`
+    :param list window_plans: List of (free atom indices, isotope codes, count vectors, mass shifts) tuples.
+    :param float mass: Mass of already assigned elements and the remaining elements without isotopes.
+    :param list mass_windows: List of (lowest mass, highest mass) tuples.
+    :return: Generator of (isotope code vector, mass) tuples.
+    :rtype: :py:class:`types.GeneratorType`
     """
-    default_iso = {}
-    allowed_atom_symbols = [atom.atom_symbol for atom in ctfile.atoms]
-    positions = [atom.atom_number for atom in ctfile.atoms]
-    ctfile_position_atom = dict(zip(positions, allowed_atom_symbols))
-
-    for atom_number in positions:
-        if atom_number not in current_iso:
-            atom = ctfile_position_atom[atom_number]
-            isotope = isotopes_conf[atom]['default']
-            default_iso[atom_number] = {'atom_symbol': atom, 'isotope': isotope, 'atom_number': atom_number}
-    return default_iso
+    if not window_plans:
+        yield codes, mass
+        return
+
+    free_indices, isotope_codes, count_vectors, count_shifts = window_plans[0]
+    lowest_shift = sum(min(shifts) for _, _, _, shifts in window_plans[1:])
+    highest_shift = sum(max(shifts) for _, _, _, shifts in window_plans[1:])
+
+    for counts, shift in zip(count_vectors, count_shifts):
+        if not _in_mass_windows(low=mass + shift + lowest_shift, high=mass + shift + highest_shift,
+                                mass_windows=mass_windows):
+            continue
+
+        for assignment in _assign_positions(free_indices, isotope_codes, counts):
+            for index, code in assignment:
+                codes[index] = code
+
+            for filled_codes, filled_mass in _fill_window_codes(codes=codes, base_codes=base_codes,
+                                                                window_plans=window_plans[1:], mass=mass + shift,
+                                                                mass_windows=mass_windows):
+                yield filled_codes, filled_mass
+
+            for index, _ in assignment:
+                codes[index] = base_codes[index]
+
+
+def _element_code_matrices(base_codes, element_plans):
+    """Create isotope code matrix of every enumerated element, rows are all valid assignments
+    of isotopes to free atoms of element in the order of :func:`~isoenum.labeling._assign_positions`
+    and free atoms without assigned isotope keep isotope code of base vector.
+
+    :param base_codes: Isotope code vector of fixed and default isotopes.
+    :type base_codes: :py:class:`array.array`
+    :param list element_plans: List of (free atom indices, isotope codes, count vectors) tuples.
+    :return: List of (free atom indices, isotope code matrix) tuples or None if matrices are too large.
+    :rtype: :py:class:`list` or :py:obj:`None`
+    """
+    base = numpy.array(base_codes, dtype=numpy.uint16)
+    element_matrices = []
+
+    for free_indices, isotope_codes, count_vectors in element_plans:
+        free_count = len(free_indices)
+        row_count = _element_size(free_count=free_count, count_vectors=count_vectors)
+        if row_count * max(free_count, 1) > NUMPY_ENGINE_MAX_CELLS:
+            return None
+
+        # scan every assignment when most of them are valid, construct valid assignments otherwise
+        scan_count = (len(isotope_codes) + 1) ** free_count
+        if scan_count <= 4 * row_count and scan_count * free_count <= NUMPY_ENGINE_MAX_CELLS:
+            matrix = _scan_code_matrix(free_count=free_count, isotope_codes=isotope_codes,
+                                       count_vectors=count_vectors)
+        elif count_vectors:
+            matrix = numpy.concatenate([_combination_code_matrix(free_count=free_count,
+                                                                 isotope_codes=isotope_codes, counts=counts)
+                                        for counts in count_vectors])
+        else:
+            matrix = numpy.zeros((0, free_count), dtype=numpy.uint16)
+
+        indices = numpy.array(free_indices, dtype=numpy.intp)
+        matrix = numpy.where(matrix == 0, base[indices], matrix).astype(numpy.uint16)
+        element_matrices.append((indices, matrix))
+
+    return element_matrices
+
+
+def _scan_code_matrix(free_count, isotope_codes, count_vectors):
+    """Create isotope code matrix by scanning every assignment of isotopes to free atoms and
+    keeping assignments whose isotope counts, i.e. per-isotope column sums, are valid.
+
+    :param int free_count: Number of free atoms of element.
+    :param list isotope_codes: Isotope codes of element.
+    :param list count_vectors: Valid isotope count tuples.
+    :return: Isotope code matrix, code 0 designates atom without assigned isotope.
+    :rtype: :class:`numpy.ndarray`
+    """
+    choices = len(isotope_codes) + 1
+    numbers = numpy.arange(choices ** free_count, dtype=numpy.int64)
+    powers = choices ** numpy.arange(free_count - 1, -1, -1, dtype=numpy.int64)
+    # digit of every free atom selects isotope, digit 0 designates atom without assigned isotope
+    digits = (numbers[:, numpy.newaxis] // powers) % choices
+
+    counts = numpy.stack([(digits == choice).sum(axis=1) for choice in range(1, choices)], axis=1)
+    radix = (free_count + 1) ** numpy.arange(choices - 1, dtype=numpy.int64)
+    valid_keys = numpy.array(count_vectors, dtype=numpy.int64).reshape(-1, choices - 1).dot(radix)
+    valid = numpy.isin(counts.dot(radix), valid_keys)
+    digits = digits[valid]
+    counts = counts[valid]
+
+    # order by isotope counts, then by positions of every isotope as combinations are ordered
+    sort_keys = [counts[:, choice] for choice in range(choices - 1)]
+    sort_keys.extend(digits[:, column] != choice for choice in range(1, choices) for column in range(free_count))
+    if sort_keys:
+        digits = digits[numpy.lexsort(sort_keys[::-1])]
+
+    lookup = numpy.array([0] + list(isotope_codes), dtype=numpy.uint16)
+    return lookup[digits]
+
+
+def _combination_code_matrix(free_count, isotope_codes, counts):
+    """Create isotope code matrix of all assignments of isotopes to free atoms with given
+    number of atoms per isotope, see :func:`~isoenum.labeling._assign_positions`.
+
+    :param int free_count: Number of free atoms of element.
+    :param list isotope_codes: Isotope codes of element.
+    :param tuple counts: Number of atoms per isotope.
+    :return: Isotope code matrix, code 0 designates atom without assigned isotope.
+    :rtype: :class:`numpy.ndarray`
+    """
+    if not isotope_codes:
+        return numpy.zeros((1, free_count), dtype=numpy.uint16)
+
+    chosen_count = _multinomial((counts[0], free_count - counts[0]))
+    chosen = numpy.fromiter(itertools.chain.from_iterable(itertools.combinations(range(free_count), counts[0])),
+                            dtype=numpy.intp, count=chosen_count * counts[0]).reshape(chosen_count, counts[0])
+
+    unchosen = numpy.ones((chosen_count, free_count), dtype=bool)
+    unchosen[numpy.arange(chosen_count)[:, numpy.newaxis], chosen] = False
+    remaining = numpy.nonzero(unchosen)[1].reshape(chosen_count, free_count - counts[0])
+
+    rest = _combination_code_matrix(free_count=free_count - counts[0], isotope_codes=isotope_codes[1:],
+                                    counts=counts[1:])
+    first = numpy.repeat(numpy.arange(chosen_count), len(rest))
+    second = numpy.tile(numpy.arange(len(rest)), chosen_count)
+    rows = numpy.arange(len(first))[:, numpy.newaxis]
+
+    matrix = numpy.zeros((len(first), free_count), dtype=numpy.uint16)
+    matrix[rows, chosen[first]] = isotope_codes[0]
+    matrix[rows, remaining[first]] = rest[second]
+    return matrix
+
+
+def _numpy_code_blocks(base_codes, element_matrices, block_size, start=0, stop=None):
+    """Combine isotope code matrices of enumerated elements into blocks of labeling schemas.
+
+    :param base_codes: Isotope code vector of fixed and default isotopes.
+    :type base_codes: :py:class:`array.array`
+    :param list element_matrices: List of (free atom indices, isotope code matrix) tuples.
+    :param int block_size: Maximum number of labeling schemas per block.
+    :param int start: Number of the first assignment.
+    :param int stop: Number following the last assignment, all assignments if not provided.
+    :return: Generator of (number of the first assignment, isotope code matrix) tuples.
+    :rtype: :py:class:`types.GeneratorType`
+    """
+    base = numpy.array(base_codes, dtype=numpy.uint16)
+    total = 1
+    for _, matrix in element_matrices:
+        total *= len(matrix)
+    if stop is not None:
+        total = min(total, stop)
+
+    for block_start in range(start, total, block_size):
+        block_stop = min(block_start + block_size, total)
+        block = numpy.repeat(base[numpy.newaxis, :], block_stop - block_start, axis=0)
+
+        # mixed radix digits of row number select row of every element matrix, last element changes fastest
+        row_numbers = numpy.arange(block_start, block_stop, dtype=numpy.int64)
+        for indices, matrix in reversed(element_matrices):
+            block[:, indices] = matrix[row_numbers % len(matrix)]
+            row_numbers //= len(matrix)
+
+        yield block_start, block
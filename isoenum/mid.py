@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+isoenum.mid
+~~~~~~~~~~~
+
+This module provides computation of mass isotopomer distribution (MID),
+i.e. fractions of M+0, M+1, ..., M+n mass isotopomers, directly from element
+counts and isotope abundances without enumerating labeling schemas.
+"""
+
+import logging
+
+from . import labeling
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.StreamHandler())
+
+# minimum product of polynomial lengths convolved through FFT when NumPy is installed
+FFT_CONVOLUTION_MIN_SIZE = 4096
+
+
+def mass_isotopomer_distribution(ignore_existing_isotopes, all_iso, specific_iso, existing_iso, isotopes_conf,
+                                 ctfile, enrichment=None, positions=None, max_shift=None, **options):
+    """Compute mass isotopomer distribution of ``Molfile``.
+
+    Every atom without fixed isotope independently has isotope with probability equal to isotope
+    abundance, so distribution of every element is its single atom distribution raised to the power
+    of number of atoms, and distribution of molecule is convolution of element distributions.
+    Mass shift of isotope is the difference between its mass number and mass number of the lightest
+    isotope of element, i.e. M+0 has the lightest isotope of every atom without fixed isotope.
+    Elements without configured isotope abundances are treated as monoisotopic.
+
+    :param bool ignore_existing_isotopes: Specifies if will ignore existing isotopic layer.
+    :param dict all_iso: Atom specific isotopes `--all` option.
+    :param dict specific_iso: Atom number specific isotopes from `--specific` option.
+    :param dict existing_iso: Atom number specific isotopes from ``Molfile``.
+    :param dict isotopes_conf: Isotopes and natural abundances.
+    :param ctfile: Instance of ``Molfile``.
+    :type ctfile: :class:`~ctfile.ctfile.Molfile`
+    :param dict enrichment: Element to isotope to abundance mapping that overrides natural abundances.
+    :param list positions: Atom numbers included in distribution, e.g. atoms of fragment, all atoms if not provided.
+    :param int max_shift: Highest mass shift kept in distribution, all mass shifts if not provided.
+    :return: Fractions of mass isotopomers, the first is M+0.
+    :rtype: :py:class:`list`
+    """
+    starting_iso = labeling._starting_isotopes(ignore_existing_isotopes=ignore_existing_isotopes, all_iso=all_iso,
+                                               specific_iso=specific_iso, existing_iso=existing_iso)
+    abundances = labeling.isotope_abundances(isotopes_conf=isotopes_conf, enrichment=enrichment)
+    selected_positions = None if positions is None else {str(position) for position in positions}
+
+    fixed_shift = 0
+    free_counts = {}
+    monoisotopic = set()
+    for atom in ctfile.atoms:
+        if selected_positions is not None and atom.atom_number not in selected_positions:
+            continue
+
+        if atom.atom_symbol not in isotopes_conf or not abundances.get(atom.atom_symbol):
+            if atom.atom_symbol not in monoisotopic:
+                logger.warning('WARNING: Isotope abundances of atom "{}" are not configured, '
+                               'it is treated as monoisotopic.'.format(atom.atom_symbol))
+                monoisotopic.add(atom.atom_symbol)
+            continue
+
+        if atom.atom_number in starting_iso:
+            fixed_shift += _mass_shift(isotopes_conf=isotopes_conf, atom=atom.atom_symbol,
+                                       isotope=starting_iso[atom.atom_number]['isotope'])
+        else:
+            free_counts[atom.atom_symbol] = free_counts.get(atom.atom_symbol, 0) + 1
+
+    distribution = [0.0] * fixed_shift + [1.0]
+    for atom, atom_count in free_counts.items():
+        atom_distribution = [0.0] * (max(_mass_shift(isotopes_conf=isotopes_conf, atom=atom, isotope=isotope)
+                                         for isotope in abundances[atom]) + 1)
+        for isotope, abundance in abundances[atom].items():
+            atom_distribution[_mass_shift(isotopes_conf=isotopes_conf, atom=atom, isotope=isotope)] += abundance
+
+        element_distribution = _power(distribution=atom_distribution, exponent=atom_count, max_shift=max_shift)
+        distribution = _convolve(distribution, element_distribution, max_shift=max_shift)
+
+    if max_shift is not None:
+        distribution = distribution[:max_shift + 1]
+        distribution.extend([0.0] * (max_shift + 1 - len(distribution)))
+    else:
+        while len(distribution) > 1 and not distribution[-1]:
+            distribution.pop()
+    return distribution
+
+
+def _mass_shift(isotopes_conf, atom, isotope):
+    """Difference between mass number of isotope and mass number of the lightest isotope of element.
+
+    :param dict isotopes_conf: Isotopes configuration.
+    :param str atom: Atom symbol.
+    :param str isotope: Isotope, e.g. "13".
+    :return: Nominal mass shift.
+    :rtype: :py:class:`int`
+    """
+    return int(isotope) - min(int(configured) for configured in isotopes_conf[atom]['isotopes'])
+
+
+def _power(distribution, exponent, max_shift=None):
+    """Raise distribution to integer power by repeated squaring.
+
+    :param list distribution: Fractions per mass shift.
+    :param int exponent: Number of independent atoms.
+    :param int max_shift: Highest mass shift kept, all mass shifts if not provided.
+    :return: Fractions per mass shift.
+    :rtype: :py:class:`list`
+    """
+    result = [1.0]
+    while exponent:
+        if exponent & 1:
+            result = _convolve(result, distribution, max_shift=max_shift)
+        exponent >>= 1
+        if exponent:
+            distribution = _convolve(distribution, distribution, max_shift=max_shift)
+    return result
+
+
+def _convolve(first, second, max_shift=None):
+    """Convolve two distributions, through FFT for long distributions if NumPy is installed.
+
+    :param list first: Fractions per mass shift.
+    :param list second: Fractions per mass shift.
+    :param int max_shift: Highest mass shift kept, all mass shifts if not provided.
+    :return: Fractions per mass shift.
+    :rtype: :py:class:`list`
+    """
+    if max_shift is not None:
+        first = first[:max_shift + 1]
+        second = second[:max_shift + 1]
+
+    size = len(first) + len(second) - 1
+    if numpy is not None and len(first) * len(second) >= FFT_CONVOLUTION_MIN_SIZE:
+        fft_size = 1 << (size - 1).bit_length()
+        result = numpy.fft.irfft(numpy.fft.rfft(first, fft_size) * numpy.fft.rfft(second, fft_size), fft_size)
+        result = numpy.clip(result[:size], 0.0, None).tolist()
+    else:
+        result = [0.0] * size
+        for first_shift, first_fraction in enumerate(first):
+            if not first_fraction:
+                continue
+            for second_shift, second_fraction in enumerate(second):
+                result[first_shift + second_shift] += first_fraction * second_fraction
+
+    if max_shift is not None:
+        result = result[:max_shift + 1]
+    return result
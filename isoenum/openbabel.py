@@ -5,85 +5,873 @@
 isoenum.openbabel
 ~~~~~~~~~~~~~~~~~
 
-This module provides :func:`~isoenum.openbabel.convert` to convert
-between different file formats used in molecular modeling and computational
+This module provides :func:`~isoenum.openbabel.convert` and
+:func:`~isoenum.openbabel.convert_str` to convert between different file formats used in molecular modeling and computational
 chemistry (e.g. ``InChI``, ``SMILES``, ``Molfile``, etc.).
+
+Conversions are performed by a backend object that probes the Open Babel
+installation only once per process, see :func:`~isoenum.openbabel.get_backend`.
+Three backends are available: ``subprocess`` calls the ``obabel`` executable,
+``pybel`` uses the Open Babel Python bindings in-process and ``pool`` sends
+conversions to a pool of long-lived worker processes over stdin/stdout pipes.
+The ``auto`` backend uses Python bindings when they can be imported and
+``obabel`` otherwise.
 """
 
+from __future__ import absolute_import
+
+import atexit
+import contextlib
+import json
+import multiprocessing
+import os
 import re
 import subprocess
+import sys
+import threading
+from collections import Counter
 
 from packaging import version
 
+from . import conf
+from . import exceptions
+from . import utils
+
 try:
-    from subprocess import DEVNULL
+    import queue
 except ImportError:
-    import os
+    import Queue as queue
 
+try:
+    from subprocess import DEVNULL
+except ImportError:
     DEVNULL = open(os.devnull, "wb")
 
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
+
+
+REQUIRED_OPENBABEL_VERSION = "2.4.1"
+
+
+class SubprocessBackend(object):
+    """Open Babel backend that calls the ``obabel`` executable."""
+
+    name = "subprocess"
+
+    def __init__(self, executable="obabel", required_version=REQUIRED_OPENBABEL_VERSION, capability_path=None):
+        """Subprocess backend initializer.
+
+        :param str executable: Name of or path to the ``obabel`` executable.
+        :param str required_version: Minimal required Open Babel version.
+        :param str capability_path: Path to file where probed capabilities are persisted (optional).
+        """
+        self.executable = executable
+        self.required_version = required_version
+        self.capability_path = capability_path
+        self.path = None
+        self.version = None
+        self.formats = None
+        self.stats = Counter(probes=0, conversions=0)
+
+    def probe(self):
+        """Find ``obabel`` executable and test its version, only once per backend instance.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        if self.path is not None:
+            return
+
+        path = which(self.executable)
+        if path is None:
+            raise SystemExit(
+                "Open Babel software is not installed, exiting. "
+                "See installation instructions to get Open Babel "
+                "software for your operating system:"
+                "http://openbabel.org/wiki/Get_Open_Babel"
+            )
+
+        capabilities = self._load_capabilities(path=path)
+        if capabilities is None:
+            capabilities = self._probe_executable(path=path)
+            self._save_capabilities(capabilities=capabilities)
+
+        if version.parse(capabilities["version"]) < version.parse(self.required_version):
+            raise SystemExit("Open Babel version {} is required.".format(self.required_version))
+
+        self.version = capabilities["version"]
+        self.formats = set(capabilities["formats"])
+        self.path = path
+
+    def _probe_executable(self, path):
+        """Run ``obabel`` executable to collect its version and supported formats.
+
+        :param str path: Path to ``obabel`` executable.
+        :return: Capabilities of ``obabel`` executable.
+        :rtype: :py:class:`dict`
+        """
+        self.stats["probes"] += 1
+
+        try:
+            version_output = subprocess.check_output([path, "-V"]).decode("utf-8")
+            formats_output = subprocess.check_output([path, "-L", "formats"], stderr=DEVNULL).decode("utf-8")
+        except (OSError, subprocess.CalledProcessError):
+            raise SystemExit("Open Babel software cannot be executed: {}".format(path))
+
+        version_number = re.search(r"\d{1,2}\.\d{1,2}\.\d{1,2}", version_output)
+        if not version_number:
+            raise SystemExit("Open Babel version information cannot be found: {}".format(version_output))
+
+        formats = [line.split(" -- ")[0].strip() for line in formats_output.splitlines() if " -- " in line]
+
+        return {"path": path,
+                "mtime": os.path.getmtime(path),
+                "version": version_number.group(),
+                "formats": sorted(formats)}
+
+    def _load_capabilities(self, path):
+        """Load persisted capabilities if they belong to the same, unmodified executable.
+
+        :param str path: Path to ``obabel`` executable.
+        :return: Capabilities or None if they are missing or outdated.
+        :rtype: :py:class:`dict` or :py:obj:`None`
+        """
+        if not self.capability_path or not os.path.isfile(self.capability_path):
+            return None
+
+        try:
+            with open(self.capability_path, "r") as infile:
+                capabilities = json.load(infile)
+        except (IOError, ValueError):
+            return None
+
+        if capabilities.get("path") == path and capabilities.get("mtime") == os.path.getmtime(path):
+            return capabilities
+        return None
+
+    def _save_capabilities(self, capabilities):
+        """Persist capabilities to capability file, if one is configured.
+
+        :param dict capabilities: Capabilities of ``obabel`` executable.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        if not self.capability_path:
+            return
+
+        try:
+            with open(self.capability_path, "w") as outfile:
+                json.dump(capabilities, outfile)
+        except IOError:
+            pass
+
+    def convert(self, input_file_path, output_file_path, input_format, output_format, **options):
+        """Convert between formats using ``obabel`` executable.
+
+        :param str input_file_path: Path to input file.
+        :param str output_file_path: Path to output file.
+        :param str input_format: Input file format.
+        :param str output_format: Output file format.
+        :param options: Additional key-value options to pass to Open Babel.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self.probe()
+
+        cmd = [
+            self.path,
+            "-i{}".format(input_format),
+            "{}".format(input_file_path),
+            "-o{}".format(output_format),
+            "-O{}".format(output_file_path),
+        ]
+
+        if options:
+            for option in options.values():
+                cmd.extend(option.split())
+
+        self.stats["conversions"] += 1
+        subprocess.call(cmd, shell=False, stdout=DEVNULL, stderr=subprocess.STDOUT)
+
+    def convert_str(self, input_str, input_format, output_format, **options):
+        """Convert string between formats using ``obabel`` executable, input is passed
+        over stdin and output is read from stdout without writing any files.
+
+        :param str input_str: Input string.
+        :param str input_format: Input format.
+        :param str output_format: Output format.
+        :param options: Additional key-value options to pass to Open Babel.
+        :return: Output string.
+        :rtype: :py:class:`str`
+        """
+        self.probe()
+
+        cmd = [
+            self.path,
+            "-i{}".format(input_format),
+            "-o{}".format(output_format),
+        ]
+
+        if options:
+            for option in options.values():
+                cmd.extend(option.split())
+
+        self.stats["conversions"] += 1
+        process = subprocess.Popen(cmd, shell=False, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=DEVNULL)
+        output, _ = process.communicate(input_str.encode("utf-8"))
+        return output.decode("utf-8")
+
+
+class PybelBackend(object):
+    """Open Babel backend that uses Open Babel Python bindings in-process."""
+
+    name = "pybel"
+
+    def __init__(self, required_version=REQUIRED_OPENBABEL_VERSION):
+        """Pybel backend initializer.
+
+        :param str required_version: Minimal required Open Babel version.
+        """
+        self.required_version = required_version
+        self.version = None
+        self.formats = None
+        self.stats = Counter(probes=0, conversions=0)
+        self._ob = None
+
+    @staticmethod
+    def is_available():
+        """Test if Open Babel Python bindings can be imported.
+
+        :return: True if Python bindings are importable, False otherwise.
+        :rtype: :py:obj:`True` or :py:obj:`False`
+        """
+        return _import_bindings() is not None
+
+    def probe(self):
+        """Import Open Babel Python bindings and test their version, only once per backend instance.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        if self._ob is not None:
+            return
+
+        ob = _import_bindings()
+        if ob is None:
+            raise SystemExit(
+                "Open Babel Python bindings are not installed, exiting. "
+                'Install them (e.g. "pip install openbabel") or use "subprocess" backend.'
+            )
+
+        self.stats["probes"] += 1
+        openbabel_version = ob.OBReleaseVersion()
+        if version.parse(openbabel_version) < version.parse(self.required_version):
+            raise SystemExit("Open Babel version {} is required.".format(self.required_version))
+
+        # keep Open Babel warnings out of stderr, the same way obabel output is discarded
+        ob.obErrorLog.StopLogging()
+
+        conversion = ob.OBConversion()
+        self.formats = set(conversion.GetSupportedInputFormat()).union(conversion.GetSupportedOutputFormat())
+        self.formats = set(entry.split(" -- ")[0].strip() for entry in self.formats)
+        self.version = openbabel_version
+        self._ob = ob
+
+    def _create_conversion(self, input_format, output_format, options):
+        """Create ``OBConversion`` instance from ``obabel`` command-line style options.
+
+        :param str input_format: Input file format.
+        :param str output_format: Output file format.
+        :param dict options: Additional key-value options in ``obabel`` command-line form.
+        :return: ``OBConversion`` instance.
+        :rtype: :class:`openbabel.OBConversion`
+        """
+        ob = self._ob
+        conversion = ob.OBConversion()
+
+        if not conversion.SetInAndOutFormats(input_format, output_format):
+            raise ValueError('Unsupported conversion: "{}" to "{}".'.format(input_format, output_format))
+
+        for option_name, option_type, option_value in _parse_options(options):
+            option_type = {"in": ob.OBConversion.INOPTIONS,
+                           "out": ob.OBConversion.OUTOPTIONS,
+                           "gen": ob.OBConversion.GENOPTIONS}[option_type]
+            conversion.AddOption(option_name, option_type, option_value)
+
+        return conversion
+
+    def convert(self, input_file_path, output_file_path, input_format, output_format, **options):
+        """Convert between formats using Open Babel Python bindings.
+
+        :param str input_file_path: Path to input file.
+        :param str output_file_path: Path to output file.
+        :param str input_format: Input file format.
+        :param str output_format: Output file format.
+        :param options: Additional key-value options in ``obabel`` command-line form.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        with open(input_file_path, "r") as infile:
+            input_str = infile.read()
+
+        output_str = self.convert_str(input_str=input_str,
+                                      input_format=input_format,
+                                      output_format=output_format,
+                                      **options)
+
+        with open(output_file_path, "w") as outfile:
+            outfile.write(output_str)
+
+    def convert_str(self, input_str, input_format, output_format, **options):
+        """Convert string between formats using Open Babel Python bindings.
+
+        :param str input_str: Input string.
+        :param str input_format: Input format.
+        :param str output_format: Output format.
+        :param options: Additional key-value options in ``obabel`` command-line form.
+        :return: Output string.
+        :rtype: :py:class:`str`
+        """
+        self.probe()
+        conversion = self._create_conversion(input_format=input_format,
+                                             output_format=output_format,
+                                             options=options)
+        self.stats["conversions"] += 1
+
+        outputs = []
+        molecule = self._ob.OBMol()
+        not_at_end = conversion.ReadString(molecule, input_str)
+
+        while not_at_end:
+            molecule.DoTransformations(conversion.GetOptions(self._ob.OBConversion.GENOPTIONS), conversion)
+            outputs.append(conversion.WriteString(molecule))
+            molecule = self._ob.OBMol()
+            not_at_end = conversion.Read(molecule)
+
+        return "".join(outputs)
+
+
+class Worker(object):
+    """Long-lived conversion worker process that uses Open Babel Python bindings.
+
+    Requests and responses are JSON documents, one per line, exchanged over
+    worker stdin and stdout, see :func:`~isoenum.openbabel.serve`.
+    """
+
+    def __init__(self, python=sys.executable, timeout=60):
+        """Worker initializer.
+
+        :param str python: Python interpreter used to run worker process.
+        :param float timeout: Number of seconds to wait for a response.
+        """
+        self.python = python
+        self.timeout = timeout
+        self.process = None
+        self._lines = None
+
+    def start(self):
+        """Start worker process and wait until it is ready to accept requests.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self.process = subprocess.Popen([self.python, "-c", "from isoenum.openbabel import serve; serve()"],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=DEVNULL)
+
+        # lines are read by a thread, waiting on a queue with timeout works with pipes on every platform
+        self._lines = queue.Queue()
+        reader = threading.Thread(target=_read_lines, args=(self.process.stdout, self._lines))
+        reader.daemon = True
+        reader.start()
+        self.ping()
+
+    def stop(self):
+        """Stop worker process.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        if self.process is None:
+            return
+
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=1)
+            except Exception:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def restart(self):
+        """Restart worker process.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+        self.start()
+
+    def is_alive(self):
+        """Test if worker process is running.
+
+        :return: True if worker process is running, False otherwise.
+        :rtype: :py:obj:`True` or :py:obj:`False`
+        """
+        return self.process is not None and self.process.poll() is None
+
+    def ping(self):
+        """Health check: test if worker process responds to requests.
+
+        :return: Open Babel version used by worker.
+        :rtype: :py:class:`str`
+        """
+        return self.request({"command": "ping"})["version"]
+
+    def request(self, message):
+        """Send request to worker process and wait for response.
 
-def _test_openbabel(required_openbabel_version="2.4.1"):
-    """Test if Open Babel software is installed.
-    
+        :param dict message: Request message.
+        :return: Response message.
+        :rtype: :py:class:`dict`
+        """
+        if not self.is_alive():
+            raise exceptions.OpenBabelWorkerError("Open Babel worker is not running.")
+
+        try:
+            self.process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+            self.process.stdin.flush()
+        except (IOError, OSError):
+            raise exceptions.OpenBabelWorkerError("Open Babel worker stopped accepting requests.")
+
+        response = json.loads(self._read_line().decode("utf-8"))
+        if "error" in response:
+            raise exceptions.OpenBabelWorkerError(response["error"])
+        return response
+
+    def _read_line(self):
+        """Read single line from worker stdout within timeout.
+
+        :return: Line without line separator.
+        :rtype: :py:class:`bytes`
+        """
+        try:
+            line = self._lines.get(timeout=self.timeout)
+        except queue.Empty:
+            self.process.kill()
+            raise exceptions.ConversionTimeoutError(
+                "Open Babel worker did not respond within {} seconds.".format(self.timeout))
+
+        if line is None:
+            raise exceptions.OpenBabelWorkerError("Open Babel worker exited unexpectedly.")
+        return line
+
+
+def _read_lines(stdout, lines):
+    """Read lines from worker stdout into queue until worker process exits, executed by reader thread.
+
+    :param stdout: Worker stdout.
+    :param lines: Queue of lines without line separator, None is put once worker stdout is closed.
+    :type lines: :py:class:`queue.Queue`
     :return: None.
     :rtype: :py:obj:`None`
     """
     try:
-        openbabel_version_test = subprocess.check_output(["obabel", "-V"])
-        openbabel_version = openbabel_version_test.decode("utf-8")
+        for line in iter(stdout.readline, b""):
+            lines.put(line.rstrip(b"\r\n"))
+    except (IOError, OSError, ValueError):
+        pass
+    lines.put(None)
 
-        version_pattern = re.compile("\d{1,2}\.\d{1,2}\.\d{1,2}")
-        openbabel_version_number = re.search(version_pattern, openbabel_version)
 
-        if not openbabel_version_number:
-            raise SystemExit(
-                "Open Babel version information cannot be found: {}".format(
-                    openbabel_version
-                )
-            )
-        else:
-            if version.parse(openbabel_version_number.group()) < version.parse(
-                required_openbabel_version
-            ):
-                raise SystemExit(
-                    "Open Babel version {} is required.".format(
-                        required_openbabel_version
+class WorkerPool(object):
+    """Pool of long-lived Open Babel conversion workers."""
+
+    def __init__(self, size=None, timeout=60, python=sys.executable):
+        """Worker pool initializer.
+
+        :param int size: Number of workers, number of CPUs by default.
+        :param float timeout: Number of seconds to wait for a single conversion.
+        :param str python: Python interpreter used to run worker processes.
+        """
+        self.size = size or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.python = python
+        self.workers = []
+        self.stats = Counter(probes=0, conversions=0, restarts=0)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start workers, only once per pool instance.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        with self._lock:
+            if self.workers:
+                return
+
+            for _ in range(self.size):
+                worker = Worker(python=self.python, timeout=self.timeout)
+                try:
+                    worker.start()
+                except exceptions.OpenBabelWorkerError:
+                    worker.stop()
+                    self.close()
+                    raise SystemExit(
+                        "Open Babel workers cannot be started, exiting. "
+                        "Workers require Open Babel Python bindings, "
+                        'install them (e.g. "pip install openbabel") or use "subprocess" backend.'
                     )
-                )
+                self.stats["probes"] += 1
+                self.workers.append(worker)
+                self._idle.put(worker)
+
+            atexit.register(self.close)
+
+    def close(self):
+        """Stop all workers.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+        self._idle = queue.Queue()
+
+    def health_check(self):
+        """Ping idle workers and restart the ones that do not respond.
+
+        :return: Number of restarted workers.
+        :rtype: :py:class:`int`
+        """
+        restarted = 0
+        for _ in range(self._idle.qsize()):
+            with self.borrow() as worker:
+                try:
+                    worker.ping()
+                except exceptions.OpenBabelWorkerError:
+                    self._restart(worker)
+                    restarted += 1
+        return restarted
+
+    @contextlib.contextmanager
+    def borrow(self):
+        """Borrow worker from the pool, worker that crashed is restarted before use.
+
+        :return: Worker.
+        :rtype: :class:`~isoenum.openbabel.Worker`
+        """
+        self.start()
+        worker = self._idle.get()
+        try:
+            if not worker.is_alive():
+                self._restart(worker)
+            yield worker
+        finally:
+            self._idle.put(worker)
+
+    def _restart(self, worker):
+        """Restart worker.
 
-    except OSError:
-        raise SystemExit(
-            "Open Babel software is not installed, exiting. "
-            "See installation instructions to get Open Babel "
-            "software for your operating system:"
-            "http://openbabel.org/wiki/Get_Open_Babel"
-        )
+        :param worker: Worker.
+        :type worker: :class:`~isoenum.openbabel.Worker`
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self.stats["restarts"] += 1
+        worker.restart()
+
+    def convert_str(self, input_str, input_format, output_format, **options):
+        """Convert string between formats using one of the pool workers.
+
+        :param str input_str: Input string.
+        :param str input_format: Input format.
+        :param str output_format: Output format.
+        :param options: Additional key-value options in ``obabel`` command-line form.
+        :return: Output string.
+        :rtype: :py:class:`str`
+        """
+        message = {"command": "convert",
+                   "input": input_str,
+                   "input_format": input_format,
+                   "output_format": output_format,
+                   "options": options}
+
+        self.stats["conversions"] += 1
+        with self.borrow() as worker:
+            try:
+                return worker.request(message)["output"]
+            except exceptions.ConversionTimeoutError:
+                self._restart(worker)
+                raise
+            except exceptions.OpenBabelWorkerError:
+                if worker.is_alive():
+                    raise
+                # worker crashed while converting, retry once with a fresh worker
+                self._restart(worker)
+                return worker.request(message)["output"]
+
+
+class PoolBackend(object):
+    """Open Babel backend that borrows long-lived workers from a worker pool."""
+
+    name = "pool"
+
+    def __init__(self, size=None, timeout=None):
+        """Pool backend initializer.
+
+        :param int size: Number of workers.
+        :param float timeout: Number of seconds to wait for a single conversion.
+        """
+        self.pool = WorkerPool(size=size or conf.openbabel_pool_size,
+                               timeout=timeout or conf.openbabel_pool_timeout)
+
+    @property
+    def stats(self):
+        """Worker pool statistics.
+
+        :return: Probe, conversion and restart counters.
+        :rtype: :py:class:`collections.Counter`
+        """
+        return self.pool.stats
+
+    def probe(self):
+        """Start worker pool.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self.pool.start()
+
+    def convert(self, input_file_path, output_file_path, input_format, output_format, **options):
+        """Convert between formats using one of the pool workers.
+
+        :param str input_file_path: Path to input file.
+        :param str output_file_path: Path to output file.
+        :param str input_format: Input file format.
+        :param str output_format: Output file format.
+        :param options: Additional key-value options in ``obabel`` command-line form.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        with open(input_file_path, "r") as infile:
+            input_str = infile.read()
+
+        output_str = self.convert_str(input_str=input_str,
+                                      input_format=input_format,
+                                      output_format=output_format,
+                                      **options)
+
+        with open(output_file_path, "w") as outfile:
+            outfile.write(output_str)
+
+    def convert_str(self, input_str, input_format, output_format, **options):
+        """Convert string between formats using one of the pool workers.
+
+        :param str input_str: Input string.
+        :param str input_format: Input format.
+        :param str output_format: Output format.
+        :param options: Additional key-value options in ``obabel`` command-line form.
+        :return: Output string.
+        :rtype: :py:class:`str`
+        """
+        return self.pool.convert_str(input_str=input_str,
+                                     input_format=input_format,
+                                     output_format=output_format,
+                                     **options)
+
+
+def serve(infile=None, outfile=None):
+    """Run conversion worker loop: read JSON requests line by line and write JSON responses.
+
+    :param infile: Binary file-like object to read requests from, stdin by default.
+    :param outfile: Binary file-like object to write responses to, stdout by default.
+    :return: None.
+    :rtype: :py:obj:`None`
+    """
+    infile = infile or getattr(sys.stdin, "buffer", sys.stdin)
+    outfile = outfile or getattr(sys.stdout, "buffer", sys.stdout)
+
+    backend = PybelBackend()
+    backend.probe()
+
+    for line in iter(infile.readline, b""):
+        message = json.loads(line.decode("utf-8"))
+
+        try:
+            if message["command"] == "ping":
+                response = {"version": backend.version}
+            elif message["command"] == "convert":
+                response = {"output": backend.convert_str(input_str=message["input"],
+                                                          input_format=message["input_format"],
+                                                          output_format=message["output_format"],
+                                                          **message["options"])}
+            else:
+                response = {"error": 'Unknown command: "{}"'.format(message["command"])}
+        except Exception as error:
+            response = {"error": str(error)}
+
+        outfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        outfile.flush()
+
+
+def _import_bindings():
+    """Import Open Babel Python bindings.
+
+    :return: Open Babel bindings module or None if bindings are not installed.
+    :rtype: :py:class:`module` or :py:obj:`None`
+    """
+    try:
+        from openbabel import openbabel as ob  # Open Babel 3.x
+    except ImportError:
+        try:
+            import openbabel as ob  # Open Babel 2.x
+        except ImportError:
+            return None
+
+    if not hasattr(ob, "OBConversion"):
+        return None
+    return ob
+
+
+def _parse_options(options):
+    """Parse ``obabel`` command-line style options.
+
+    :param dict options: Key-value options, values are ``obabel`` command-line arguments, e.g. "-xF", "--gen2D".
+    :return: List of (option name, option type, option value) tuples, option type is "in", "out" or "gen".
+    :rtype: :py:class:`list`
+    """
+    parsed_options = []
+    arguments = []
+    for option in options.values():
+        arguments.extend(option.split())
+
+    for argument in arguments:
+        if argument.startswith("--"):
+            parsed_options.append([argument[2:], "gen", ""])
+        elif argument.startswith("-x") and len(argument) > 2:
+            parsed_options.append([argument[2:], "out", ""])
+        elif argument.startswith("-a") and len(argument) > 2:
+            parsed_options.append([argument[2:], "in", ""])
+        elif argument.startswith("-"):
+            parsed_options.append([argument[1:], "gen", ""])
+        elif parsed_options:
+            parsed_options[-1][2] = argument
+        else:
+            raise ValueError('Cannot parse Open Babel option: "{}"'.format(argument))
+
+    return [tuple(option) for option in parsed_options]
+
+
+BACKENDS = {
+    "subprocess": lambda **options: SubprocessBackend(capability_path=conf.openbabel_capability_path, **options),
+    "pybel": PybelBackend,
+    "pool": PoolBackend,
+}
+
+_backend = None
+
+
+def create_backend(name="auto", **backend_options):
+    """Create Open Babel backend.
+
+    :param str name: Backend name: "auto", "subprocess", "pybel" or "pool".
+    :param backend_options: Backend-specific options, e.g. ``size`` and ``timeout`` of "pool" backend.
+    :return: Open Babel backend.
+    :rtype: :class:`~isoenum.openbabel.SubprocessBackend`, :class:`~isoenum.openbabel.PybelBackend`
+            or :class:`~isoenum.openbabel.PoolBackend`
+    """
+    if name == "auto":
+        name = "pybel" if PybelBackend.is_available() else "subprocess"
+
+    try:
+        backend_factory = BACKENDS[name]
+    except KeyError:
+        raise ValueError('Unknown Open Babel backend: "{}". '
+                         'Available backends are: auto, {}'.format(name, ", ".join(sorted(BACKENDS))))
+    return backend_factory(**backend_options)
+
+
+def set_backend(name="auto", **backend_options):
+    """Select Open Babel backend shared within the current process.
+
+    :param str name: Backend name: "auto", "subprocess", "pybel" or "pool".
+    :param backend_options: Backend-specific options, e.g. ``size`` and ``timeout`` of "pool" backend.
+    :return: Open Babel backend.
+    :rtype: :class:`~isoenum.openbabel.SubprocessBackend`, :class:`~isoenum.openbabel.PybelBackend`
+            or :class:`~isoenum.openbabel.PoolBackend`
+    """
+    global _backend
+
+    if _backend is None or backend_options or name not in ("auto", _backend.name):
+        _backend = create_backend(name=name, **backend_options)
+    return _backend
+
+
+def get_backend():
+    """Get Open Babel backend shared within the current process.
+
+    :return: Open Babel backend.
+    :rtype: :class:`~isoenum.openbabel.SubprocessBackend`, :class:`~isoenum.openbabel.PybelBackend`
+            or :class:`~isoenum.openbabel.PoolBackend`
+    """
+    if _backend is None:
+        return set_backend(name=conf.openbabel_backend)
+    return _backend
+
+
+def convert_str(input_str, input_format, output_format, **options):
+    """Convert string between formats using Open Babel without writing any files.
+
+    :param str input_str: Input string.
+    :param str input_format: Input format.
+    :param str output_format: Output format.
+    :param options: Additional key-value options to pass to Open Babel.
+    :return: Output string.
+    :rtype: :py:class:`str`
+    """
+    backend = get_backend()
+
+    if hasattr(backend, "convert_str"):
+        return backend.convert_str(input_str=input_str,
+                                   input_format=input_format,
+                                   output_format=output_format,
+                                   **options)
+
+    # backend can only work with files, use scratch directory
+    with utils.scratch_file(mode="w") as infile, utils.scratch_file(mode="r") as outfile:
+        infile.write(input_str)
+        infile.flush()
+        backend.convert(input_file_path=infile.name,
+                        output_file_path=outfile.name,
+                        input_format=input_format,
+                        output_format=output_format,
+                        **options)
+        return outfile.read()
 
 
 def convert(input_file_path, output_file_path, input_format, output_format, **options):
     """Convert between formats using Open Babel.
-    
+
     :param str input_file_path: Path to input file.
     :param str output_file_path: Path to output file.
     :param str input_format: Input file format.
     :param str output_format: Output file format.
     :param options: Additional key-value options to pass to Open Babel.
     :return: None.
-    :rtype: :py:obj:`None` 
+    :rtype: :py:obj:`None`
     """
-    _test_openbabel()
-
-    cmd = [
-        "obabel",
-        "-i{}".format(input_format),
-        "{}".format(input_file_path),
-        "-o{}".format(output_format),
-        "-O{}".format(output_file_path),
-    ]
-
-    if options:
-        for option in options.values():
-            cmd.extend(option.split())
-
-    subprocess.call(cmd, shell=False, stdout=DEVNULL, stderr=subprocess.STDOUT)
+    get_backend().convert(input_file_path=input_file_path,
+                          output_file_path=output_file_path,
+                          input_format=input_format,
+                          output_format=output_format,
+                          **options)
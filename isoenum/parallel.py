@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+isoenum.parallel
+~~~~~~~~~~~~~~~~
+
+This module provides executors that run independent Open Babel conversion tasks
+serially, in a thread pool or in a process pool. Tasks are consumed lazily and only
+a bounded number of them are pending at any time, so memory does not grow with the
+number of tasks, and results are yielded in the order tasks were produced.
+
+Process pool workers receive only task arguments, e.g. ``Molfile`` text template and
+isotopes of labeling schemas, and the task context, e.g. ``Molfile`` objects, stays in
+the parent process. Threads share Open Babel backend of the parent process, they speed
+up "subprocess" and "pool" backends, while "pybel" backend mostly holds the GIL.
+"""
+
+import collections
+import logging
+import multiprocessing
+
+from . import cache
+from . import conf
+from . import openbabel
+
+try:
+    import concurrent.futures
+except ImportError:
+    # concurrent.futures is not available on Python 2.7 unless "futures" backport is installed
+    concurrent = None
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.StreamHandler())
+
+
+class SerialExecutor(object):
+    """Executor that runs tasks one after another in the current thread."""
+
+    name = 'serial'
+
+    def __init__(self, jobs=1, max_pending=None):
+        """Serial executor initializer.
+
+        :param int jobs: Ignored, tasks are run one at a time.
+        :param int max_pending: Ignored, a single task is pending at any time.
+        """
+        self.jobs = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def map_ordered(self, function, tasks):
+        """Run function on every task.
+
+        :param function: Module-level function called with task arguments.
+        :param tasks: Iterable of (arguments, context) tuples, arguments is tuple of function arguments
+                      and context is passed through to results untouched.
+        :return: Generator of (context, result) tuples in the order of tasks.
+        :rtype: :py:class:`types.GeneratorType`
+        """
+        for arguments, context in tasks:
+            yield context, function(*arguments)
+
+    def close(self):
+        """Release executor resources.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+
+
+class PoolExecutor(SerialExecutor):
+    """Base class of executors that run tasks concurrently in a ``concurrent.futures`` pool."""
+
+    def __init__(self, jobs=1, max_pending=None):
+        """Pool executor initializer.
+
+        :param int jobs: Number of workers.
+        :param int max_pending: Maximum number of submitted tasks whose results have not been yielded,
+                                twice the number of workers if not provided.
+        """
+        self.jobs = max(int(jobs), 1)
+        self.max_pending = max_pending or 2 * self.jobs
+        self._pool = None
+
+    def _create_pool(self):
+        """Create ``concurrent.futures`` pool.
+
+        :return: Pool of workers.
+        :rtype: :class:`concurrent.futures.Executor`
+        """
+        raise NotImplementedError('Subclass must implement pool creation.')
+
+    def map_ordered(self, function, tasks):
+        """Run function on every task concurrently, keeping at most ``max_pending`` tasks submitted.
+
+        :param function: Module-level function called with task arguments.
+        :param tasks: Iterable of (arguments, context) tuples, arguments is tuple of function arguments
+                      and context is passed through to results untouched.
+        :return: Generator of (context, result) tuples in the order of tasks.
+        :rtype: :py:class:`types.GeneratorType`
+        """
+        if self._pool is None:
+            self._pool = self._create_pool()
+
+        pending = collections.deque()
+        try:
+            for arguments, context in tasks:
+                pending.append((context, self._pool.submit(function, *arguments)))
+                if len(pending) >= self.max_pending:
+                    context, future = pending.popleft()
+                    yield context, future.result()
+
+            while pending:
+                context, future = pending.popleft()
+                yield context, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def close(self):
+        """Shut down pool of workers.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+class ThreadExecutor(PoolExecutor):
+    """Executor that runs tasks in a pool of threads sharing Open Babel backend and caches."""
+
+    name = 'thread'
+
+    def _create_pool(self):
+        return concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs)
+
+
+class ProcessExecutor(PoolExecutor):
+    """Executor that runs tasks in a pool of processes, every process uses its own
+    Open Babel backend and caches configured the same way as in the parent process."""
+
+    name = 'process'
+
+    def _create_pool(self):
+        initargs = (openbabel.get_backend().name, cache.get_settings())
+        try:
+            return concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs, initializer=_initialize_process,
+                                                          initargs=initargs)
+        except TypeError:
+            # initializer is not supported before Python 3.7, workers use default configuration
+            return concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs)
+
+
+EXECUTORS = {
+    SerialExecutor.name: SerialExecutor,
+    ThreadExecutor.name: ThreadExecutor,
+    ProcessExecutor.name: ProcessExecutor,
+}
+
+
+def create_executor(name=None, jobs=None, max_pending=None):
+    """Create executor.
+
+    :param str name: Executor name: "auto", "serial", "thread" or "process", "auto" uses
+                     process pool if more than one job is requested and serial executor otherwise.
+                     Serial executor is used if ``concurrent.futures`` is not available.
+    :param int jobs: Number of workers, number of CPUs if 0.
+    :param int max_pending: Maximum number of submitted tasks whose results have not been yielded.
+    :return: Executor.
+    :rtype: :class:`~isoenum.parallel.SerialExecutor`, :class:`~isoenum.parallel.ThreadExecutor`
+            or :class:`~isoenum.parallel.ProcessExecutor`
+    """
+    if name is None:
+        name = conf.executor
+
+    if jobs is None:
+        jobs = conf.jobs
+
+    jobs = int(jobs)
+    if jobs < 0:
+        raise ValueError('Number of jobs must be non-negative: "{}".'.format(jobs))
+    elif jobs == 0:
+        jobs = multiprocessing.cpu_count()
+
+    if name == 'auto':
+        name = 'process' if jobs > 1 and concurrent is not None else 'serial'
+    elif name in (ThreadExecutor.name, ProcessExecutor.name) and concurrent is None:
+        logger.warning('WARNING: "concurrent.futures" is not available, using "serial" executor.')
+        name = SerialExecutor.name
+
+    try:
+        executor_factory = EXECUTORS[name]
+    except KeyError:
+        raise ValueError('Unknown executor: "{}". '
+                         'Available executors are: auto, {}'.format(name, ', '.join(sorted(EXECUTORS))))
+    return executor_factory(jobs=jobs, max_pending=max_pending)
+
+
+def _initialize_process(backend_name, cache_settings):
+    """Configure Open Babel backend and caches of process pool worker.
+
+    :param str backend_name: Open Babel backend name of the parent process.
+    :param dict cache_settings: Cache settings of the parent process.
+    :return: None.
+    :rtype: :py:obj:`None`
+    """
+    openbabel.set_backend(name=backend_name)
+    cache.configure(**cache_settings)
@@ -9,6 +9,9 @@ This module provides reusable utility functions.
 """
 
 import itertools
+import tempfile
+
+from . import conf
 
 try:
     from urllib.parse import urlparse
@@ -41,3 +44,13 @@ def all_combinations(items):
     for rsize in range(1, len(items) + 1):
         combinations.extend(list(itertools.combinations(items, rsize)))
     return combinations
+
+
+def scratch_file(mode='w'):
+    """Create named temporary file within configured scratch directory (e.g. "/dev/shm").
+
+    :param str mode: File mode.
+    :return: Named temporary file that is deleted as soon as it is closed.
+    :rtype: :py:class:`tempfile.NamedTemporaryFile`
+    """
+    return tempfile.NamedTemporaryFile(mode=mode, dir=conf.scratch_dir)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+isoenum.writers
+~~~~~~~~~~~~~~~
+
+This module provides incremental writers of conversion results. Every writer
+consumes (``Molfile``, data) records one at a time, e.g. from
+:func:`~isoenum.api.iter_iso`, formats them and writes them in buffered chunks,
+so output starts as soon as the first records are created and the whole output
+is never kept in memory. Output files are compressed with gzip or Zstandard
+when their path ends with ".gz" or ".zst".
+"""
+
+import csv
+import gzip
+import io
+import json
+
+from ctfile.ctfile import CtabAtomBondEncoder
+
+from . import conf
+from . import fileio
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# compression of output file by extension of its path
+COMPRESSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd',
+}
+
+
+class OutputWriter(object):
+    """Base class of incremental writers of conversion results."""
+
+    def __init__(self, outfile, buffer_size=None):
+        """Output writer initializer.
+
+        :param outfile: Text file-like object.
+        :param int buffer_size: Number of characters collected before they are written to output file.
+        """
+        self.outfile = outfile
+        self.buffer_size = conf.output_buffer_size if buffer_size is None else buffer_size
+        self.count = 0
+        self._buffer = []
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def write_records(self, records):
+        """Write records.
+
+        :param records: Iterable of (``Molfile``, data) tuples.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        for molfile, data in records:
+            self.write_record(molfile=molfile, data=data)
+
+    def write_record_strs(self, record_strs):
+        """Write records that are already formatted, e.g. records of merged output files.
+
+        :param record_strs: Iterable of record strings in format of writer.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        for record_str in record_strs:
+            self._write(record_str)
+            self.count += 1
+
+    def write_record(self, molfile, data):
+        """Write single record.
+
+        :param molfile: ``Molfile`` instance.
+        :type molfile: :class:`~ctfile.ctfile.Molfile`
+        :param dict data: Data items of ``Molfile``.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self._write(self.format_record(molfile=molfile, data=data))
+        self.count += 1
+
+    def format_record(self, molfile, data):
+        """Format single record.
+
+        :param molfile: ``Molfile`` instance.
+        :type molfile: :class:`~ctfile.ctfile.Molfile`
+        :param dict data: Data items of ``Molfile``.
+        :return: Record string.
+        :rtype: :py:class:`str`
+        """
+        raise NotImplementedError('Subclass must implement record formatting.')
+
+    def flush(self):
+        """Write buffered records into output file.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        if self._buffer:
+            self.outfile.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+        self.outfile.flush()
+
+    def close(self):
+        """Write buffered records, output file is not closed.
+
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self.flush()
+
+    def _write(self, text):
+        """Buffer text and write buffer into output file once it is full.
+
+        :param str text: Text.
+        :return: None.
+        :rtype: :py:obj:`None`
+        """
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+
+class InChIWriter(OutputWriter):
+    """Writer of ``InChI`` strings, one per line."""
+
+    def format_record(self, molfile, data):
+        return ''.join('{}\n'.format(inchi.strip()) for inchi in data['InChI'])
+
+
+class SDfileWriter(OutputWriter):
+    """Writer of ``SDfile`` records."""
+
+    def format_record(self, molfile, data):
+        return fileio.create_sdfile_obj([(molfile, data)]).writestr(file_format='ctfile')
+
+
+class CSVWriter(OutputWriter):
+    """Writer of tab-separated data items, one record per row."""
+
+    def __init__(self, outfile, buffer_size=None):
+        super(CSVWriter, self).__init__(outfile=outfile, buffer_size=buffer_size)
+        self._row = io.StringIO()
+        self._csvwriter = csv.writer(self._row, delimiter='\t')
+
+    def format_record(self, molfile, data):
+        self._row.seek(0)
+        self._row.truncate()
+        self._csvwriter.writerow([' + '.join(item.strip() for item in values) for values in data.values()])
+        return self._row.getvalue()
+
+
+class JSONWriter(OutputWriter):
+    """Writer of JSON object of all records, the same as JSON ``SDfile`` but created incrementally."""
+
+    def format_record(self, molfile, data):
+        entry = json.dumps({'molfile': molfile, 'data': data}, indent=4, cls=CtabAtomBondEncoder)
+        return '{}    "{}": {}'.format(',\n' if self.count else '{\n', self.count + 1, entry.replace('\n', '\n    '))
+
+    def close(self):
+        self._write('\n}\n' if self.count else '{}\n')
+        super(JSONWriter, self).close()
+
+
+class JSONLinesWriter(OutputWriter):
+    """Writer of JSON Lines, one compact JSON object with "molfile" and "data" per record."""
+
+    def format_record(self, molfile, data):
+        return '{}\n'.format(json.dumps({'molfile': molfile, 'data': data}, cls=CtabAtomBondEncoder))
+
+
+WRITERS = {
+    'inchi': InChIWriter,
+    'sdf': SDfileWriter,
+    'mol': SDfileWriter,
+    'csv': CSVWriter,
+    'json': JSONWriter,
+    'jsonl': JSONLinesWriter,
+}
+
+
+def create_writer(outfile, file_format='inchi', buffer_size=None):
+    """Create incremental writer of conversion results.
+
+    :param outfile: Text file-like object.
+    :param str file_format: File format: "inchi", "mol", "sdf", "csv", "json" or "jsonl".
+    :param int buffer_size: Number of characters collected before they are written to output file.
+    :return: Output writer.
+    :rtype: :class:`~isoenum.writers.OutputWriter`
+    """
+    try:
+        writer_factory = WRITERS[file_format.lower()]
+    except KeyError:
+        raise ValueError('Unknown output format: "{}".\n'
+                         'Available formats are: {}'.format(file_format, ', '.join(sorted(WRITERS))))
+    return writer_factory(outfile=outfile, buffer_size=buffer_size)
+
+
+def compression_of(path):
+    """Find compression of output file from extension of its path.
+
+    :param str path: Path to output file.
+    :return: Compression name: "gzip" or "zstd", None if output file is not compressed.
+    :rtype: :py:class:`str` or :py:obj:`None`
+    """
+    for extension, compression in COMPRESSIONS.items():
+        if path.lower().endswith(extension):
+            return compression
+    return None
+
+
+def open_output_file(path, compression=None):
+    """Open text output file, compressed if compression is provided.
+
+    :param str path: Path to output file.
+    :param str compression: Compression name: "gzip" or "zstd", output file is not compressed if not provided.
+    :return: Text file-like object.
+    :rtype: :py:class:`io.TextIOBase`
+    """
+    if compression is None:
+        return open(path, 'w')
+
+    elif compression == 'gzip':
+        return gzip.open(path, 'wt')
+
+    elif compression == 'zstd':
+        if zstandard is None:
+            raise ValueError('Zstandard compression requires "zstandard" package, install it '
+                             '(e.g. "pip install zstandard") or use ".gz" extension.')
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, 'wb')), encoding='utf-8')
+
+    raise ValueError('Unknown compression: "{}". '
+                     'Available compressions are: {}'.format(compression, ', '.join(sorted(COMPRESSIONS.values()))))
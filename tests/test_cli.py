@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import gzip
+import json
 import os
 import shutil
 import subprocess
@@ -306,6 +308,398 @@ def test_name_command(path, parameters, expected_output):
     assert set(output.split()) == expected_output
 
 
+def test_openbabel_probed_once():
+    command = "python -m isoenum name tests/example_data/valine.mol -e 13:C --verbose"
+    _, stderr = _run_command(command)
+    assert b"Open Babel: 1 probe(s)" in stderr
+
+
+def test_inchi_batch_conversion():
+    command = "python -m isoenum name tests/example_data/valine.mol -e 13:C --backend=subprocess --verbose"
+    stdout, stderr = _run_command(command)
+    assert len(stdout.split()) == 31
+    assert b"1 conversion(s)" in stderr
+
+
+def _run_command(command):
+    process = subprocess.Popen(command.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    assert process.returncode == 0, stderr
+    return stdout, stderr
+
+
+def _create_multiple_record_sdfile(paths, output_path):
+    if not os.path.isdir(os.path.dirname(output_path)):
+        os.makedirs(os.path.dirname(output_path))
+    with open(output_path, "w") as outfile:
+        for path in paths:
+            with open(path) as infile:
+                outfile.write(infile.read().rstrip() + "\n")
+
+
+def test_multiple_record_sdfile():
+    paths = ("tests/example_data/valine.sdf", "tests/example_data/bmse000040.sdf")
+    _create_multiple_record_sdfile(paths, "tests/example_data/tmp/multiple.sdf")
+
+    expected = set()
+    for path in paths:
+        command = "python -m isoenum name {} -e 13:C".format(path)
+        expected.update(subprocess.check_output(command.split()).split())
+
+    command = "python -m isoenum name tests/example_data/tmp/multiple.sdf -e 13:C"
+    assert set(subprocess.check_output(command.split()).split()) == expected
+
+
+@pytest.mark.parametrize(
+    "selection, expected_path",
+    [
+        ("--records=2", "tests/example_data/bmse000040.sdf"),
+        ("--records=3-3", "tests/example_data/valine.sdf"),
+        ("--ids=3561 --id-field=PUBCHEM_SUBSTANCE_ID", "tests/example_data/bmse000040.sdf"),
+    ],
+)
+def test_record_selection(selection, expected_path):
+    paths = ("tests/example_data/valine.sdf", "tests/example_data/bmse000040.sdf", "tests/example_data/valine.sdf")
+    _create_multiple_record_sdfile(paths, "tests/example_data/tmp/selection.sdf")
+
+    command = "python -m isoenum name {} -e 13:C".format(expected_path)
+    expected = set(subprocess.check_output(command.split()).split())
+
+    command = "python -m isoenum name tests/example_data/tmp/selection.sdf -e 13:C {}".format(selection)
+    assert set(subprocess.check_output(command.split()).split()) == expected
+    assert os.path.exists("tests/example_data/tmp/selection.sdf.idx")
+
+
+@pytest.mark.parametrize(
+    "file_name, identifiers",
+    [
+        ("identifiers.txt",
+         ["InChI=1S/C2H4O2/c1-2(3)4/h1H3,(H,3,4)", "CC(C)C(N)C(O)=O", "InChI=1S/CH4/h1H4", "c1ccccc1"]),
+        ("titled.smi",
+         ["CC(=O)O acetic_acid", "CC(C)C(N)C(O)=O valine", "InChI=1S/CH4/h1H4", "c1ccccc1\tbenzene ring"]),
+    ]
+)
+def test_identifier_list_file(file_name, identifiers):
+    path = "tests/example_data/tmp/{}".format(file_name)
+    with open(path, "w") as outfile:
+        outfile.write("\n".join(identifiers) + "\n")
+
+    expected = set()
+    for identifier in identifiers:
+        command = ["python", "-m", "isoenum", "name", identifier, "-a", "13:C"]
+        expected.update(subprocess.check_output(command).split())
+    assert len(expected) == len(identifiers)
+
+    command = "python -m isoenum name {} -a 13:C --backend=subprocess --verbose".format(path)
+    stdout, stderr = _run_command(command)
+    assert set(stdout.split()) == expected
+    assert b"CTfile cache: 0 hit(s), 4 miss(es)" in stderr
+    assert b"6 conversion(s)" in stderr
+
+
+@pytest.mark.parametrize(
+    "path, parameters, expected_count",
+    [
+        ("CCCCCCCCCCCCCCCCCCCCCCCCCCCCCC(=O)O", "-e 13:C:1:1", 30),
+        ("CCCCCCCCCCCCCCCCCCCCCCCCCCCCCC(=O)O", "-e 13:C:1:2", 465),
+        ("CCCCCCCCCCCCCCCCCCCCCCCCCCCCCC(=O)O", "-e 13:C:1:2 -e 13:C:2:3", 435),
+        ("CCCCCCCCCCCCCCCCCCCCCCCCCCCCCC(=O)O", "-s 13:C:1 -e 13:C:1:1", 1),
+        ("CCCCCCCCCCCCCCCCCCCCCCCCCCCCCC(=O)O", "-e 13:C:0:1 -e 18:O:1:1", 62),
+        ("CCC(C)C", "-e 13:C:0:5 --complete --symmetry", 24),
+        ("tests/example_data/valine.mol", "-e 13:C --offset=5 --limit=10", 10),
+        ("tests/example_data/valine.mol", "-e 13:C --symmetry --offset=5 --limit=10", 7),
+        ("tests/example_data/valine.mol", "-e 13:C --mass-window=118.07:118.09", 5),
+        ("tests/example_data/valine.mol", "-e 13:C --top=3", 3),
+    ],
+)
+def test_enumeration_count(path, parameters, expected_count):
+    command = "python -m isoenum name {} {} --format=csv".format(path, parameters)
+    rows = [line for line in subprocess.check_output(command.split()).splitlines() if line]
+    assert len(rows) == expected_count
+
+    command = "python -m isoenum name {} {} --count".format(path, parameters)
+    total = subprocess.check_output(command.split()).splitlines()[-1].split(b"\t")
+    assert int(total[1]) == expected_count
+    assert int(total[2]) == 1
+
+
+@pytest.mark.parametrize(
+    "path, parameters, expected_count",
+    [
+        ("tests/example_data/valine.mol", "-e 13:C", 23),
+        ("OC(=O)CC(O)(CC(O)=O)C(O)=O", "-e 13:C", 39),
+        ("OCC(O)CO", "-e 2:H:0:2", 14),
+        ("OCC(O)CO", "-e 13:C -e 2:H:0:1", 33),
+    ],
+)
+def test_symmetry(path, parameters, expected_count):
+    command = "python -m isoenum name {} {}".format(path, parameters)
+    expected = subprocess.check_output(command.split()).split()
+
+    command = "python -m isoenum name {} {} --symmetry --format=csv".format(path, parameters)
+    rows = [line.split(b"\t") for line in subprocess.check_output(command.split()).splitlines() if line]
+    assert len(rows) == expected_count
+    assert {inchi for inchi, _ in rows} == set(expected)
+    assert sum(int(multiplicity) for _, multiplicity in rows) == len(expected)
+
+
+@pytest.mark.parametrize(
+    "command, expected_stats",
+    [
+        ("name tests/example_data/valine.mol -e 13:C", b"InChI cache: 31 hit(s), 0 miss(es)"),
+        ("nmr tests/example_data/valine.inchi --type=1D1H", b"CTfile cache: 2 hit(s), 0 miss(es)"),
+    ],
+)
+def test_conversion_cache(command, expected_stats):
+    command = "python -m isoenum {} --cache-dir=tests/example_data/tmp/cache --verbose".format(command)
+    first_stdout, _ = _run_command(command)
+    second_stdout, second_stderr = _run_command(command)
+    assert set(first_stdout.split()) == set(second_stdout.split())
+    assert b"0 conversion(s)" in second_stderr
+    assert expected_stats in second_stderr
+
+
+@pytest.mark.parametrize(
+    "path, parameters",
+    [
+        ("tests/example_data/valine.mol", "-e 13:C"),
+        ("tests/example_data/valine.sdf", "-a 13:C -s 13:C:2 -e 15:N"),
+        ("tests/example_data/valine.inchi", "-s 13:C:2"),
+        ("tests/example_data/bmse000040.mol", "-e 13:C"),
+    ],
+)
+def test_openbabel_backends_identical(path, parameters):
+    pytest.importorskip("openbabel")
+    outputs = []
+    for backend in ("subprocess", "pybel", "pool"):
+        command = "python -m isoenum name {} {} --backend={}".format(path, parameters, backend)
+        outputs.append(set(subprocess.check_output(command.split()).split()))
+    assert outputs[0] == outputs[1] == outputs[2]
+
+
+def test_numpy_labeling_engine_without_numpy():
+    try:
+        import numpy  # noqa: F401
+        pytest.skip("NumPy is installed")
+    except ImportError:
+        pass
+
+    command = "python -m isoenum name tests/example_data/valine.mol -e 13:C --engine=numpy"
+    process = subprocess.Popen(command.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    assert process.returncode != 0
+    assert b'Labeling engine "numpy" requires NumPy' in stderr
+
+
+@pytest.mark.parametrize(
+    "path, parameters",
+    [
+        ("tests/example_data/valine.mol", "-e 13:C"),
+        ("OCC(O)CO", "-e 13:C:0:2 -e 18:O:1:2"),
+    ],
+)
+def test_offset_limit(path, parameters):
+    command = "python -m isoenum name {} {}".format(path, parameters)
+    expected = subprocess.check_output(command.split()).split()
+
+    command = "python -m isoenum name {} {} --offset=5 --limit=10".format(path, parameters)
+    assert subprocess.check_output(command.split()).split() == expected[5:15]
+
+
+def test_checkpoint_resume():
+    command = "python -m isoenum name tests/example_data/valine.mol -e 13:C"
+    expected = subprocess.check_output(command.split())
+
+    checkpoint_path = "tests/example_data/tmp/checkpoint.json"
+    output_path = "tests/example_data/tmp/checkpoint.inchi"
+    command = "python -m isoenum name tests/example_data/valine.mol -e 13:C " \
+              "--checkpoint={} --output={} --verbose".format(checkpoint_path, output_path)
+    _run_command(command)
+    with open(output_path, "rb") as infile:
+        assert infile.read() == expected
+
+    # pretend that enumeration was interrupted after 12 labeling schemas
+    with open(checkpoint_path, "r") as infile:
+        checkpoint = json.load(infile)
+    checkpoint["completed"]["1"] = 12
+    checkpoint["output_size"] = len(b"".join(expected.splitlines(True)[:12]))
+    with open(checkpoint_path, "w") as outfile:
+        json.dump(checkpoint, outfile)
+
+    _, stderr = _run_command(command)
+    assert b"InChI cache: 0 hit(s), 19 miss(es)" in stderr
+    with open(output_path, "rb") as infile:
+        assert infile.read() == expected
+
+    _, stderr = _run_command(command)
+    assert b"0 conversion(s)" in stderr
+
+
+@pytest.mark.parametrize(
+    "file_format, shard_count",
+    [
+        ("inchi", 5),
+        ("sdf", 2),
+    ],
+)
+def test_shard_merge(file_format, shard_count):
+    paths = ("tests/example_data/valine.sdf", "tests/example_data/bmse000040.sdf")
+    _create_multiple_record_sdfile(paths, "tests/example_data/tmp/shards.sdf")
+
+    command = "python -m isoenum name tests/example_data/tmp/shards.sdf -e 13:C"
+    expected = []
+    for inchi in subprocess.check_output(command.split()).split():
+        if inchi not in expected:
+            expected.append(inchi)
+
+    shard_paths = []
+    for shard_number in range(1, shard_count + 1):
+        shard_path = "tests/example_data/tmp/shard{}.{}".format(shard_number, file_format)
+        command = "python -m isoenum name tests/example_data/tmp/shards.sdf -e 13:C " \
+                  "--shard={}/{} --format={} --output={}".format(shard_number, shard_count, file_format, shard_path)
+        subprocess.check_call(command.split())
+        shard_paths.append(shard_path)
+
+    merged_path = "tests/example_data/tmp/merged.{}".format(file_format)
+    command = "python -m isoenum merge {} --format={} --output={}".format(" ".join(shard_paths), file_format,
+                                                                          merged_path)
+    subprocess.check_call(command.split())
+
+    command = "python -m isoenum name {}".format(merged_path)
+    assert subprocess.check_output(command.split()).split() == expected
+
+
+@pytest.mark.parametrize(
+    "path, parameters, cutoff, expected_count",
+    [
+        ("OCC(O)CO", "-e 13:C", "--top=4", 4),
+        ("OCC(O)CO", "-e 13:C -e 18:O", "--cumulative-probability=1", 63),
+        ("OCC(O)CO", "-e 13:C --enrichment=13:C:0.99", "--min-probability=0.0001", 4),
+    ],
+)
+def test_probability_cutoff(path, parameters, cutoff, expected_count):
+    command = "python -m isoenum name {} {}".format(path, parameters)
+    expected = subprocess.check_output(command.split()).split()
+
+    command = "python -m isoenum name {} {} {} --format=csv".format(path, parameters, cutoff)
+    rows = [line.split(b"\t") for line in subprocess.check_output(command.split()).splitlines() if line]
+    probabilities = [float(probability) for _, probability in rows]
+    assert len(rows) == expected_count
+    assert {inchi for inchi, _ in rows} <= set(expected)
+    assert probabilities == sorted(probabilities, reverse=True)
+
+
+@pytest.mark.parametrize(
+    "path, parameters, mass_filter, expected_count",
+    [
+        ("OCC(O)CO", "-e 13:C -e 2:H:0:2", "--mass-window=94.05:94.07", 55),
+        ("OCC(O)CO", "-e 13:C", "--target-mass=93.0507 --ppm=10", 3),
+    ],
+)
+def test_mass_window(path, parameters, mass_filter, expected_count):
+    command = "python -m isoenum name {} {}".format(path, parameters)
+    expected = subprocess.check_output(command.split()).split()
+
+    command = "python -m isoenum name {} {} {} --format=csv".format(path, parameters, mass_filter)
+    rows = [line.split(b"\t") for line in subprocess.check_output(command.split()).splitlines() if line]
+    assert len(rows) == expected_count
+    assert {inchi for inchi, _ in rows} <= set(expected)
+    assert all(93.0 < float(mass) < 94.07 for _, mass in rows)
+
+
+@pytest.mark.parametrize(
+    "path, parameters, expected_fractions",
+    [
+        ("OCC(O)CO", "--max-shift=3", ["0.960317", "0.0331406", "0.00632341", "0.000204025"]),
+        ("OCC(O)CO", "--enrichment=13:C:0.99 --enrichment=2:H:0 --max-shift=4",
+         ["9.92728e-07", "0.000294841", "0.0291895", "0.963278", "0.00128074"]),
+        ("OCC(O)CO", "-s 13:C:2 --atoms=1-3 --enrichment=13:C:1 --enrichment=18:O:0 --enrichment=17:O:0",
+         ["0", "0", "1"]),
+        ("NC(CS)C(=O)O", "--max-shift=2", ["0.911203", "0.0415172", "0.045265"]),
+        ("ClCCl", "--enrichment=13:C:0 --enrichment=2:H:0", ["0.573958", "0", "0.367284", "0", "0.0587578"]),
+        ("C[Fe]", "--enrichment=13:C:0 --enrichment=2:H:0", ["1"]),
+    ],
+)
+def test_mass_isotopomer_distribution(path, parameters, expected_fractions):
+    command = "python -m isoenum mid {} {}".format(path, parameters)
+    header, row = subprocess.check_output(command.split()).decode("utf-8").splitlines()
+    assert header.split("\t") == ["Record"] + ["M+{}".format(shift) for shift in range(len(expected_fractions))]
+    assert row.split("\t") == ["1"] + expected_fractions
+
+
+@pytest.mark.parametrize(
+    "path, parameters",
+    [
+        ("tests/example_data/valine.mol", "-e 13:C:0:2"),
+        ("tests/example_data/bmse000040.sdf", "-s 13:C:2 -e 2:H:0:1"),
+    ],
+)
+def test_sdf_output_molfiles(path, parameters):
+    command = "python -m isoenum name {} {}".format(path, parameters)
+    expected = subprocess.check_output(command.split()).split()
+
+    command = "python -m isoenum name {} {} --format=sdf --output=tests/example_data/tmp/molfiles.sdf".format(
+        path, parameters)
+    subprocess.check_call(command.split())
+
+    command = "python -m isoenum name tests/example_data/tmp/molfiles.sdf"
+    assert subprocess.check_output(command.split()).split() == expected
+
+
+@pytest.mark.parametrize("file_format", ["inchi", "sdf", "csv", "json", "jsonl"])
+@pytest.mark.parametrize("extension", ["", ".gz"])
+def test_streaming_output(file_format, extension):
+    command = "python -m isoenum name tests/example_data/valine.mol -e 13:C:0:2 --format={}".format(file_format)
+    expected = subprocess.check_output(command.split())
+
+    output_path = "tests/example_data/tmp/streaming.{}{}".format(file_format, extension)
+    subprocess.check_call(command.split() + ["--output={}".format(output_path)])
+    with (gzip.open if extension else open)(output_path, "rb") as infile:
+        assert infile.read() == expected
+
+    if file_format == "json":
+        assert len(json.loads(expected.decode("utf-8"))) == 15
+    elif file_format == "jsonl":
+        records = [json.loads(line) for line in expected.decode("utf-8").splitlines()]
+        assert len(records) == 15
+        assert all(set(record) == {"molfile", "data"} and record["data"]["InChI"] for record in records)
+
+
+@pytest.mark.parametrize(
+    "path, parameters, expected_options, options",
+    [
+        ("tests/example_data/valine.mol", "-e 13:C", "--engine=python", "--engine=numpy"),
+        ("tests/example_data/valine.mol", "-e 13:C:1:3 -e 15:N --complete", "--engine=python", "--engine=numpy"),
+        ("tests/example_data/valine.sdf", "-a 13:C -s 13:C:2 -e 15:N", "--engine=python", "--engine=numpy"),
+        ("OCC(O)CO", "-s 13:C:2 -e 13:C:0:1 -e 18:O:1:2 -e 17:O:0:1", "--engine=python", "--engine=numpy"),
+        ("tests/example_data/tmp/records.sdf", "-e 13:C:0:2", "", "--executor=thread --jobs=3"),
+        ("tests/example_data/tmp/records.sdf", "-e 13:C:0:2", "", "--executor=process --jobs=3"),
+        ("tests/example_data/tmp/records.sdf", "-e 13:C:0:2 --symmetry", "", "--executor=thread --jobs=3"),
+        ("tests/example_data/tmp/records.sdf", "-e 13:C:0:2 --symmetry", "", "--executor=process --jobs=3"),
+        ("tests/example_data/tmp/records.sdf", "-a 13:C -e 2:H:0:1 --top=5", "", "--executor=thread --jobs=3"),
+        ("tests/example_data/tmp/records.sdf", "-a 13:C -e 2:H:0:1 --top=5", "", "--executor=process --jobs=3"),
+    ] + [
+        (path, parameters, "", "--inchi-engine={}".format(inchi_engine))
+        for path in ("tests/example_data/valine.mol", "tests/example_data/bmse000040.mol")
+        for parameters in ("-a 13:C", "-e 13:C", "-s 13:C:3 -s 18:O:8", "-e 18:O", "-e 13:C:0:2 -e 2:H:0:1",
+                           "-a 2:H -a 13:C")
+        for inchi_engine in ("synthesize", "verify")
+    ],
+)
+def test_output_independent_of_options(path, parameters, expected_options, options):
+    if "--engine=numpy" in options:
+        pytest.importorskip("numpy")
+    if path == "tests/example_data/tmp/records.sdf":
+        _create_multiple_record_sdfile(["tests/example_data/valine.sdf", "tests/example_data/bmse000040.sdf"] * 3,
+                                       path)
+
+    command = "python -m isoenum name {} {} --no-cache {}".format(path, parameters, expected_options)
+    expected = subprocess.check_output(command.split())
+
+    command = "python -m isoenum name {} {} --no-cache {}".format(path, parameters, options)
+    assert subprocess.check_output(command.split()) == expected
+
+
 def teardown_module(module):
     if os.path.exists("tests/example_data/tmp/"):
         shutil.rmtree("tests/example_data/tmp")